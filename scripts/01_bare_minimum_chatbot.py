@@ -9,16 +9,13 @@ Key Learning: "This is how easy it is to get started"
 To run: uv run chainlit run scripts/01_bare_minimum_chatbot.py
 """
 
-import os
-from openai import OpenAI
 import chainlit as cl
+from utils.llm import client, MODEL
 
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
 
 @cl.on_message
 async def main(message: cl.Message):
-    response = client.chat.completions.create(
+    response = await client.chat.completions.create(
         model=MODEL,
         messages=[{"role": "user", "content": message.content}]
     )
@@ -13,21 +13,21 @@ New Features:
 To run: uv run chainlit run scripts/02_with_system_prompt.py
 """
 
-import os
-from openai import OpenAI
 import chainlit as cl
+from utils.history import compact_history
+from utils.llm import client, MODEL
+from utils.schedule import load_schedule
+from utils.streaming import stream_to_message
 
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+
+# Opening hours from business_info.json (utils/schedule.py)
+schedule = load_schedule()
 
 # System prompt defines the bot's personality and knowledge
-SYSTEM_PROMPT = """You are the AI assistant for Bella's Italian Restaurant, a family-owned Italian restaurant.
+SYSTEM_PROMPT = f"""You are the AI assistant for Bella's Italian Restaurant, a family-owned Italian restaurant.
 
 BUSINESS INFORMATION:
-- Hours: Tuesday-Sunday, 11am-10pm (Closed Mondays)
-  - Friday: 11am-11pm
-  - Saturday: 10am-11pm (brunch from 10am-2pm)
-  - Sunday: 10am-9pm (brunch from 10am-2pm)
+{schedule.prompt_text()}
 - Services: Dine-in, takeout, delivery (via DoorDash), catering
 - Location: 123 Main Street, Downtown, CA 90210
 - Phone: (555) 123-4567
@@ -61,12 +61,13 @@ async def main(message: cl.Message):
 
     # Add user message to history
     message_history.append({"role": "user", "content": message.content})
+    message_history = compact_history(message_history)  # token budget, older turns summarized
 
     # Create the full message list with system prompt
     messages = [{"role": "system", "content": SYSTEM_PROMPT}] + message_history
 
     # Create streaming response
-    stream = client.chat.completions.create(
+    stream = await client.chat.completions.create(
         model=MODEL,
         messages=messages,
         stream=True
@@ -76,12 +77,8 @@ async def main(message: cl.Message):
     msg = cl.Message(content="")
     await msg.send()
 
-    full_response = ""
-    for chunk in stream:
-        if chunk.choices[0].delta.content:
-            content = chunk.choices[0].delta.content
-            full_response += content
-            await msg.stream_token(content)
+    # Tokens are batched into fewer websocket frames (see utils/streaming.py)
+    full_response = await stream_to_message(stream, msg)
 
     await msg.update()
 
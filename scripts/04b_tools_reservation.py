@@ -8,31 +8,37 @@ New Features:
 - create_reservation tool
 - Multi-turn conversation to collect all required details
 - Phone number validation
-- Confirmation number generation
+- Reservations saved with unique confirmation numbers (utils/reservations.py)
+- Real table availability; a booking is only saved while a table is free
 - Complete reservation summary
 
 To run: uv run chainlit run scripts/04b_tools_reservation.py
 """
 
-import os
 import json
 import re
-import random
 from datetime import datetime
-from openai import OpenAI
 import chainlit as cl
-from typing import Tuple
+from utils.availability import load_availability
+from utils.guardrail_pipeline import load_pipeline
+from utils.history import compact_history
+from utils.llm import client, MODEL
+from utils.reservations import SlotUnavailable, load_reservation_store
+from utils.tool_calls import run_tool_calls
+from utils.tool_registry import (
+    Date, GuestName, PartySize, Phone, SpecialRequests, Time, ToolRegistry
+)
 
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
 
-SYSTEM_PROMPT = """You are the AI assistant for Bella's Italian Restaurant, a family-owned Italian restaurant.
+# Bookings persist in data/reservations.db and are only made while a table
+# is free (tables and hours from business_info.json)
+availability = load_availability(load_reservation_store())
+schedule = availability.schedule   # hours + holiday exceptions (utils/schedule.py)
+
+SYSTEM_PROMPT = f"""You are the AI assistant for Bella's Italian Restaurant, a family-owned Italian restaurant.
 
 BUSINESS INFORMATION:
-- Hours: Tuesday-Sunday, 11am-10pm (Closed Mondays)
-  - Friday: 11am-11pm
-  - Saturday: 10am-11pm (brunch from 10am-2pm)
-  - Sunday: 10am-9pm (brunch from 10am-2pm)
+{schedule.prompt_text()}
 - Location: 123 Main Street, Downtown, CA 90210
 - Phone: (555) 123-4567
 
@@ -51,105 +57,25 @@ WORKFLOW FOR RESERVATIONS:
 TONE: Warm, friendly, professional - guide guests through the process naturally
 """
 
-# Tool definitions
-TOOLS = [
-    {
-        "type": "function",
-        "function": {
-            "name": "check_availability",
-            "description": "Check if a table is available for the requested date, time, and party size",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "date": {"type": "string", "description": "Date in YYYY-MM-DD format"},
-                    "time": {"type": "string", "description": "Time in HH:MM 24-hour format"},
-                    "party_size": {"type": "integer", "description": "Number of guests (1-20)"}
-                },
-                "required": ["date", "time", "party_size"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "create_reservation",
-            "description": "Create a restaurant reservation after availability has been confirmed",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string", "description": "Guest's full name"},
-                    "phone": {"type": "string", "description": "Guest's phone number"},
-                    "date": {"type": "string", "description": "Date in YYYY-MM-DD format"},
-                    "time": {"type": "string", "description": "Time in HH:MM 24-hour format"},
-                    "party_size": {"type": "integer", "description": "Number of guests"},
-                    "special_requests": {"type": "string", "description": "Any special requests or notes (optional)"}
-                },
-                "required": ["name", "phone", "date", "time", "party_size"]
-            }
-        }
-    }
-]
+# Tool definitions: declared on the functions below, schemas generated from type hints
+registry = ToolRegistry()
 
 
+@registry.tool("Check if a table is available for the requested date, time, and party size")
 @cl.step(name="Check Availability", type="tool")
-async def check_availability(date: str, time: str, party_size: int) -> dict:
-    """Check table availability (mock implementation)"""
-    try:
-        booking_date = datetime.strptime(date, "%Y-%m-%d")
-        booking_time = datetime.strptime(time, "%H:%M")
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-
-        if booking_date < today:
-            return {"available": False, "message": "Cannot book tables in the past."}
-
-        if booking_date.weekday() == 0:  # Monday
-            return {"available": False, "message": "We're closed on Mondays."}
-
-        hour = booking_time.hour
-
-        # Simple availability check
-        if party_size >= 8:
-            return {
-                "available": False,
-                "message": f"For parties of {party_size}, please call (555) 123-4567 for our private dining room."
-            }
-
-        # Peak hours have some unavailability
-        if 18 <= hour < 20 and random.random() < 0.3:
-            return {
-                "available": False,
-                "message": f"Fully booked at {time}. Try 5:00 PM, 5:30 PM, or 8:00 PM.",
-                "alternative_times": ["17:00", "17:30", "20:00"]
-            }
-
-        formatted_date = booking_date.strftime("%A, %B %d, %Y")
-        formatted_time = booking_time.strftime("%I:%M %p")
-
-        return {
-            "available": True,
-            "message": f"Table available on {formatted_date} at {formatted_time} for {party_size} guests!",
-            "date": date,
-            "time": time,
-            "party_size": party_size
-        }
-
-    except ValueError:
-        return {"available": False, "message": "Invalid date or time format."}
+async def check_availability(date: Date, time: Time, party_size: PartySize) -> dict:
+    """Check table availability (tables, hours and bookings; see utils/availability.py)"""
+    return await availability.check(date, time, party_size)
 
 
+@registry.tool("Create a restaurant reservation after availability has been confirmed")
 @cl.step(name="Create Reservation", type="tool")
-async def create_reservation(
-    name: str,
-    phone: str,
-    date: str,
-    time: str,
-    party_size: int,
-    special_requests: str = ""
-) -> dict:
+async def create_reservation(name: GuestName, phone: Phone, date: Date, time: Time, party_size: PartySize,
+                             special_requests: SpecialRequests = "") -> dict:
     """
-    Create a reservation (mock implementation).
+    Create a reservation and save it, if a table is still free.
 
-    In production, this would integrate with a real booking system.
+    Repeating the call with the same details returns the same reservation.
     """
     # Validate phone number (simple validation)
     phone_clean = re.sub(r'[^\d]', '', phone)
@@ -167,17 +93,22 @@ async def create_reservation(
     else:
         formatted_phone = phone
 
-    # Generate confirmation number
-    confirmation_number = f"BELLA-{random.randint(100000, 999999)}"
-
     # Format date and time for display
     booking_date = datetime.strptime(date, "%Y-%m-%d")
     booking_time = datetime.strptime(time, "%H:%M")
     formatted_date = booking_date.strftime("%A, %B %d, %Y")
     formatted_time = booking_time.strftime("%I:%M %p")
 
-    # Mock: Save to database (in production)
-    print(f"[RESERVATION CREATED] {confirmation_number} - {name}, {formatted_phone}, {formatted_date} {formatted_time}, Party of {party_size}")
+    # Save if a table is still free (checked and written in one transaction;
+    # a repeated call returns the first booking)
+    try:
+        reservation, created = await availability.reserve(name, phone, date, time, party_size, special_requests)
+    except SlotUnavailable as e:
+        return {"success": False, **e.args[0]}
+    confirmation_number = reservation.code
+
+    status = "CREATED" if created else "ALREADY EXISTS"
+    print(f"[RESERVATION {status}] {confirmation_number} - {name}, {formatted_phone}, {formatted_date} {formatted_time}, Party of {party_size}")
 
     return {
         "success": True,
@@ -192,13 +123,15 @@ async def create_reservation(
     }
 
 
-def validate_input(message: str) -> Tuple[bool, str]:
-    """Validate user input"""
-    if len(message.strip()) == 0:
-        return False, "Please send a message."
-    if len(message) > 500:
-        return False, "Please keep messages under 500 characters."
-    return True, ""
+# OpenAI tool schemas and dispatch, built once from the registered functions
+TOOLS = registry.schemas()
+TOOL_HANDLERS = registry.handlers
+
+
+# Only the empty / too-long checks this script has always had; topic filters
+# and escalation are for 03a, 03b and 06 (data/guardrails.json)
+GUARDRAIL_PIPELINE = load_pipeline(without=("repeat", "spam", "off_topic", "inappropriate", "escalation",
+                                            "llm_classifier"))
 
 
 @cl.on_chat_start
@@ -213,20 +146,23 @@ async def start():
 @cl.on_message
 async def main(message: cl.Message):
     """Handle messages with multi-tool support"""
-    # Validate input
-    is_valid, error_message = validate_input(message.content)
-    if not is_valid:
-        await cl.Message(content=error_message).send()
+    # Guardrails: cheapest checks first, stopping at the first hit (data/guardrails.json)
+    guardrail, _ = await GUARDRAIL_PIPELINE.run(message.content, cl.user_session.get("last_user_message", ""))
+    if not guardrail.allowed:
+        print(f"[GUARDRAIL] {json.dumps(guardrail.log_data())} {message.content[:100]}")
+        await cl.Message(content=guardrail.verdict.reply).send()
         return
+    cl.user_session.set("last_user_message", message.content)
 
     # Get message history
     message_history = cl.user_session.get("message_history", [])
     message_history.append({"role": "user", "content": message.content})
+    message_history = compact_history(message_history)  # token budget, older turns summarized
 
     messages = [{"role": "system", "content": SYSTEM_PROMPT}] + message_history
 
     # Call OpenAI with tools
-    response = client.chat.completions.create(
+    response = await client.chat.completions.create(
         model=MODEL,
         messages=messages,
         tools=TOOLS,
@@ -253,38 +189,11 @@ async def main(message: cl.Message):
             ]
         })
 
-        # Execute tool calls
-        for tool_call in assistant_message.tool_calls:
-            function_name = tool_call.function.name
-            args = json.loads(tool_call.function.arguments)
-
-            if function_name == "check_availability":
-                result = await check_availability(
-                    date=args["date"],
-                    time=args["time"],
-                    party_size=args["party_size"]
-                )
-            elif function_name == "create_reservation":
-                result = await create_reservation(
-                    name=args["name"],
-                    phone=args["phone"],
-                    date=args["date"],
-                    time=args["time"],
-                    party_size=args["party_size"],
-                    special_requests=args.get("special_requests", "")
-                )
-            else:
-                result = {"error": "Unknown function"}
-
-            # Add tool result to history
-            message_history.append({
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "content": json.dumps(result)
-            })
+        # Execute tool calls concurrently (results stay in call order)
+        message_history.extend(await run_tool_calls(assistant_message.tool_calls, TOOL_HANDLERS))
 
         # Get final response with tool results
-        final_response = client.chat.completions.create(
+        final_response = await client.chat.completions.create(
             model=MODEL,
             messages=[{"role": "system", "content": SYSTEM_PROMPT}] + message_history
         )
@@ -13,18 +13,23 @@ New Features:
 To run: uv run chainlit run scripts/04c_tools_menu_business.py
 """
 
-import os
 import json
 import re
-import random
 from datetime import datetime
 from pathlib import Path
-from openai import OpenAI
 import chainlit as cl
+from utils.availability import load_availability
+from utils.history import compact_history
+from utils.llm import client, MODEL
+from utils.menu_catalog import MenuCatalog
+from utils.reservations import SlotUnavailable, load_reservation_store
+from utils.tool_calls import run_tool_calls
+from utils.tool_registry import (
+    BusinessInfoType, Date, DietaryFilter, GuestName, MaxPrice, MenuCategory, MenuSearch, Page, PartySize, Phone,
+    PopularOnly, SpecialRequests, Time, ToolRegistry
+)
 from typing import Tuple, Optional
 
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
 
 # Load business data at startup
 BASE_DIR = Path(__file__).parent.parent
@@ -33,12 +38,13 @@ BUSINESS_INFO_PATH = BASE_DIR / "data" / "restaurant" / "business_info.json"
 
 # Global variables to store loaded data
 MENU_DATA = {}
+MENU_CATALOG = MenuCatalog([])   # indexed items, built from MENU_DATA in load_data()
 BUSINESS_INFO = {}
 
 
 def load_data():
     """Load menu and business information from JSON files"""
-    global MENU_DATA, BUSINESS_INFO
+    global MENU_DATA, MENU_CATALOG, BUSINESS_INFO
 
     try:
         with open(MENU_PATH, 'r') as f:
@@ -47,6 +53,7 @@ def load_data():
     except Exception as e:
         print(f"[ERROR] Failed to load menu: {e}")
         MENU_DATA = {}
+    MENU_CATALOG = MenuCatalog.from_menu(MENU_DATA)
 
     try:
         with open(BUSINESS_INFO_PATH, 'r') as f:
@@ -80,115 +87,34 @@ WORKFLOW:
 TONE: Warm, friendly, professional Italian restaurant host
 """
 
-# Tool definitions
-TOOLS = [
-    {
-        "type": "function",
-        "function": {
-            "name": "check_availability",
-            "description": "Check table availability",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "date": {"type": "string", "description": "YYYY-MM-DD"},
-                    "time": {"type": "string", "description": "HH:MM"},
-                    "party_size": {"type": "integer"}
-                },
-                "required": ["date", "time", "party_size"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "create_reservation",
-            "description": "Create a reservation",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string"},
-                    "phone": {"type": "string"},
-                    "date": {"type": "string"},
-                    "time": {"type": "string"},
-                    "party_size": {"type": "integer"},
-                    "special_requests": {"type": "string"}
-                },
-                "required": ["name", "phone", "date", "time", "party_size"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "get_menu_info",
-            "description": "Get information about menu items. Can filter by category or search all items.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "category": {
-                        "type": "string",
-                        "description": "Menu category: appetizers, pasta, pizza, entrees, desserts, or drinks. Leave empty for all categories.",
-                        "enum": ["appetizers", "pasta", "pizza", "entrees", "desserts", "drinks", ""]
-                    },
-                    "dietary_filter": {
-                        "type": "string",
-                        "description": "Filter by dietary preference: vegetarian, vegan, or gluten_free",
-                        "enum": ["vegetarian", "vegan", "gluten_free", ""]
-                    }
-                },
-                "required": []
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "get_business_info",
-            "description": "Get business information like hours, location, parking, policies, etc.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "info_type": {
-                        "type": "string",
-                        "description": "Type of information requested",
-                        "enum": ["hours", "location", "parking", "dress_code", "accessibility", "services", "payment_methods", "private_dining", "gift_cards", "contact"]
-                    }
-                },
-                "required": ["info_type"]
-            }
-        }
-    }
-]
-
+# Bookings persist in data/reservations.db and are only made while a table
+# is free (tables and hours from business_info.json)
+availability = load_availability(load_reservation_store(), BUSINESS_INFO_PATH)
+schedule = availability.schedule   # hours + holiday exceptions (utils/schedule.py)
 
-@cl.step(name="Check Availability", type="tool")
-async def check_availability(date: str, time: str, party_size: int) -> dict:
-    """Check table availability"""
-    try:
-        booking_date = datetime.strptime(date, "%Y-%m-%d")
-        booking_time = datetime.strptime(time, "%H:%M")
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+# Tool definitions: declared on the functions below, schemas generated from type hints
+registry = ToolRegistry()
 
-        if booking_date < today:
-            return {"available": False, "message": "Cannot book past dates."}
-        if booking_date.weekday() == 0:
-            return {"available": False, "message": "Closed Mondays."}
-        if party_size >= 8:
-            return {"available": False, "message": f"For {party_size} guests, call (555) 123-4567 for private dining."}
 
-        formatted_date = booking_date.strftime("%A, %B %d, %Y")
-        formatted_time = booking_time.strftime("%I:%M %p")
-        return {"available": True, "message": f"Available: {formatted_date} at {formatted_time} for {party_size}"}
-    except:
-        return {"available": False, "message": "Invalid date/time."}
+@registry.tool("Check if a table is available for the requested date, time, and party size")
+@cl.step(name="Check Availability", type="tool")
+async def check_availability(date: Date, time: Time, party_size: PartySize) -> dict:
+    """Check table availability (see utils/availability.py)"""
+    return await availability.check(date, time, party_size)
 
 
+@registry.tool("Create a restaurant reservation after availability has been confirmed")
 @cl.step(name="Create Reservation", type="tool")
-async def create_reservation(name: str, phone: str, date: str, time: str, party_size: int, special_requests: str = "") -> dict:
-    """Create reservation"""
-    confirmation = f"BELLA-{random.randint(100000, 999999)}"
+async def create_reservation(name: GuestName, phone: Phone, date: Date, time: Time, party_size: PartySize,
+                             special_requests: SpecialRequests = "") -> dict:
+    """Create reservation (saved; repeating the call returns the same booking)"""
     booking_date = datetime.strptime(date, "%Y-%m-%d").strftime("%A, %B %d, %Y")
     booking_time = datetime.strptime(time, "%H:%M").strftime("%I:%M %p")
+    try:
+        reservation, _ = await availability.reserve(name, phone, date, time, party_size, special_requests)
+    except SlotUnavailable as e:
+        return {"success": False, **e.args[0]}
+    confirmation = reservation.code
 
     return {
         "success": True,
@@ -201,86 +127,31 @@ async def create_reservation(name: str, phone: str, date: str, time: str, party_
     }
 
 
+@registry.tool("Get menu items (dishes and drinks). Filters combine: category, dietary preference, "
+               "words in the name, popular items, maximum price. Results come in pages.")
 @cl.step(name="Get Menu Info", type="tool")
-async def get_menu_info(category: str = "", dietary_filter: str = "") -> dict:
+async def get_menu_info(category: MenuCategory = "", dietary_filter: DietaryFilter = "", search: MenuSearch = "",
+                        popular_only: PopularOnly = False, max_price: MaxPrice = 0, page: Page = 1) -> dict:
     """
-    Get menu information, optionally filtered by category and dietary preferences.
+    Get menu items matching every given filter, one page at a time (see utils/menu_catalog.py).
     """
-    if not MENU_DATA:
+    if not MENU_CATALOG:
         return {"error": "Menu data not available. Please contact staff at (555) 123-4567"}
 
-    results = []
-
-    # Determine which categories to search
-    if category and category in MENU_DATA:
-        categories_to_search = {category: MENU_DATA[category]}
-    elif category == "drinks" and "drinks" in MENU_DATA:
-        categories_to_search = {"drinks": MENU_DATA["drinks"]}
-    else:
-        # Search all non-drink categories
-        categories_to_search = {k: v for k, v in MENU_DATA.items() if k != "drinks"}
-
-    # Collect items
-    for cat_name, items in categories_to_search.items():
-        if cat_name == "drinks":
-            # Handle drinks structure differently
-            for drink_type, drink_items in items.items():
-                for item in drink_items:
-                    results.append({
-                        "category": f"drinks/{drink_type}",
-                        "name": item.get("name"),
-                        "description": item.get("description", ""),
-                        "price": item.get("price") or item.get("glass_price", "")
-                    })
-        else:
-            for item in items:
-                # Apply dietary filter if specified
-                if dietary_filter:
-                    if not item.get(dietary_filter, False):
-                        continue
-
-                results.append({
-                    "category": cat_name,
-                    "name": item.get("name"),
-                    "description": item.get("description"),
-                    "price": item.get("price"),
-                    "vegetarian": item.get("vegetarian", False),
-                    "vegan": item.get("vegan", False),
-                    "gluten_free": item.get("gluten_free", False),
-                    "popular": item.get("popular", False)
-                })
-
-    if not results:
-        return {
-            "found": False,
-            "message": f"No items found for category='{category}' with dietary filter='{dietary_filter}'"
-        }
-
-    # Limit results to avoid overwhelming the context
-    max_items = 10
-    if len(results) > max_items:
-        results = results[:max_items]
-        truncated = True
-    else:
-        truncated = False
-
-    return {
-        "found": True,
-        "count": len(results),
-        "items": results,
-        "truncated": truncated,
-        "message": f"Found {len(results)} items" + (" (showing first 10)" if truncated else "")
-    }
+    return MENU_CATALOG.query(category=category, dietary=dietary_filter, text=search, popular=popular_only,
+                              max_price=max_price or None, page=page)
 
 
+@registry.tool("Get business information like hours, location, parking, policies, etc.")
 @cl.step(name="Get Business Info", type="tool")
-async def get_business_info(info_type: str) -> dict:
+async def get_business_info(info_type: BusinessInfoType) -> dict:
     """Get specific business information"""
     if not BUSINESS_INFO:
         return {"error": "Business information not available."}
 
     info_map = {
-        "hours": BUSINESS_INFO.get("hours"),
+        "hours": {**BUSINESS_INFO.get("hours", {}), "now": schedule.status_line(),
+                  "special_hours": schedule.exception_lines(days=366)},
         "location": BUSINESS_INFO.get("basic", {}).get("address"),
         "parking": BUSINESS_INFO.get("parking"),
         "dress_code": {"dress_code": BUSINESS_INFO.get("dress_code")},
@@ -299,6 +170,11 @@ async def get_business_info(info_type: str) -> dict:
         return {"found": False, "message": f"Information type '{info_type}' not found."}
 
 
+# OpenAI tool schemas and dispatch, built once from the registered functions
+TOOLS = registry.schemas()
+TOOL_HANDLERS = registry.handlers
+
+
 @cl.on_chat_start
 async def start():
     """Initialize conversation"""
@@ -317,9 +193,10 @@ async def main(message: cl.Message):
 
     message_history = cl.user_session.get("message_history", [])
     message_history.append({"role": "user", "content": message.content})
+    message_history = compact_history(message_history)  # token budget, older turns summarized
     messages = [{"role": "system", "content": SYSTEM_PROMPT}] + message_history
 
-    response = client.chat.completions.create(
+    response = await client.chat.completions.create(
         model=MODEL,
         messages=messages,
         tools=TOOLS,
@@ -339,28 +216,10 @@ async def main(message: cl.Message):
             } for tc in assistant_message.tool_calls]
         })
 
-        for tool_call in assistant_message.tool_calls:
-            func_name = tool_call.function.name
-            args = json.loads(tool_call.function.arguments)
-
-            if func_name == "check_availability":
-                result = await check_availability(**args)
-            elif func_name == "create_reservation":
-                result = await create_reservation(**args)
-            elif func_name == "get_menu_info":
-                result = await get_menu_info(**args)
-            elif func_name == "get_business_info":
-                result = await get_business_info(**args)
-            else:
-                result = {"error": "Unknown function"}
-
-            message_history.append({
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "content": json.dumps(result)
-            })
-
-        final_response = client.chat.completions.create(
+        # Run all requested tools concurrently (results stay in call order)
+        message_history.extend(await run_tool_calls(assistant_message.tool_calls, TOOL_HANDLERS))
+
+        final_response = await client.chat.completions.create(
             model=MODEL,
             messages=[{"role": "system", "content": SYSTEM_PROMPT}] + message_history
         )
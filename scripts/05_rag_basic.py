@@ -16,52 +16,69 @@ Prerequisites:
 To run: uv run chainlit run scripts/05_rag_basic.py
 """
 
-import os
+import importlib.util
 import json
 import re
-import random
-from datetime import datetime
 from pathlib import Path
-from openai import OpenAI
 import chainlit as cl
+from utils.answer_cache import has_personal_context, load_answer_cache
+from utils.availability import load_availability
+from utils.embeddings import cache_from_env, service_from_env
+from utils.history import compact_history
+from utils.lexical import BM25Index
+from utils.llm import client, MODEL
+from utils.menu_catalog import MenuCatalog
+from utils.reservations import SlotUnavailable, load_reservation_store
+from utils.retrieval import RetrievalContext, hybrid_retrieve
+from utils.retrievers import load_retriever
+from utils.tool_calls import run_tool_calls
+from utils.tool_registry import (
+    BusinessInfoType, Date, DietaryFilter, GuestName, MaxPrice, MenuCategory, MenuSearch, Page, PartySize, Phone,
+    PopularOnly, SpecialRequests, Time, ToolRegistry
+)
+from utils.warmup import BackgroundInit, register_readiness_route
 from typing import List, Dict
 
-# ChromaDB and embeddings
-try:
-    import chromadb
-    from chromadb.config import Settings
-    from sentence_transformers import SentenceTransformer
-    CHROMA_AVAILABLE = True
-except ImportError:
-    CHROMA_AVAILABLE = False
-    print("[WARNING] ChromaDB or sentence-transformers not installed. RAG features will be limited.")
+# Embeddings (the vector store backend is chosen with RAG_BACKEND, see utils/retrievers.py).
+# The model is imported and loaded in the background after startup (see utils/warmup.py).
+EMBEDDINGS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+if not EMBEDDINGS_AVAILABLE:
+    print("[WARNING] sentence-transformers not installed. RAG features will be limited.")
 
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
 
 # Paths
 BASE_DIR = Path(__file__).parent.parent
 MENU_PATH = BASE_DIR / "data" / "restaurant" / "menu.json"
 BUSINESS_INFO_PATH = BASE_DIR / "data" / "restaurant" / "business_info.json"
 CHROMA_PATH = BASE_DIR / "data" / "embeddings"
+BM25_PATH = CHROMA_PATH / "restaurant_docs.bm25.json"
 
 # Global variables
 MENU_DATA = {}
+MENU_CATALOG = MenuCatalog([])   # indexed items, built from MENU_DATA in load_data()
 BUSINESS_INFO = {}
-chroma_client = None
-collection = None
+retriever = None
+lexical_index = None
 embedding_model = None
 
+# Repeat questions skip the MiniLM forward pass (see utils/embeddings.py)
+embedding_cache = cache_from_env()
+embedding_service = None
+
+# Repeat informational questions skip the LLM until the data changes (see utils/answer_cache.py)
+answer_cache = load_answer_cache([MENU_PATH, BUSINESS_INFO_PATH, CHROMA_PATH])
+
 
 def load_data():
     """Load menu and business info"""
-    global MENU_DATA, BUSINESS_INFO
+    global MENU_DATA, MENU_CATALOG, BUSINESS_INFO
 
     try:
         with open(MENU_PATH, 'r') as f:
             MENU_DATA = json.load(f)
     except Exception as e:
         print(f"[ERROR] Failed to load menu: {e}")
+    MENU_CATALOG = MenuCatalog.from_menu(MENU_DATA)
 
     try:
         with open(BUSINESS_INFO_PATH, 'r') as f:
@@ -71,80 +88,77 @@ def load_data():
 
 
 def initialize_vector_db():
-    """Initialize ChromaDB client and load collection"""
-    global chroma_client, collection, embedding_model
+    """Load the embedding model and open the knowledge base"""
+    global retriever, lexical_index, embedding_model, embedding_service
 
-    if not CHROMA_AVAILABLE:
-        print("[WARNING] ChromaDB not available. Install with: pip install chromadb sentence-transformers")
+    if not EMBEDDINGS_AVAILABLE:
+        print("[WARNING] Embeddings not available. Install with: pip install chromadb sentence-transformers")
         return False
 
     try:
-        # Initialize embedding model
+        # Initialize embedding model (deferred import: torch is slow to load)
+        from sentence_transformers import SentenceTransformer
         embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # Encodes off the event loop, batching concurrent queries
+        embedding_service = service_from_env(lambda texts: embedding_model.encode(texts).tolist(), embedding_cache)
 
-        # Initialize ChromaDB
-        chroma_client = chromadb.PersistentClient(path=str(CHROMA_PATH))
-
-        # Try to get existing collection
+        # Open the knowledge base (ChromaDB by default, RAG_BACKEND=numpy for the in-process index)
         try:
-            collection = chroma_client.get_collection(name="restaurant_docs")
-            print(f"[STARTUP] Loaded existing vector database with {collection.count()} documents")
-            return True
+            retriever = load_retriever(CHROMA_PATH)
+            print(f"[STARTUP] Loaded existing {retriever.name} knowledge base with {retriever.count()} documents")
         except:
             print("[WARNING] Vector database not found. Run 'python scripts/utils/setup_vectordb.py' first.")
             print("[INFO] RAG features will be disabled, but other features will work.")
             return False
 
+        # Keyword index for exact terms (dense-only search if it is missing)
+        if BM25_PATH.exists():
+            lexical_index = BM25Index.load(BM25_PATH)
+            print(f"[STARTUP] Loaded BM25 index with {lexical_index.count()} documents")
+        else:
+            print("[INFO] BM25 index not found, using dense retrieval only. Re-run setup_vectordb.py to build it.")
+        return True
+
     except Exception as e:
         print(f"[ERROR] Failed to initialize vector database: {e}")
         return False
 
 
-# Initialize data
+# Initialize data; the knowledge base warms up in the background
 load_data()
-rag_enabled = initialize_vector_db()
+rag_warmup = BackgroundInit("rag", initialize_vector_db)
 
 
-def retrieve_context(query: str, n_results: int = 3) -> List[Dict]:
+@cl.on_app_startup
+async def on_app_startup():
+    """Start the RAG warm-up as soon as the server is up and expose /ready"""
+    rag_warmup.start()
+    register_readiness_route(rag_warmup)
+
+
+async def retrieve_context(query: str, n_results: int = 3) -> RetrievalContext:
     """
-    Retrieve relevant context from vector database.
+    Retrieve relevant context once per turn.
+
+    Dense (embedding) and BM25 keyword results are fused with reciprocal rank
+    fusion; the result is shared by the UI step, prompt and logs.
 
     Args:
         query: User's question
         n_results: Number of chunks to retrieve
 
     Returns:
-        List of relevant document chunks with metadata
+        RetrievalContext with the chunks and per-retriever timings
     """
-    if not rag_enabled or not collection:
-        return []
+    if not rag_warmup.ready or not retriever:
+        return RetrievalContext(query=query)
 
     try:
-        # Generate query embedding
-        query_embedding = embedding_model.encode(query).tolist()
-
-        # Query the collection
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results
-        )
-
-        # Format results
-        contexts = []
-        if results and results['documents'] and len(results['documents']) > 0:
-            for i, doc in enumerate(results['documents'][0]):
-                metadata = results['metadatas'][0][i] if results['metadatas'] else {}
-                contexts.append({
-                    "content": doc,
-                    "source": metadata.get("source", "unknown"),
-                    "section": metadata.get("section", "")
-                })
-
-        return contexts
+        return await hybrid_retrieve(query, embedding_service.embed, retriever, lexical_index, n_results=n_results)
 
     except Exception as e:
         print(f"[ERROR] Retrieval failed: {e}")
-        return []
+        return RetrievalContext(query=query)
 
 
 # Enhanced system prompt with RAG instructions
@@ -169,141 +183,94 @@ TONE: Warm, friendly, professional Italian restaurant host
 """
 
 
-# All tools from previous scripts
-TOOLS = [
-    {
-        "type": "function",
-        "function": {
-            "name": "check_availability",
-            "description": "Check table availability",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "date": {"type": "string"},
-                    "time": {"type": "string"},
-                    "party_size": {"type": "integer"}
-                },
-                "required": ["date", "time", "party_size"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "create_reservation",
-            "description": "Create a reservation",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string"},
-                    "phone": {"type": "string"},
-                    "date": {"type": "string"},
-                    "time": {"type": "string"},
-                    "party_size": {"type": "integer"},
-                    "special_requests": {"type": "string"}
-                },
-                "required": ["name", "phone", "date", "time", "party_size"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "get_menu_info",
-            "description": "Get menu items",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "category": {"type": "string", "enum": ["appetizers", "pasta", "pizza", "entrees", "desserts", "drinks", ""]},
-                    "dietary_filter": {"type": "string", "enum": ["vegetarian", "vegan", "gluten_free", ""]}
-                }
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "get_business_info",
-            "description": "Get business information",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "info_type": {"type": "string", "enum": ["hours", "location", "parking", "dress_code", "accessibility", "services"]}
-                },
-                "required": ["info_type"]
-            }
-        }
-    }
-]
-
-
-@cl.step(name="Retrieve Context", type="retrieval")
-async def retrieve_step(query: str) -> str:
-    """Retrieve relevant context and format for display"""
-    contexts = retrieve_context(query, n_results=3)
+# Bookings persist in data/reservations.db and are only made while a table
+# is free (see utils/reservations.py, utils/availability.py)
+availability = load_availability(load_reservation_store(), BUSINESS_INFO_PATH)
+schedule = availability.schedule   # hours + holiday exceptions (utils/schedule.py)
 
-    if not contexts:
-        return "No relevant context found in knowledge base."
+# All tools from previous scripts, declared on the functions below (see utils/tool_registry.py)
+registry = ToolRegistry()
 
-    formatted = "**Retrieved Context:**\n\n"
-    for i, ctx in enumerate(contexts, 1):
-        formatted += f"{i}. **{ctx['source']}** - {ctx['section']}\n"
-        formatted += f"   {ctx['content'][:200]}...\n\n"
 
-    return formatted
+@cl.step(name="Retrieve Context", type="retrieval")
+async def retrieve_step(retrieval: RetrievalContext) -> str:
+    """Show already-retrieved context in the UI (no second search)"""
+    return retrieval.display()
 
 
 # Simplified tool implementations (same as 04c)
+@registry.tool("Check if a table is available for the requested date, time, and party size")
 @cl.step(name="Check Availability", type="tool")
-async def check_availability(date: str, time: str, party_size: int) -> dict:
-    """Check availability"""
-    try:
-        booking_date = datetime.strptime(date, "%Y-%m-%d")
-        if booking_date.weekday() == 0:
-            return {"available": False, "message": "Closed Mondays."}
-        if party_size >= 8:
-            return {"available": False, "message": "Call (555) 123-4567 for large parties."}
-        formatted = booking_date.strftime("%A, %B %d")
-        return {"available": True, "message": f"Available: {formatted} at {time} for {party_size}"}
-    except:
-        return {"available": False, "message": "Invalid date/time."}
+async def check_availability(date: Date, time: Time, party_size: PartySize) -> dict:
+    """Check availability (see utils/availability.py)"""
+    return await availability.check(date, time, party_size)
 
 
+@registry.tool("Create a restaurant reservation after availability has been confirmed")
 @cl.step(name="Create Reservation", type="tool")
-async def create_reservation(name: str, phone: str, date: str, time: str, party_size: int, special_requests: str = "") -> dict:
-    """Create reservation"""
-    confirmation = f"BELLA-{random.randint(100000, 999999)}"
+async def create_reservation(name: GuestName, phone: Phone, date: Date, time: Time, party_size: PartySize,
+                             special_requests: SpecialRequests = "") -> dict:
+    """Create reservation if a table is free (saved; repeating the call returns the same booking)"""
+    try:
+        reservation, _ = await availability.reserve(name, phone, date, time, party_size, special_requests)
+    except SlotUnavailable as e:
+        return {"success": False, **e.args[0]}
+    confirmation = reservation.code
     return {"success": True, "confirmation_number": confirmation, "message": f"Confirmed! #{confirmation}"}
 
 
+@registry.tool("Get menu items (dishes and drinks). Filters combine: category, dietary preference, "
+               "words in the name, popular items, maximum price. Results come in pages.")
 @cl.step(name="Get Menu", type="tool")
-async def get_menu_info(category: str = "", dietary_filter: str = "") -> dict:
-    """Get menu info"""
-    if not MENU_DATA:
+async def get_menu_info(category: MenuCategory = "", dietary_filter: DietaryFilter = "", search: MenuSearch = "",
+                        popular_only: PopularOnly = False, max_price: MaxPrice = 0, page: Page = 1) -> dict:
+    """Get menu items, one page at a time (see utils/menu_catalog.py)"""
+    if not MENU_CATALOG:
         return {"error": "Menu not available"}
-    # Simplified - return category name or count
-    if category and category in MENU_DATA:
-        items = MENU_DATA[category]
-        if isinstance(items, list):
-            return {"found": True, "count": len(items), "items": items[:5]}
-    return {"found": True, "message": "Menu data available"}
+    return MENU_CATALOG.query(category=category, dietary=dietary_filter, text=search, popular=popular_only,
+                              max_price=max_price or None, page=page)
 
 
+@registry.tool("Get business information like hours, location, parking, policies, etc.")
 @cl.step(name="Get Business Info", type="tool")
-async def get_business_info(info_type: str) -> dict:
+async def get_business_info(info_type: BusinessInfoType) -> dict:
     """Get business info"""
     if not BUSINESS_INFO:
         return {"error": "Info not available"}
-    data = BUSINESS_INFO.get(info_type, {})
-    return {"found": True, "data": data}
+    # Same topics in every script (see BusinessInfoType in utils/tool_registry.py)
+    info_map = {
+        "hours": {**BUSINESS_INFO.get("hours", {}), "now": schedule.status_line(),
+                  "special_hours": schedule.exception_lines(days=366)},
+        "location": BUSINESS_INFO.get("basic", {}).get("address"),
+        "parking": BUSINESS_INFO.get("parking"),
+        "dress_code": BUSINESS_INFO.get("dress_code"),
+        "accessibility": BUSINESS_INFO.get("accessibility"),
+        "services": BUSINESS_INFO.get("services"),
+        "payment_methods": BUSINESS_INFO.get("payment_methods"),
+        "private_dining": BUSINESS_INFO.get("private_dining"),
+        "gift_cards": BUSINESS_INFO.get("gift_cards"),
+        "contact": BUSINESS_INFO.get("basic")
+    }
+    return {"found": True, "data": info_map.get(info_type, {})}
+
+
+# OpenAI tool schemas and dispatch, built once from the registered functions
+TOOLS = registry.schemas()
+TOOL_HANDLERS = registry.handlers
 
 
 @cl.on_chat_start
 async def start():
     """Initialize conversation"""
     cl.user_session.set("message_history", [])
+    rag_warmup.start()
 
-    rag_status = "with RAG-powered knowledge base" if rag_enabled else "(RAG disabled - run setup_vectordb.py)"
+    if rag_warmup.ready:
+        rag_status = "with RAG-powered knowledge base"
+    elif not rag_warmup.done:
+        rag_status = "(knowledge base still loading)"
+    else:
+        rag_status = "(RAG disabled - run setup_vectordb.py)"
     welcome = f"Buongiorno! Welcome to Bella's Italian Restaurant {rag_status}. I can help with menu questions, reservations, catering, wine pairings, and more. What would you like to know?"
     await cl.Message(content=welcome).send()
 
@@ -316,30 +283,49 @@ async def main(message: cl.Message):
 
     message_history = cl.user_session.get("message_history", [])
 
-    # Step 1: Retrieve relevant context if RAG is enabled
-    context_str = ""
-    if rag_enabled:
-        contexts = retrieve_context(message.content, n_results=3)
-        if contexts:
+    # Step 1: Retrieve relevant context once if RAG is enabled
+    retrieval = RetrievalContext(query=message.content)
+    if rag_warmup.ready:
+        retrieval = await retrieve_context(message.content, n_results=3)
+        log_data = {
+            **retrieval.log_data(),
+            "embedding_cache": embedding_cache.stats(),
+            "embedding_batches": embedding_service.stats()
+        }
+        print(f"[RETRIEVAL] {json.dumps(log_data)}")
+        if retrieval:
             # Show retrieval step in UI
-            await retrieve_step(message.content)
-
-            # Format context for LLM
-            context_str = "\n\nRETRIEVED CONTEXT:\n"
-            for ctx in contexts:
-                context_str += f"\nSource: {ctx['source']} - {ctx['section']}\n{ctx['content']}\n"
-
-    # Step 2: Build system prompt with context
-    system_prompt = SYSTEM_PROMPT_BASE
-    if context_str:
-        system_prompt += context_str
-
-    # Step 3: Add user message
+            await retrieve_step(retrieval)
+    elif not rag_warmup.done:
+        # Tools-only answer until the warm-up finishes
+        print("[RETRIEVAL] Skipped - knowledge base still loading")
+
+    # Step 2: Reuse the answer to an equivalent question with the same context
+    cache_vector = None
+    personal = has_personal_context(message_history)   # earlier turns shaped the answer
+    if answer_cache and retrieval:
+        if answer_cache.eligible(message.content) and not personal:
+            cache_vector = await embedding_service.embed(message.content)   # already cached by retrieval
+            cached = answer_cache.lookup(cache_vector, retrieval.chunks)
+            print(f"[ANSWER_CACHE] {json.dumps({'hit': cached is not None, **answer_cache.stats()})}")
+            if cached:
+                await cl.Message(content=cached).send()
+                message_history += [{"role": "user", "content": message.content}, {"role": "assistant", "content": cached}]
+                cl.user_session.set("message_history", message_history)
+                return
+        else:
+            answer_cache.skip()
+
+    # Step 3: Build system prompt with context
+    system_prompt = SYSTEM_PROMPT_BASE + retrieval.prompt_section()
+
+    # Step 4: Add user message
     message_history.append({"role": "user", "content": message.content})
+    message_history = compact_history(message_history)  # token budget, older turns summarized
     messages = [{"role": "system", "content": system_prompt}] + message_history
 
-    # Step 4: Call OpenAI with tools
-    response = client.chat.completions.create(
+    # Step 5: Call OpenAI with tools
+    response = await client.chat.completions.create(
         model=MODEL,
         messages=messages,
         tools=TOOLS,
@@ -348,7 +334,7 @@ async def main(message: cl.Message):
 
     assistant_message = response.choices[0].message
 
-    # Step 5: Handle tool calls
+    # Step 6: Handle tool calls
     if assistant_message.tool_calls:
         message_history.append({
             "role": "assistant",
@@ -360,29 +346,11 @@ async def main(message: cl.Message):
             } for tc in assistant_message.tool_calls]
         })
 
-        for tool_call in assistant_message.tool_calls:
-            func_name = tool_call.function.name
-            args = json.loads(tool_call.function.arguments)
-
-            if func_name == "check_availability":
-                result = await check_availability(**args)
-            elif func_name == "create_reservation":
-                result = await create_reservation(**args)
-            elif func_name == "get_menu_info":
-                result = await get_menu_info(**args)
-            elif func_name == "get_business_info":
-                result = await get_business_info(**args)
-            else:
-                result = {"error": "Unknown function"}
-
-            message_history.append({
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "content": json.dumps(result)
-            })
+        # Run all requested tools concurrently (results stay in call order)
+        message_history.extend(await run_tool_calls(assistant_message.tool_calls, TOOL_HANDLERS))
 
         # Get final response
-        final_response = client.chat.completions.create(
+        final_response = await client.chat.completions.create(
             model=MODEL,
             messages=[{"role": "system", "content": system_prompt}] + message_history
         )
@@ -391,8 +359,10 @@ async def main(message: cl.Message):
         await cl.Message(content=final_message).send()
         message_history.append({"role": "assistant", "content": final_message})
     else:
-        # No tool call
+        # No tool call: an informational answer other guests can reuse
         await cl.Message(content=assistant_message.content).send()
         message_history.append({"role": "assistant", "content": assistant_message.content})
+        if cache_vector is not None and not personal:
+            answer_cache.store(cache_vector, retrieval.chunks, message.content, assistant_message.content)
 
     cl.user_session.set("message_history", message_history)
@@ -17,26 +17,43 @@ Features:
 To run: uv run chainlit run scripts/06_final_polished.py
 """
 
-import os
+import importlib.util
 import json
 import re
-import random
+import time
 from datetime import datetime
 from pathlib import Path
-from openai import OpenAI
 import chainlit as cl
+from utils.agent import run_agent
+from utils.answer_cache import has_personal_context, load_answer_cache
+from utils.availability import load_availability
+from utils.embeddings import cache_from_env, service_from_env
+from utils.guardrail_pipeline import load_pipeline
+from utils.history import compact_history, history_stats
+from utils.intents import (
+    ENABLED as INTENT_ROUTING, ENCODER as INTENT_ENCODER, EmbeddingEncoder, IntentMatch, IntentRouter, NgramEncoder,
+    load_intents, render_answer
+)
+from utils.lead_store import LeadWriter, load_lead_store
+from utils.lexical import BM25Index
+from utils.menu_catalog import MenuCatalog
+from utils.reservations import ReservationRepository, SlotUnavailable, load_reservation_store
+from utils.retrieval import RetrievalContext, hybrid_retrieve
+from utils.retrievers import load_retriever
+from utils.session_store import Session, load_session_store
+from utils.streaming import TokenCoalescer
+from utils.tool_registry import (
+    BusinessInfoType, ConfirmationNumber, Date, DietaryFilter, GuestName, MaxPrice, MenuCategory, MenuSearch, Page,
+    PartySize, Phone, PopularOnly, ResultRef, SpecialRequests, Time, ToolRegistry
+)
+from utils.tool_results import ToolResultStore, compact_tool_messages, expand_result
+from utils.warmup import BackgroundInit, register_readiness_route
 from typing import List, Dict, Optional
 
-# ChromaDB (optional)
-try:
-    import chromadb
-    from sentence_transformers import SentenceTransformer
-    CHROMA_AVAILABLE = True
-except:
-    CHROMA_AVAILABLE = False
+# Embeddings (optional) - the vector store backend is chosen with RAG_BACKEND.
+# Imported and loaded in the background after startup (see utils/warmup.py).
+EMBEDDINGS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
 
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
 
 # =============================================================================
 # CONFIGURATION - Easy to customize for different businesses
@@ -48,14 +65,8 @@ BUSINESS_CONFIG = {
     "phone": "(555) 123-4567",
     "email": "info@bellasitalian.com",
     "website": "www.bellasitalian.com",
-    "address": "123 Main Street, Downtown, CA 90210",
-    "hours": {
-        "monday": "Closed",
-        "tuesday-thursday": "11am-10pm",
-        "friday": "11am-11pm",
-        "saturday": "10am-11pm (Brunch 10am-2pm)",
-        "sunday": "10am-9pm (Brunch 10am-2pm)"
-    }
+    "address": "123 Main Street, Downtown, CA 90210"
+    # Opening hours: data/restaurant/business_info.json (``schedule`` below)
 }
 
 # Paths
@@ -63,16 +74,51 @@ BASE_DIR = Path(__file__).parent.parent
 MENU_PATH = BASE_DIR / "data" / "restaurant" / "menu.json"
 BUSINESS_INFO_PATH = BASE_DIR / "data" / "restaurant" / "business_info.json"
 CHROMA_PATH = BASE_DIR / "data" / "embeddings"
-LEADS_PATH = BASE_DIR / "data" / "leads.json"
+BM25_PATH = CHROMA_PATH / "restaurant_docs.bm25.json"
+LEADS_PATH = BASE_DIR / "data" / "leads.db"
+LEGACY_LEADS_PATH = BASE_DIR / "data" / "leads.json"
+SESSIONS_PATH = BASE_DIR / "data" / "sessions.db"
+RESERVATIONS_PATH = BASE_DIR / "data" / "reservations.db"
 LOGO_PATH = BASE_DIR / "assets" / "bella_logo.png"
 
 # Global state
 MENU_DATA = {}
+MENU_CATALOG = MenuCatalog([])   # indexed items, built from MENU_DATA in load_data()
 BUSINESS_INFO = {}
-chroma_client = None
-collection = None
+retriever = None
+lexical_index = None
+
+# Conversation state lives outside the worker, so any worker can serve any
+# conversation (SESSION_BACKEND, see utils/session_store.py)
+session_store = load_session_store(SESSIONS_PATH)
+
+# Bookings with unique confirmation numbers (see utils/reservations.py), made
+# only while a table is free (see utils/availability.py)
+reservation_store = load_reservation_store(RESERVATIONS_PATH)
+reservations = ReservationRepository(reservation_store)
+availability = load_availability(reservation_store, BUSINESS_INFO_PATH)
+schedule = availability.schedule   # hours + holiday exceptions (utils/schedule.py)
+
+# VIP signups: appended by a single writer, deduplicated by email (see utils/lead_store.py)
+lead_store = load_lead_store(LEADS_PATH)
+lead_writer = LeadWriter(lead_store)
+
+# Input checks and escalation, cheapest first (data/guardrails.json)
+GUARDRAIL_PIPELINE = load_pipeline()
+
+# Common questions (hours, parking, "Show me the menu", ...) are answered from
+# templates without an LLM call (data/intents.json, see utils/intents.py)
+INTENTS = load_intents()
+intent_router = IntentRouter(INTENTS, NgramEncoder())
+
 embedding_model = None
 rag_enabled = False
+embedding_cache = cache_from_env()
+embedding_service = None
+
+# Answers to informational questions, reused until the data files or the
+# knowledge base change (see utils/answer_cache.py)
+answer_cache = load_answer_cache([MENU_PATH, BUSINESS_INFO_PATH, CHROMA_PATH])
 
 # =============================================================================
 # STARTUP FUNCTIONS
@@ -80,13 +126,14 @@ rag_enabled = False
 
 def load_data():
     """Load business data"""
-    global MENU_DATA, BUSINESS_INFO
+    global MENU_DATA, MENU_CATALOG, BUSINESS_INFO
     try:
         with open(MENU_PATH, 'r') as f:
             MENU_DATA = json.load(f)
         print(f"[STARTUP] Loaded menu data")
     except Exception as e:
         print(f"[ERROR] Menu load failed: {e}")
+    MENU_CATALOG = MenuCatalog.from_menu(MENU_DATA)
 
     try:
         with open(BUSINESS_INFO_PATH, 'r') as f:
@@ -98,56 +145,56 @@ def load_data():
 
 def initialize_vector_db():
     """Initialize RAG system"""
-    global chroma_client, collection, embedding_model, rag_enabled
+    global retriever, lexical_index, embedding_model, embedding_service, rag_enabled, intent_router
 
-    if not CHROMA_AVAILABLE:
+    if not EMBEDDINGS_AVAILABLE:
         print("[INFO] RAG not available - install chromadb and sentence-transformers")
         return False
 
     try:
+        from sentence_transformers import SentenceTransformer
         embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        chroma_client = chromadb.PersistentClient(path=str(CHROMA_PATH))
-        collection = chroma_client.get_collection(name="restaurant_docs")
+        embedding_service = service_from_env(lambda texts: embedding_model.encode(texts).tolist(), embedding_cache)
+        retriever = load_retriever(CHROMA_PATH)
+        if BM25_PATH.exists():
+            lexical_index = BM25Index.load(BM25_PATH)
+        if INTENT_ENCODER == "minilm":
+            intent_router = IntentRouter(INTENTS, EmbeddingEncoder(lambda texts: embedding_model.encode(texts).tolist()))
         rag_enabled = True
-        print(f"[STARTUP] RAG enabled with {collection.count()} documents")
+        print(f"[STARTUP] RAG enabled ({retriever.name}{' + bm25' if lexical_index else ''}) "
+              f"with {retriever.count()} documents")
         return True
     except Exception as e:
         print(f"[INFO] RAG disabled: {e}")
         return False
 
 
-def save_lead(name: str, email: str):
-    """Save VIP list signup to JSON file"""
+async def save_lead(name: str, email: str) -> bool:
+    """Add a VIP list signup (a repeat email is kept once)"""
     try:
-        # Load existing leads
-        if LEADS_PATH.exists():
-            with open(LEADS_PATH, 'r') as f:
-                leads = json.load(f)
-        else:
-            leads = []
-
-        # Add new lead
-        leads.append({
-            "name": name,
-            "email": email,
-            "timestamp": datetime.now().isoformat(),
-            "source": "chatbot"
-        })
-
-        # Save
-        with open(LEADS_PATH, 'w') as f:
-            json.dump(leads, f, indent=2)
-
-        print(f"[LEAD CAPTURED] {name} - {email}")
+        added = await lead_writer.add(name, email, source="chatbot")
+        print(f"[LEAD CAPTURED] {name} - {email}" if added else f"[LEAD DUPLICATE] {email}")
         return True
     except Exception as e:
         print(f"[ERROR] Failed to save lead: {e}")
         return False
 
 
-# Initialize
+def import_legacy_leads():
+    """Move signups from the old leads.json into the lead store (once)"""
+    if LEGACY_LEADS_PATH.exists() and not lead_store.count():
+        try:
+            with open(LEGACY_LEADS_PATH, 'r') as f:
+                added = lead_store.import_leads(json.load(f))
+            print(f"[STARTUP] Imported {added} leads from {LEGACY_LEADS_PATH.name}")
+        except Exception as e:
+            print(f"[ERROR] Lead import failed: {e}")
+
+
+# Initialize (RAG warms up in a background thread; tools-only until then)
 load_data()
-initialize_vector_db()
+import_legacy_leads()
+rag_warmup = BackgroundInit("rag", initialize_vector_db)
 
 # =============================================================================
 # SYSTEM PROMPT
@@ -179,96 +226,39 @@ TONE: Warm, friendly, professional - like a welcoming Italian restaurant host
 # TOOLS
 # =============================================================================
 
-TOOLS = [
-    {
-        "type": "function",
-        "function": {
-            "name": "check_availability",
-            "description": "Check table availability",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "date": {"type": "string", "description": "YYYY-MM-DD"},
-                    "time": {"type": "string", "description": "HH:MM"},
-                    "party_size": {"type": "integer"}
-                },
-                "required": ["date", "time", "party_size"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "create_reservation",
-            "description": "Create a reservation",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "name": {"type": "string"},
-                    "phone": {"type": "string"},
-                    "date": {"type": "string"},
-                    "time": {"type": "string"},
-                    "party_size": {"type": "integer"},
-                    "special_requests": {"type": "string"}
-                },
-                "required": ["name", "phone", "date", "time", "party_size"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "get_menu_info",
-            "description": "Get menu information",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "category": {"type": "string"},
-                    "dietary_filter": {"type": "string"}
-                }
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "get_business_info",
-            "description": "Get business information",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "info_type": {"type": "string"}
-                },
-                "required": ["info_type"]
-            }
-        }
-    }
-]
+# Declared on the tool implementations below (see utils/tool_registry.py)
+registry = ToolRegistry()
 
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 
-def retrieve_context(query: str, n_results: int = 3) -> List[Dict]:
-    """Retrieve from vector database"""
-    if not rag_enabled or not collection:
-        return []
+async def retrieve_context(query: str, n_results: int = 3) -> RetrievalContext:
+    """Retrieve from the knowledge base (dense + BM25, fused)"""
+    if not rag_enabled or not retriever:
+        return RetrievalContext(query=query)
     try:
-        query_embedding = embedding_model.encode(query).tolist()
-        results = collection.query(query_embeddings=[query_embedding], n_results=n_results)
-        contexts = []
-        if results and results['documents']:
-            for i, doc in enumerate(results['documents'][0]):
-                metadata = results['metadatas'][0][i] if results['metadatas'] else {}
-                contexts.append({
-                    "content": doc,
-                    "source": metadata.get("source", "unknown"),
-                    "section": metadata.get("section", "")
-                })
-        return contexts
+        return await hybrid_retrieve(query, embedding_service.embed, retriever, lexical_index, n_results=n_results)
     except Exception as e:
         print(f"[ERROR] Retrieval failed: {e}")
-        return []
+        return RetrievalContext(query=query)
+
+
+async def route_intent(query: str) -> IntentMatch:
+    """Match a message to a common question; MiniLM reuses the embedding retrieval will look up"""
+    if intent_router.encoder.name == "minilm":
+        start = time.perf_counter()
+        match = intent_router.classify(await embedding_service.embed(query), query)
+        match.elapsed_ms = (time.perf_counter() - start) * 1000
+        return match
+    return intent_router.route(query)
+
+
+async def reply_without_llm(session: Session, message_history: List[Dict], question: str, answer: str):
+    """Send a ready answer (template or cached) and record the turn"""
+    await cl.Message(content=answer).send()
+    message_history += [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+    session.save_history(compact_history(message_history))
 
 
 def log_interaction(event_type: str, data: dict):
@@ -276,47 +266,39 @@ def log_interaction(event_type: str, data: dict):
     print(f"[{event_type.upper()}] {json.dumps(data, default=str)}")
 
 
+def current_session() -> Session:
+    """This conversation's state, loaded from the session store"""
+    return Session(session_store, cl.context.session.thread_id)
+
+
 # =============================================================================
 # TOOL IMPLEMENTATIONS
 # =============================================================================
 
+@registry.tool("Check if a table is available for the requested date, time, and party size")
 @cl.step(name="Check Availability", type="tool")
-async def check_availability(date: str, time: str, party_size: int) -> dict:
-    """Check table availability"""
+async def check_availability(date: Date, time: Time, party_size: PartySize) -> dict:
+    """Check table availability (tables, hours and bookings; see utils/availability.py)"""
     log_interaction("availability_check", {"date": date, "time": time, "party_size": party_size})
-
-    try:
-        booking_date = datetime.strptime(date, "%Y-%m-%d")
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-
-        if booking_date < today:
-            return {"available": False, "message": "Cannot book past dates."}
-
-        if booking_date.weekday() == 0:  # Monday
-            return {"available": False, "message": "We're closed on Mondays. Try Tuesday-Sunday!"}
-
-        if party_size >= 8:
-            return {
-                "available": False,
-                "message": f"For parties of {party_size}, please call {BUSINESS_CONFIG['phone']} for our private dining room."
-            }
-
-        # Mock availability
-        formatted_date = booking_date.strftime("%A, %B %d, %Y")
-        return {
-            "available": True,
-            "message": f"Table available on {formatted_date} at {time} for {party_size} guests!"
-        }
-    except:
-        return {"available": False, "message": "Invalid date or time format."}
+    return await availability.check(date, time, party_size)
 
 
+@registry.tool("Create a restaurant reservation after availability has been confirmed")
 @cl.step(name="Create Reservation", type="tool")
-async def create_reservation(name: str, phone: str, date: str, time: str, party_size: int, special_requests: str = "") -> dict:
-    """Create reservation"""
-    confirmation = f"BELLA-{random.randint(100000, 999999)}"
+async def create_reservation(name: GuestName, phone: Phone, date: Date, time: Time, party_size: PartySize,
+                             special_requests: SpecialRequests = "") -> dict:
+    """Create reservation (saved; repeating the call returns the same booking)"""
+    booking_date = datetime.strptime(date, "%Y-%m-%d").strftime("%A, %B %d, %Y")
+    booking_time = datetime.strptime(time, "%H:%M").strftime("%I:%M %p")
 
-    log_interaction("reservation_created", {
+    try:
+        reservation, created = await availability.reserve(name, phone, date, time, party_size, special_requests)
+    except SlotUnavailable as e:
+        log_interaction("reservation_unavailable", {"date": date, "time": time, "party_size": party_size})
+        return {"success": False, **e.args[0]}
+    confirmation = reservation.code
+
+    log_interaction("reservation_created" if created else "reservation_repeated", {
         "confirmation": confirmation,
         "name": name,
         "phone": phone,
@@ -325,12 +307,8 @@ async def create_reservation(name: str, phone: str, date: str, time: str, party_
         "party_size": party_size
     })
 
-    booking_date = datetime.strptime(date, "%Y-%m-%d").strftime("%A, %B %d, %Y")
-    booking_time = datetime.strptime(time, "%H:%M").strftime("%I:%M %p")
-
     # Store in session
-    cl.user_session.set("customer_name", name)
-    cl.user_session.set("customer_phone", phone)
+    current_session().update(customer_name=name, customer_phone=phone)
 
     return {
         "success": True,
@@ -344,56 +322,89 @@ async def create_reservation(name: str, phone: str, date: str, time: str, party_
     }
 
 
+@registry.tool("Get menu items (dishes and drinks). Filters combine: category, dietary preference, "
+               "words in the name, popular items, maximum price. Results come in pages.")
 @cl.step(name="Get Menu", type="tool")
-async def get_menu_info(category: str = "", dietary_filter: str = "") -> dict:
-    """Get menu information"""
-    if not MENU_DATA:
+async def get_menu_info(category: MenuCategory = "", dietary_filter: DietaryFilter = "", search: MenuSearch = "",
+                        popular_only: PopularOnly = False, max_price: MaxPrice = 0, page: Page = 1) -> dict:
+    """Get menu items, one page at a time (see utils/menu_catalog.py)"""
+    if not MENU_CATALOG:
         return {"error": "Menu not available"}
 
-    results = []
-    categories = {category: MENU_DATA[category]} if category and category in MENU_DATA else {k: v for k, v in MENU_DATA.items() if k != "drinks"}
-
-    for cat_name, items in categories.items():
-        if isinstance(items, list):
-            for item in items[:5]:  # Limit results
-                if dietary_filter and not item.get(dietary_filter, False):
-                    continue
-                results.append({
-                    "category": cat_name,
-                    "name": item.get("name"),
-                    "description": item.get("description", ""),
-                    "price": item.get("price")
-                })
-
-    return {"found": True, "count": len(results), "items": results}
+    return MENU_CATALOG.query(category=category, dietary=dietary_filter, text=search, popular=popular_only,
+                              max_price=max_price or None, page=page)
 
 
+@registry.tool("Get business information like hours, location, parking, policies, etc.")
 @cl.step(name="Get Business Info", type="tool")
-async def get_business_info(info_type: str) -> dict:
+async def get_business_info(info_type: BusinessInfoType) -> dict:
     """Get business information"""
     if not BUSINESS_INFO:
         return {"error": "Information not available"}
 
     info_map = {
-        "hours": BUSINESS_INFO.get("hours"),
+        "hours": {**BUSINESS_INFO.get("hours", {}), "now": schedule.status_line(),
+                  "special_hours": schedule.exception_lines(days=366)},
         "location": BUSINESS_INFO.get("basic", {}).get("address"),
         "parking": BUSINESS_INFO.get("parking"),
-        "services": BUSINESS_INFO.get("services")
+        "dress_code": BUSINESS_INFO.get("dress_code"),
+        "accessibility": BUSINESS_INFO.get("accessibility"),
+        "services": BUSINESS_INFO.get("services"),
+        "payment_methods": BUSINESS_INFO.get("payment_methods"),
+        "private_dining": BUSINESS_INFO.get("private_dining"),
+        "gift_cards": BUSINESS_INFO.get("gift_cards"),
+        "contact": BUSINESS_INFO.get("basic")
     }
 
     return {"found": True, "data": info_map.get(info_type, {})}
 
 
+@registry.tool("Look up an existing reservation by confirmation number, or a guest's upcoming reservations by phone")
+@cl.step(name="Find Reservation", type="tool")
+async def find_reservation(confirmation_number: ConfirmationNumber = "", phone: Phone = "") -> dict:
+    """Find reservations by confirmation number or phone"""
+    if confirmation_number:
+        reservation = await reservations.get(confirmation_number)
+        found = [reservation] if reservation else []
+    elif phone:
+        today = datetime.now().strftime("%Y-%m-%d")
+        found = [r for r in await reservations.by_phone(phone) if r.date >= today]
+    else:
+        return {"found": False, "message": "Ask the guest for their confirmation number or phone number."}
+    return {"found": bool(found), "reservations": [r.to_dict() for r in found]}
+
+
+@registry.tool("Get the full version of an earlier tool result that was shortened in the conversation "
+               "history (it has a _ref field). Use when the guest asks about omitted items.")
+@cl.step(name="Expand Tool Result", type="tool")
+async def expand_tool_result(ref: ResultRef) -> dict:
+    """Re-open a compacted tool result"""
+    return expand_result(cl.user_session.get("tool_results") or ToolResultStore(), ref)
+
+
+# OpenAI tool schemas and dispatch, built once from the registered functions
+TOOLS = registry.schemas()
+TOOL_HANDLERS = registry.handlers
+
+
 # =============================================================================
 # CHAINLIT HANDLERS
 # =============================================================================
 
+@cl.on_app_startup
+async def on_app_startup():
+    """Warm up RAG once the server is accepting connections and expose /ready"""
+    rag_warmup.start()
+    register_readiness_route(rag_warmup)
+
+
 @cl.on_chat_start
 async def start():
     """Initialize conversation with welcome and action buttons"""
-    cl.user_session.set("message_history", [])
-    cl.user_session.set("message_count", 0)
-    cl.user_session.set("tools_used", [])
+    rag_warmup.start()
+    # Full tool results stay on this worker; expand_tool_result asks the model
+    # to call the tool again if the conversation moved to another worker
+    cl.user_session.set("tool_results", ToolResultStore())
 
     # Welcome message
     welcome = f"""🇮🇹 **Benvenuti!** Welcome to {BUSINESS_CONFIG['name']}!
@@ -434,17 +445,19 @@ async def on_menu(action):
 @cl.action_callback("hours")
 async def on_hours(action):
     """Handle hours button click"""
+    hours_lines = "\n".join(f"- {line}" for line in schedule.weekly_lines())
+    if schedule.notes:
+        hours_lines += f"\n- {schedule.notes}"
+    special_hours = schedule.exception_lines()
+    if special_hours:
+        hours_lines += "\n\n**Special hours:**\n" + "\n".join(f"- {line}" for line in special_hours)
     hours_msg = f"""**Hours & Location**
 
 📍 **Address:** {BUSINESS_CONFIG['address']}
 📞 **Phone:** {BUSINESS_CONFIG['phone']}
 
-⏰ **Hours:**
-- Monday: Closed
-- Tuesday-Thursday: 11am-10pm
-- Friday: 11am-11pm
-- Saturday: 10am-11pm (Brunch 10am-2pm)
-- Sunday: 10am-9pm (Brunch 10am-2pm)
+⏰ **Hours:** {schedule.status_line()}
+{hours_lines}
 
 🚗 We validate parking at Main Street Garage (2 hours free)"""
     await cl.Message(content=hours_msg).send()
@@ -459,86 +472,115 @@ async def on_catering(action):
 @cl.on_message
 async def main(message: cl.Message):
     """Main message handler with full features"""
-    if len(message.content.strip()) == 0:
+    session = current_session()
+
+    # A confident match is answered from its template: no retrieval, no LLM
+    intent = await route_intent(message.content) if INTENT_ROUTING else None
+    answer = render_answer(intent.intent, INTENTS, BUSINESS_INFO, MENU_DATA, schedule) if intent and intent.confident else None
+
+    async def retrieve() -> RetrievalContext:
+        """Retrieve context if RAG enabled"""
+        if answer:
+            return RetrievalContext(query=message.content)
+        if rag_enabled:
+            retrieval = await retrieve_context(message.content, n_results=3)
+            log_interaction("retrieval", {
+                **retrieval.log_data(),
+                "embedding_cache": embedding_cache.stats(),
+                "embedding_batches": embedding_service.stats()
+            })
+            return retrieval
+        if not rag_warmup.done:
+            log_interaction("retrieval", {"skipped": "warming up", **rag_warmup.status()})
+        return RetrievalContext(query=message.content)
+
+    # Guardrails stop rejected messages and escalations before retrieval or the
+    # LLM; async classifier stages (if enabled) run alongside retrieval
+    guardrail, retrieval = await GUARDRAIL_PIPELINE.run(message.content, session.get("last_user_message", ""),
+                                                        alongside=retrieve)
+    log_interaction("guardrails", guardrail.log_data())
+    if not guardrail.allowed:
+        if guardrail.verdict.action == "escalate":
+            log_interaction("escalation", {"category": guardrail.verdict.category, "message": message.content[:100]})
+        await cl.Message(content=guardrail.verdict.reply).send()
         return
+    session.set("last_user_message", message.content)
+    if intent:
+        log_interaction("intent", {**intent.log_data(), "answered": answer is not None})
 
     # Track metrics
-    msg_count = cl.user_session.get("message_count", 0) + 1
-    cl.user_session.set("message_count", msg_count)
+    msg_count = session.get("message_count", 0) + 1
+    session.set("message_count", msg_count)
 
-    message_history = cl.user_session.get("message_history", [])
+    message_history = session.load_history()
 
-    # Retrieve context if RAG enabled
-    context_str = ""
-    if rag_enabled:
-        contexts = retrieve_context(message.content, n_results=3)
-        if contexts:
-            context_str = "\n\nRETRIEVED CONTEXT:\n"
-            for ctx in contexts:
-                context_str += f"\nSource: {ctx['source']} - {ctx['section']}\n{ctx['content']}\n"
+    if answer:
+        await reply_without_llm(session, message_history, message.content, answer)
+        return
+
+    # Same question (by meaning) and same retrieved chunks as an earlier answer
+    cache_vector = None
+    personal = has_personal_context(message_history)   # earlier turns shaped the answer
+    if answer_cache and retrieval:
+        if answer_cache.eligible(message.content) and not personal:
+            cache_vector = await embedding_service.embed(message.content)   # cached by retrieval
+            cached = answer_cache.lookup(cache_vector, retrieval.chunks)
+            log_interaction("answer_cache", {"hit": cached is not None, **answer_cache.stats()})
+            if cached:
+                await reply_without_llm(session, message_history, message.content, cached)
+                return
+        else:
+            answer_cache.skip()
 
     # Build prompt
-    system_prompt = SYSTEM_PROMPT + context_str
+    system_prompt = SYSTEM_PROMPT + retrieval.prompt_section()
 
     message_history.append({"role": "user", "content": message.content})
-    messages = [{"role": "system", "content": system_prompt}] + message_history
-
-    # Call OpenAI
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=messages,
-        tools=TOOLS,
-        tool_choice="auto"
-    )
-
-    assistant_message = response.choices[0].message
-
-    # Handle tool calls
-    if assistant_message.tool_calls:
-        message_history.append({
-            "role": "assistant",
-            "content": assistant_message.content,
-            "tool_calls": [{"id": tc.id, "type": tc.type, "function": {"name": tc.function.name, "arguments": tc.function.arguments}} for tc in assistant_message.tool_calls]
-        })
-
-        for tool_call in assistant_message.tool_calls:
-            func_name = tool_call.function.name
-            args = json.loads(tool_call.function.arguments)
-
-            # Track tool usage
-            tools_used = cl.user_session.get("tools_used", [])
-            tools_used.append(func_name)
-            cl.user_session.set("tools_used", tools_used)
-
-            if func_name == "check_availability":
-                result = await check_availability(**args)
-            elif func_name == "create_reservation":
-                result = await create_reservation(**args)
-            elif func_name == "get_menu_info":
-                result = await get_menu_info(**args)
-            elif func_name == "get_business_info":
-                result = await get_business_info(**args)
-            else:
-                result = {"error": "Unknown function"}
-
-            message_history.append({"role": "tool", "tool_call_id": tool_call.id, "content": json.dumps(result)})
-
-        final_response = client.chat.completions.create(
-            model=MODEL,
-            messages=[{"role": "system", "content": system_prompt}] + message_history
-        )
-        final_message = final_response.choices[0].message.content
-        await cl.Message(content=final_message).send()
-        message_history.append({"role": "assistant", "content": final_message})
-
-    else:
-        await cl.Message(content=assistant_message.content).send()
-        message_history.append({"role": "assistant", "content": assistant_message.content})
-
-    cl.user_session.set("message_history", message_history)
+    message_history = compact_history(message_history)  # token budget, older turns summarized
+
+    # Text streams to the guest as it's generated
+    msg = cl.Message(content="")
+    tokens = TokenCoalescer(msg)
+
+    async def stream_token(token: str):
+        await tokens.push(token)
+
+    async def before_tools(tool_calls: List[Dict]):
+        nonlocal msg, tokens
+        # Finish any text the model sent before its tool calls
+        await tokens.flush()
+        if msg.content:
+            await msg.send()
+            msg = cl.Message(content="")
+            tokens = TokenCoalescer(msg)
+
+        # Track tool usage
+        tools_used = session.get("tools_used", []) + [tool_call["function"]["name"] for tool_call in tool_calls]
+        session.set("tools_used", tools_used)
+
+    # Tools may chain (availability -> reservation) within this one turn
+    result = await run_agent(system_prompt, message_history, TOOLS, TOOL_HANDLERS,
+                             on_token=stream_token, on_tool_calls=before_tools)
+    await tokens.flush()
+    await msg.send()
+
+    if (cache_vector is not None and not personal and result.stop_reason == "answered"
+            and not any(r.tools for r in result.rounds)):
+        answer_cache.store(cache_vector, retrieval.chunks, message.content, result.content)
+
+    # Later turns resend a compact form of this turn's tool results
+    tool_results = cl.user_session.get("tool_results") or ToolResultStore()
+    compact_tool_messages(message_history, tool_results)
+    cl.user_session.set("tool_results", tool_results)
+
+    history_write = session.save_history(message_history)
+    log_interaction("agent", {
+        **result.log_data(),
+        "history": {**history_stats(message_history), "write": history_write}
+    })
 
     # After 5+ messages, offer VIP list (only once)
-    if msg_count >= 5 and not cl.user_session.get("vip_offered", False):
-        cl.user_session.set("vip_offered", True)
+    if msg_count >= 5 and not session.get("vip_offered", False):
+        session.set("vip_offered", True)
         vip_msg = "\n\n---\n\n💌 **Join our VIP list** for exclusive offers and event invitations! Would you like to sign up?"
         await cl.Message(content=vip_msg).send()
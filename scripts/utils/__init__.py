@@ -0,0 +1,6 @@
+"""
+Workshop Utilities
+==================
+Helper scripts (setup, validation, benchmarks) and the shared modules
+imported by the Chainlit scripts, e.g. ``from utils.llm import client``.
+"""
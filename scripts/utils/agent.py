@@ -0,0 +1,167 @@
+"""
+Agent Loop
+==========
+Lets the model chain tools within one guest turn.
+
+With a fixed "call, run tools, answer" flow, a model that needs
+``check_availability`` *and then* ``create_reservation`` has to stop after the
+first tool and wait for the guest to say "yes, book it". ``run_agent`` keeps
+offering tools after each round of results until the model answers in text,
+bounded by a maximum number of rounds, wall-clock time and total tokens. When
+a bound is hit, the next call is made without tools so the guest always gets
+an answer.
+
+Each round records its LLM time, tool time and token usage.
+
+Usage:
+    result = await run_agent(system_prompt, message_history, TOOLS, TOOL_HANDLERS,
+                             on_token=tokens.push)
+    log_interaction("agent", result.log_data())
+
+Configuration (environment variables):
+    AGENT_MAX_ROUNDS   - LLM calls per guest turn, including the answer (default: 4)
+    AGENT_MAX_SECONDS  - Wall-clock budget before forcing an answer (default: 30)
+    AGENT_MAX_TOKENS   - Total tokens across rounds before forcing an answer (default: 12000)
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from utils.llm import stream_completion
+from utils.tool_calls import run_tool_calls
+
+MAX_ROUNDS = int(os.environ.get("AGENT_MAX_ROUNDS", "4"))
+MAX_SECONDS = float(os.environ.get("AGENT_MAX_SECONDS", "30"))
+MAX_TOKENS = int(os.environ.get("AGENT_MAX_TOKENS", "12000"))
+
+
+@dataclass
+class AgentRound:
+    """Timing and usage of one LLM call plus the tools it requested"""
+    index: int
+    llm_ms: float = 0.0
+    tools_ms: float = 0.0
+    tools: List[str] = field(default_factory=list)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+@dataclass
+class AgentResult:
+    """Outcome of one guest turn"""
+    content: Optional[str] = None
+    rounds: List[AgentRound] = field(default_factory=list)
+    stop_reason: str = "answered"   # answered | max_rounds | max_seconds | max_tokens
+    elapsed_ms: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(r.prompt_tokens + r.completion_tokens for r in self.rounds)
+
+    def log_data(self) -> Dict:
+        """Compact summary for interaction logs"""
+        return {
+            "rounds": len(self.rounds),
+            "stop_reason": self.stop_reason,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "total_tokens": self.total_tokens,
+            "per_round": [
+                {
+                    "llm_ms": round(r.llm_ms, 1),
+                    "tools_ms": round(r.tools_ms, 1),
+                    "tools": r.tools,
+                    "prompt_tokens": r.prompt_tokens,
+                    "completion_tokens": r.completion_tokens
+                }
+                for r in self.rounds
+            ]
+        }
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) when the API reports no usage"""
+    return len(text) // 4 + 1
+
+
+async def run_agent(system_prompt: str,
+                    message_history: List[Dict],
+                    tools: List[Dict],
+                    handlers: Dict[str, Callable[..., Awaitable[Dict]]],
+                    on_token: Optional[Callable[[str], Awaitable]] = None,
+                    on_tool_calls: Optional[Callable[[List[Dict]], Awaitable]] = None,
+                    max_rounds: int = MAX_ROUNDS,
+                    max_seconds: float = MAX_SECONDS,
+                    max_tokens: int = MAX_TOKENS) -> AgentResult:
+    """
+    Run LLM calls and tools until the model answers or a bound is hit.
+
+    ``message_history`` is extended in place with the assistant tool-call
+    messages, the tool results and the final answer.
+
+    Args:
+        system_prompt: System message for every round
+        message_history: Conversation so far, ending with the guest's message
+        tools: OpenAI tool schemas
+        handlers: Tool name -> async function (see utils/tool_calls.py)
+        on_token: Awaited with every streamed text fragment
+        on_tool_calls: Awaited with a round's tool calls before they run
+        max_rounds: LLM calls allowed, including the final answer
+        max_seconds: Wall-clock budget for the turn
+        max_tokens: Token budget for the turn (prompt + completion, all rounds)
+    """
+    result = AgentResult()
+    start = time.perf_counter()
+
+    for index in range(1, max_rounds + 1):
+        # Out of budget: the last call gets no tools, so the model must answer
+        if index == max_rounds:
+            result.stop_reason = "max_rounds"
+        elif time.perf_counter() - start > max_seconds:
+            result.stop_reason = "max_seconds"
+        elif result.total_tokens > max_tokens:
+            result.stop_reason = "max_tokens"
+        offer_tools = result.stop_reason == "answered"
+
+        messages = [{"role": "system", "content": system_prompt}] + message_history
+        current = AgentRound(index=index)
+        step = time.perf_counter()
+        if offer_tools:
+            reply = await stream_completion(messages, on_token=on_token, tools=tools, tool_choice="auto",
+                                            stream_options={"include_usage": True})
+        else:
+            reply = await stream_completion(messages, on_token=on_token,
+                                            stream_options={"include_usage": True})
+        current.llm_ms = (time.perf_counter() - step) * 1000
+
+        usage = reply.get("usage")
+        if usage:
+            current.prompt_tokens = usage["prompt_tokens"]
+            current.completion_tokens = usage["completion_tokens"]
+        else:
+            current.prompt_tokens = estimate_tokens(json.dumps(messages))
+            current.completion_tokens = estimate_tokens(reply["content"] or "")
+        result.rounds.append(current)
+
+        if not reply["tool_calls"] or not offer_tools:
+            result.content = reply["content"]
+            message_history.append({"role": "assistant", "content": reply["content"]})
+            break
+
+        message_history.append({
+            "role": "assistant",
+            "content": reply["content"],
+            "tool_calls": reply["tool_calls"]
+        })
+        if on_tool_calls:
+            await on_tool_calls(reply["tool_calls"])
+
+        current.tools = [tool_call["function"]["name"] for tool_call in reply["tool_calls"]]
+        step = time.perf_counter()
+        message_history.extend(await run_tool_calls(reply["tool_calls"], handlers))
+        current.tools_ms = (time.perf_counter() - step) * 1000
+
+    result.elapsed_ms = (time.perf_counter() - start) * 1000
+    return result
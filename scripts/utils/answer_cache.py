@@ -0,0 +1,233 @@
+"""
+Semantic Answer Cache
+=====================
+Reuses LLM answers to informational questions ("do you have gluten free
+pasta", "what's the corkage fee") in the RAG scripts (05 and 06).
+
+Those answers only change when the data behind them changes, yet every
+repeat, in any wording, cost a full LLM call. A cached answer is reused when
+
+- the new question's embedding is close to the cached one (cosine similarity
+  at or above the threshold), and
+- retrieval returned the same knowledge base chunks, so the answer was
+  written from the same context.
+
+What is cached:
+
+- Only turns answered without tools. Availability, reservations and menu or
+  business lookups go through tools; their answers depend on arguments,
+  dates and the guest.
+- Only answers written without guest details in the conversation. A history
+  containing tool calls (or a summary of older turns, which may mention
+  them) is never stored or served from the cache, and neither is one where
+  an earlier guest message gave a name, phone number, party details or an
+  allergy, answered the assistant asking for one, or fails the
+  self-contained check below. The answer to "do you
+  have gluten free pasta" after "I'm celiac, it's for my son" is that
+  guest's answer, not a shared one.
+- Only self-contained questions. Messages with digits (dates, party sizes,
+  phone numbers) or follow-up words ("is that vegan?") are skipped both ways,
+  since their answers depend on the conversation.
+
+Invalidation: the cache fingerprints the data files (menu.json,
+business_info.json) and the knowledge base directory (Chroma / NumPy index,
+BM25). Any change (size or modification time) empties the cache on the next
+lookup.
+
+Eviction is LRU with a size cap. The embeddings live in one preallocated
+matrix, so a lookup is a single matrix-vector product.
+
+Usage:
+    answer_cache = load_answer_cache([MENU_PATH, BUSINESS_INFO_PATH, CHROMA_PATH])
+    if answer_cache.eligible(message.content):
+        vector = await embedding_service.embed(message.content)
+        cached = answer_cache.lookup(vector, retrieval.chunks)
+        ...
+        answer_cache.store(vector, retrieval.chunks, message.content, answer)
+
+Configuration (environment variables):
+    ANSWER_CACHE            - "0" to disable (default: 1)
+    ANSWER_CACHE_SIZE       - Max cached answers (default: 512)
+    ANSWER_CACHE_THRESHOLD  - Min cosine similarity between questions (default: 0.92)
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Answers to these depend on the conversation or the guest
+PERSONAL_PATTERN = re.compile(
+    r"\d|\b(it|that|those|these|them|they|this one|same|also|instead|my reservation|my booking|my order)\b",
+    re.IGNORECASE
+)
+
+# Guest details typed in plain text (names, allergies, who is coming)
+GUEST_DETAILS_PATTERN = re.compile(
+    r"\b(my name|i'm|i am|this is|call me|my (wife|husband|partner|son|daughter|kids?|children|family|friend|mom|dad)"
+    r"|we are|we're|party of|allerg\w*|celiac|intoleran\w*|pregnan\w*|birthday|anniversary)\b",
+    re.IGNORECASE
+)
+
+# An assistant turn asking for details: the guest's reply ("John Smith") is personal
+ASKS_DETAILS_PATTERN = re.compile(r"\b(name|phone|number|contact|email|allerg\w*|dietary)\b", re.IGNORECASE)
+
+
+@dataclass
+class CachedAnswer:
+    """One cached answer"""
+    question: str
+    answer: str
+    chunk_ids: frozenset
+    created: float
+    hits: int = 0
+
+
+def fingerprint(paths: Sequence[Path]) -> Tuple:
+    """(name, size, mtime) of each file, and of the top-level files of each directory"""
+    entries = []
+    for path in paths:
+        path = Path(path)
+        files = sorted(p for p in path.iterdir() if p.is_file()) if path.is_dir() else [path]
+        for file in files:
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            entries.append((str(file), stat.st_size, stat.st_mtime_ns))
+    return tuple(entries)
+
+
+def has_personal_context(message_history: List[Dict]) -> bool:
+    """Whether the conversation may hold guest details an answer could repeat or depend on"""
+    asked = False
+    for message in message_history:
+        if message["role"] in ("tool", "system") or message.get("tool_calls"):
+            return True
+        content = message.get("content") or ""
+        if message["role"] == "user":
+            if asked or PERSONAL_PATTERN.search(content) or GUEST_DETAILS_PATTERN.search(content):
+                return True
+        elif message["role"] == "assistant":
+            asked = "?" in content and bool(ASKS_DETAILS_PATTERN.search(content))
+    return False
+
+
+class AnswerCache:
+    """LRU cache of answers keyed on question embedding + retrieved chunk ids"""
+
+    def __init__(self, max_size: int = 512, threshold: float = 0.92, sources: Sequence[Path] = ()):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.sources = list(sources)
+        self._version = fingerprint(self.sources)
+        self._lock = threading.Lock()
+
+        # Row i of the matrix holds the unit-length embedding of slot i
+        self._vectors: Optional[np.ndarray] = None
+        self._used = np.zeros(max_size, dtype=bool)
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()   # slot -> answer, LRU first
+
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def eligible(question: str) -> bool:
+        """Whether a question is self-contained enough to share an answer"""
+        return not PERSONAL_PATTERN.search(question)
+
+    def skip(self):
+        """Count a question that wasn't looked up (ineligible)"""
+        with self._lock:
+            self.skipped += 1
+
+    def _check_version(self):
+        """Empty the cache if a data file or the knowledge base changed"""
+        version = fingerprint(self.sources)
+        if version != self._version:
+            self._version = version
+            if self._entries:
+                self._entries.clear()
+                self._used[:] = False
+                self.invalidations += 1
+
+    @staticmethod
+    def _unit(vector: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector: Sequence[float], chunks: List[Dict]) -> Optional[str]:
+        """The cached answer to a similar question with the same retrieved chunks, or None"""
+        query = self._unit(vector)
+        chunk_ids = frozenset(chunk["id"] for chunk in chunks)
+        with self._lock:
+            self._check_version()
+            if self._entries:
+                scores = self._vectors @ query
+                scores[~self._used] = -1.0
+                candidates = np.flatnonzero(scores >= self.threshold)
+                # Most similar first
+                for slot in candidates[np.argsort(-scores[candidates])]:
+                    entry = self._entries[int(slot)]
+                    if entry.chunk_ids == chunk_ids:
+                        self._entries.move_to_end(int(slot))
+                        entry.hits += 1
+                        self.hits += 1
+                        return entry.answer
+            self.misses += 1
+            return None
+
+    def store(self, vector: Sequence[float], chunks: List[Dict], question: str, answer: str):
+        """Cache an answer, evicting the least recently used one when full"""
+        if not answer:
+            return
+        query = self._unit(vector)
+        with self._lock:
+            self._check_version()
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, len(query)), dtype=np.float32)
+            if len(self._entries) >= self.max_size:
+                slot, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+            else:
+                slot = int(np.flatnonzero(~self._used)[0])
+            self._vectors[slot] = query
+            self._used[slot] = True
+            self._entries[slot] = CachedAnswer(question, answer, frozenset(c["id"] for c in chunks), time.time())
+            self.stores += 1
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for logging"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+def load_answer_cache(sources: Sequence[Path]) -> Optional[AnswerCache]:
+    """Build the answer cache from environment variables (None when disabled)"""
+    if os.environ.get("ANSWER_CACHE", "1") != "1":
+        return None
+    return AnswerCache(
+        max_size=int(os.environ.get("ANSWER_CACHE_SIZE", "512")),
+        threshold=float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.92")),
+        sources=sources
+    )
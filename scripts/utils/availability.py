@@ -0,0 +1,303 @@
+"""
+Table Availability
+==================
+Real availability for ``check_availability`` and ``create_reservation``
+(04a, 04b, 04c, 05, 06), computed from the tables and hours in
+``business_info.json`` (hours and holiday exceptions via utils/schedule.py)
+and the bookings in the reservation store.
+
+The old tools were mocks: hours checks plus a coin flip at peak times, or
+"available" for any party under 8, with the same hard-coded alternative
+times whatever was actually booked.
+
+Model:
+
+- The day is split into 15-minute slots (96 per day). A booking holds a
+  table from its slot for the table's dining time (``dining_minutes``), cut
+  off at closing.
+- Each table size has a ``count``. A party sits at the smallest size that
+  seats it, or up to ``max_extra_seats`` larger when those are taken.
+- Occupancy of a day is one ``bytearray`` per table size: tables in use in
+  each slot. A party fits if no slot of its stay is already at ``count``,
+  which is O(slots in the stay). Per-size counts are enough: bookings are
+  intervals, and intervals that never overlap more than ``count`` deep
+  always fit on ``count`` tables.
+- Alternatives are the nearest start times that fit, searched outward from
+  the requested time. One pass over the day's full slots builds prefix sums,
+  so every candidate start is then checked in O(1).
+
+Days are built from the store on first use and cached until the store's
+version changes (a booking from this process or any other).
+
+Bookings commit atomically: ``reserve`` hands ``ReservationStore.create`` a
+check that runs inside its write transaction against the day's stored
+bookings, so two guests can't both take the last table, even from separate
+workers. Repeating an identical booking returns the first one, as before.
+
+Usage:
+    availability = load_availability(load_reservation_store())
+    result = await availability.check("2025-06-14", "19:00", 4)
+    result["available"], result["alternative_times"]     # ["18:45", "19:15", ...]
+    try:
+        reservation, created = await availability.reserve(name, phone, date, time, party_size)
+    except SlotUnavailable as e:
+        e.args[0]                                         # check() result with alternatives
+"""
+
+import asyncio
+import json
+import threading
+from dataclasses import dataclass
+from datetime import date as Date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.reservations import Reservation, ReservationStore, SlotUnavailable
+from utils.schedule import SLOT_MINUTES, SLOTS_PER_DAY, WEEKDAYS, Schedule, format_time, slot_time
+
+DEFAULT_BUSINESS_INFO_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "restaurant" / "business_info.json"
+MAX_ALTERNATIVES = 3
+
+
+@dataclass
+class TableSize:
+    seats: int
+    count: int
+    dining_slots: int
+
+
+class DayOccupancy:
+    """Tables in use per 15-minute slot, one bytearray per table size"""
+
+    def __init__(self, sizes: List[TableSize], close_slot: int):
+        self.close_slot = close_slot
+        self.in_use = {size.seats: bytearray(SLOTS_PER_DAY) for size in sizes}
+
+    def stay(self, size: TableSize, start: int) -> Tuple[int, int]:
+        return start, min(start + size.dining_slots, self.close_slot)
+
+    def fits(self, size: TableSize, start: int) -> bool:
+        """O(slots in the stay)"""
+        begin, end = self.stay(size, start)
+        return max(self.in_use[size.seats][begin:end], default=0) < size.count
+
+    def add(self, size: TableSize, start: int):
+        used = self.in_use[size.seats]
+        for slot in range(*self.stay(size, start)):
+            used[slot] += 1
+
+    def free_starts(self, size: TableSize, first: int, last: int) -> List[bool]:
+        """Whether a stay at this size fits, for each start in [first, last]"""
+        used = self.in_use[size.seats]
+        # full_before[i]: slots before i where every table of this size is taken
+        full_before = [0] * (SLOTS_PER_DAY + 1)
+        for slot in range(SLOTS_PER_DAY):
+            full_before[slot + 1] = full_before[slot] + (used[slot] >= size.count)
+        free = []
+        for start in range(first, last + 1):
+            begin, end = self.stay(size, start)
+            free.append(full_before[end] == full_before[begin])
+        return free
+
+
+class AvailabilityEngine:
+    """Availability and atomic booking against a ReservationStore"""
+
+    def __init__(self, business_info: Dict, store: ReservationStore, schedule: Optional[Schedule] = None):
+        seating = business_info["seating"]
+        self.store = store
+        self.schedule = schedule or Schedule.from_business_info(business_info)
+        self.sizes = sorted(
+            (TableSize(t["seats"], t["count"], -(-t["dining_minutes"] // SLOT_MINUTES)) for t in seating["tables"]),
+            key=lambda size: size.seats
+        )
+        self.max_extra_seats = seating.get("max_extra_seats", 2)
+        self.last_seating_slots = seating.get("last_seating_before_close_minutes", 60) // SLOT_MINUTES
+        self.max_days_ahead = seating.get("max_days_ahead", 60)
+        self.large_party_minimum = business_info.get("reservations", {}).get("large_party_minimum", 8)
+        self.phone = business_info.get("basic", {}).get("phone", "")
+
+        self._days: Dict[str, Tuple[Tuple[int, int], DayOccupancy]] = {}
+        self._lock = threading.Lock()
+
+    # -- model --------------------------------------------------------------
+
+    def sizes_for(self, party_size: int) -> List[TableSize]:
+        """Table sizes that can seat a party, smallest first"""
+        return [size for size in self.sizes if party_size <= size.seats <= party_size + self.max_extra_seats]
+
+    def _window(self, day: Date) -> Optional[Tuple[int, int, int]]:
+        """(first start, last start, closing) slots, or None when closed"""
+        hours = self.schedule.hours_on(day)
+        if hours is None:
+            return None
+        opens, closes = hours
+        first = -(-opens // SLOT_MINUTES)
+        close = closes // SLOT_MINUTES
+        return first, close - self.last_seating_slots, close
+
+    def _day_name(self, day: Date) -> str:
+        """ "Mondays", or "Thursday, November 26 (Thanksgiving)" on a day with special hours"""
+        reason = self.schedule.exception_on(day)
+        if reason is None:
+            return f"{WEEKDAYS[day.weekday()].title()}s"
+        return f"{day.strftime('%A, %B')} {day.day}" + (f" ({reason})" if reason else "")
+
+    def _build(self, day: Date, bookings: List[Reservation]) -> DayOccupancy:
+        """Seat a day's bookings in time order, each at the smallest free size"""
+        window = self._window(day)
+        occupancy = DayOccupancy(self.sizes, window[2] if window else SLOTS_PER_DAY)
+        for booking in bookings:
+            try:
+                start = self._slot(booking.time)
+            except ValueError:
+                continue
+            self._seat(occupancy, booking.party_size, start, commit=True)
+        return occupancy
+
+    def _seat(self, occupancy: DayOccupancy, party_size: int, start: int, commit: bool = False) -> Optional[TableSize]:
+        for size in self.sizes_for(party_size):
+            if occupancy.fits(size, start):
+                if commit:
+                    occupancy.add(size, start)
+                return size
+        return None
+
+    def _day(self, day: Date) -> DayOccupancy:
+        """Occupancy of a day, rebuilt only after a booking was committed"""
+        key = day.isoformat()
+        version = self.store.version()
+        with self._lock:
+            cached = self._days.get(key)
+            if cached and cached[0] == version:
+                return cached[1]
+        occupancy = self._build(day, self.store.by_slot(key))
+        with self._lock:
+            self._days[key] = (version, occupancy)
+        return occupancy
+
+    @staticmethod
+    def _slot(time: str) -> int:
+        """Slot of an HH:MM time (times between slots count from the slot they fall in)"""
+        parsed = datetime.strptime(time, "%H:%M")
+        return (parsed.hour * 60 + parsed.minute) // SLOT_MINUTES
+
+    def alternatives(self, occupancy: DayOccupancy, party_size: int, start: int, first: int, last: int,
+                     limit: int = MAX_ALTERNATIVES) -> List[str]:
+        """Nearest start times that fit, closest first (earlier on ties)"""
+        if first > last:
+            return []
+        free = [False] * (last - first + 1)
+        for size in self.sizes_for(party_size):
+            free = [a or b for a, b in zip(free, occupancy.free_starts(size, first, last))]
+        found = []
+        for distance in range(max(start - first, last - start) + 1):
+            for candidate in (start - distance, start + distance) if distance else (start,):
+                if first <= candidate <= last and free[candidate - first]:
+                    found.append(slot_time(candidate))
+                    if len(found) == limit:
+                        return found
+        return found
+
+    # -- queries ------------------------------------------------------------
+
+    def check_sync(self, date: str, time: str, party_size: int, now: Optional[datetime] = None) -> Dict:
+        """
+        Whether a party fits at a date and time.
+
+        Returns:
+            {"available", "message", "alternative_times", "date", "time", "party_size"}
+        """
+        result = {"available": False, "alternative_times": [], "date": date, "time": time, "party_size": party_size}
+        try:
+            day = datetime.strptime(date, "%Y-%m-%d").date()
+            start = self._slot(time)
+        except ValueError:
+            return {**result, "message": "Please use YYYY-MM-DD for the date and HH:MM (24-hour) for the time."}
+
+        now = now or datetime.now()
+        if day < now.date():
+            return {**result, "message": "That date has passed. Please choose a future date."}
+        if day > now.date() + timedelta(days=self.max_days_ahead):
+            return {**result, "message": f"We take reservations up to {self.max_days_ahead} days ahead."}
+        if party_size < 1:
+            return {**result, "message": "Please specify at least 1 guest."}
+        if party_size >= self.large_party_minimum or not self.sizes_for(party_size):
+            return {**result, "message": f"For parties of {party_size}, please call us at {self.phone} "
+                                         f"to arrange our private dining room."}
+
+        window = self._window(day)
+        if window is None:
+            message = f"We're closed on {self._day_name(day)}."
+            reopens = self.schedule.next_open(datetime(day.year, day.month, day.day) + timedelta(days=1))
+            if reopens:
+                message += (f" The next day we're open is {reopens.strftime('%A, %B')} {reopens.day}, "
+                            f"from {format_time(reopens.hour * 60 + reopens.minute)}.")
+            return {**result, "message": message}
+        first, last, _ = window
+        if day == now.date():
+            # Today: only times still ahead
+            first = max(first, -(-(now.hour * 60 + now.minute) // SLOT_MINUTES))
+
+        occupancy = self._day(day)
+        formatted_date = day.strftime("%A, %B %d, %Y")
+        if not window[0] <= start <= window[1]:
+            message = f"On {self._day_name(day)} we seat guests from {slot_time(window[0])} to {slot_time(window[1])}."
+        elif start < first:
+            message = f"{time} has already passed today."
+        elif self._seat(occupancy, party_size, start) is None:
+            message = f"We're fully booked for {party_size} at {time} on {formatted_date}."
+        else:
+            formatted_time = datetime.strptime(time, "%H:%M").strftime("%I:%M %p")
+            return {**result, "available": True,
+                    "message": f"Table available on {formatted_date} at {formatted_time} for {party_size} guests."}
+        alternatives = self.alternatives(occupancy, party_size, start, first, last)
+        if alternatives:
+            message += f" The nearest available times are {', '.join(alternatives)}."
+        else:
+            message += " There are no tables left for that party size that day."
+        return {**result, "message": message, "alternative_times": alternatives}
+
+    def reserve_sync(self, name: str, phone: str, date: str, time: str, party_size: int,
+                     special_requests: str = "") -> Tuple[Reservation, bool]:
+        """
+        Book a table if the party still fits, in one transaction.
+
+        Raises:
+            SlotUnavailable: with the ``check_sync`` result (message, alternatives) as its argument
+        """
+        result = self.check_sync(date, time, party_size)
+        day = datetime.strptime(date, "%Y-%m-%d").date() if result["available"] else None
+
+        def admit(bookings: List[Reservation]) -> bool:
+            # Same seating rules, against the bookings committed right now
+            return self._seat(self._build(day, bookings), party_size, self._slot(time)) is not None
+
+        try:
+            if day is None:
+                # Not bookable now, but it may repeat a booking made when it was
+                reservation, created = self.store.create(name, phone, date, time, party_size, special_requests,
+                                                         admit=lambda bookings: False)
+            else:
+                reservation, created = self.store.create(name, phone, date, time, party_size, special_requests,
+                                                         admit=admit)
+        except SlotUnavailable:
+            raise SlotUnavailable(result if day is None else self.check_sync(date, time, party_size)) from None
+        return reservation, created
+
+    # -- async front end ------------------------------------------------------
+
+    async def check(self, date: str, time: str, party_size: int) -> Dict:
+        """``check_sync`` off the event loop (it may read the day from the store)"""
+        return await asyncio.to_thread(self.check_sync, date, time, party_size)
+
+    async def reserve(self, name: str, phone: str, date: str, time: str, party_size: int,
+                      special_requests: str = "") -> Tuple[Reservation, bool]:
+        """``reserve_sync`` off the event loop"""
+        return await asyncio.to_thread(self.reserve_sync, name, phone, date, time, party_size, special_requests)
+
+
+def load_availability(store: ReservationStore, business_info_path: Optional[Path] = None) -> AvailabilityEngine:
+    """Availability engine for the tables and hours in business_info.json (hours as ``.schedule``)"""
+    with open(business_info_path or DEFAULT_BUSINESS_INFO_PATH, 'r', encoding='utf-8') as f:
+        return AvailabilityEngine(json.load(f), store)
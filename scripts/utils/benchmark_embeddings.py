@@ -0,0 +1,106 @@
+"""
+Embedding Throughput Benchmark
+==============================
+Compares three ways of embedding queries from concurrent chat sessions:
+
+- inline:  model.encode(query) called directly in the async handler (old code)
+- pool:    EmbeddingService with batching disabled (thread pool only)
+- batched: EmbeddingService with micro-batching (utils/embeddings.py)
+
+Every query is unique so the cache never hides the encoder. Compare
+queries/s: the inline p50 looks low only because it excludes the time other
+sessions spend waiting for the blocked event loop.
+
+Usage:
+    python scripts/utils/benchmark_embeddings.py
+    python scripts/utils/benchmark_embeddings.py --concurrency 1 8 32 128 --queries 512
+
+    # Without sentence-transformers: a synthetic encoder that sleeps like a
+    # GIL-releasing forward pass (fixed overhead + per-item cost)
+    python scripts/utils/benchmark_embeddings.py --synthetic
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.embeddings import EMBEDDING_MODEL_NAME, EmbeddingService
+
+
+def synthetic_encoder(overhead_ms: float = 4.0, per_item_ms: float = 0.4) -> Callable[[List[str]], List[List[float]]]:
+    """Encoder with a batch cost shaped like MiniLM on CPU"""
+    def encode(texts: List[str]) -> List[List[float]]:
+        time.sleep((overhead_ms + per_item_ms * len(texts)) / 1000)
+        return [[float(len(text))] * 384 for text in texts]
+    return encode
+
+
+def model_encoder() -> Callable[[List[str]], List[List[float]]]:
+    """Real MiniLM encoder"""
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    return lambda texts: model.encode(texts).tolist()
+
+
+async def run(embed, concurrency: int, queries: int) -> tuple:
+    """Embed ``queries`` unique questions from ``concurrency`` sessions. Returns (qps, p50 ms)"""
+    latencies = []
+    counter = iter(range(queries))
+
+    async def session():
+        for i in counter:
+            start = time.perf_counter()
+            await embed(f"question {i}: do you have gluten free pasta for table {i % 17}?")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(session() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return queries / elapsed, latencies[len(latencies) // 2]
+
+
+def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Query embedding throughput benchmark")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--queries", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--wait-ms", type=float, default=5)
+    parser.add_argument("--synthetic", action="store_true", help="Use a synthetic encoder instead of MiniLM")
+    args = parser.parse_args()
+
+    encode = synthetic_encoder() if args.synthetic else model_encoder()
+    encode(["warm up"])
+
+    async def inline(query: str):
+        return encode([query])[0]
+
+    print("=" * 70)
+    print(f"Embedding benchmark ({'synthetic encoder' if args.synthetic else EMBEDDING_MODEL_NAME}), "
+          f"{args.queries} queries")
+    print("=" * 70)
+    print(f"\n{'mode':<10}{'concurrency':>12}{'queries/s':>12}{'p50 (ms)':>12}")
+
+    async def run_all():
+        for concurrency in args.concurrency:
+            pool = EmbeddingService(encode, max_batch_size=1, max_wait_ms=0)
+            batched = EmbeddingService(encode, max_batch_size=args.batch_size, max_wait_ms=args.wait_ms)
+            for mode, embed in (("inline", inline), ("pool", pool.embed), ("batched", batched.embed)):
+                qps, p50 = await run(embed, concurrency, args.queries)
+                print(f"{mode:<10}{concurrency:>12}{qps:>12.1f}{p50:>12.2f}")
+            print(f"{'':<10}{'':>12}  avg batch: {batched.stats()['avg_batch']}")
+            await pool.close()
+            await batched.close()
+
+    asyncio.run(run_all())
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
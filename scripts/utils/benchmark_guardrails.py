@@ -0,0 +1,117 @@
+"""
+Guardrail Matcher Benchmark
+===========================
+Compares the compiled guardrail pattern (utils/guardrails.py) with the old
+per-keyword substring loops, on the real term list and on synthetic lists of
+thousands of terms.
+
+Also prints the guest messages where the two disagree, which shows the
+substring false positives ("ill" in "grill") the whole-word pattern avoids.
+
+Usage:
+    python scripts/utils/benchmark_guardrails.py
+    python scripts/utils/benchmark_guardrails.py --sizes 1000 10000
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.guardrails import DEFAULT_PATH, GuardrailEngine, read_terms
+
+MESSAGES = [
+    "What time do you open on Saturday?",
+    "Do you have a table for 4 on Friday at 7pm?",
+    "Is the grilled branzino gluten free?",
+    "Can we sit in the courtyard if it's not raining?",
+    "Do you offer staff training for private events?",
+    "I'd like to complain about my order, the pasta was undercooked",
+    "I got food poisoning after eating there last night",
+    "Can I speak to someone about a refund? I was overcharged",
+    "What wine pairs well with the osso buco?",
+    "Who won the football game last night?",
+    "Is there parking near the restaurant on Main Street?",
+    "My daughter is allergic to nuts, is the pesto safe?",
+] * 20
+
+
+def naive_categories(terms: dict, message: str) -> dict:
+    """The old approach: one substring loop per category"""
+    message_lower = message.lower()
+    hits = {}
+    for category, category_terms in terms.items():
+        for term in category_terms:
+            if term in message_lower:
+                hits.setdefault(category, term)
+                break
+    return hits
+
+
+def synthetic_terms(base: dict, size: int, seed: int = 7) -> dict:
+    """The real terms plus random word-like terms, up to ``size`` in total"""
+    rng = random.Random(seed)
+    terms = {category: list(category_terms) for category, category_terms in base.items()}
+    extra = terms.setdefault("off_topic", [])
+    total = sum(len(category_terms) for category_terms in terms.values())
+    while total < size:
+        length = rng.randint(5, 10)
+        extra.append("".join(rng.choice(string.ascii_lowercase) for _ in range(length)))
+        total += 1
+    return terms
+
+
+def time_per_message(func, messages, repeat: int = 3) -> float:
+    """Best-of-``repeat`` microseconds per message"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            func(message)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6 / len(messages)
+
+
+def main():
+    """Benchmark both matchers at each term-list size"""
+    parser = argparse.ArgumentParser(description="Guardrail matcher benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000], help="Synthetic term-list sizes")
+    args = parser.parse_args()
+
+    base = read_terms(DEFAULT_PATH)
+    engine = GuardrailEngine(base)
+
+    print("=" * 70)
+    print(f"Guardrail matcher benchmark ({len(MESSAGES)} messages)")
+    print("=" * 70)
+
+    print(f"\n{'terms':>8}{'build ms':>10}{'substring µs/msg':>18}{'compiled µs/msg':>17}{'speedup':>9}")
+    for size in [None] + args.sizes:
+        terms = base if size is None else synthetic_terms(base, size)
+        # The substring loops can't do word endings: strip the wildcard
+        plain = {category: [term.rstrip("*") for term in category_terms] for category, category_terms in terms.items()}
+
+        start = time.perf_counter()
+        compiled = GuardrailEngine(terms)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        naive_us = time_per_message(lambda message: naive_categories(plain, message), MESSAGES)
+        compiled_us = time_per_message(compiled.categories, MESSAGES)
+        print(f"{sum(len(t) for t in terms.values()):>8}{build_ms:>10.1f}{naive_us:>18.1f}{compiled_us:>17.1f}{naive_us / compiled_us:>8.1f}x")
+
+    plain = {category: [term.rstrip("*") for term in category_terms] for category, category_terms in base.items()}
+    print("\nMessages the two matchers classify differently:")
+    for message in dict.fromkeys(MESSAGES):
+        old, new = naive_categories(plain, message), engine.categories(message)
+        if set(old) != set(new):
+            print(f"  {message!r}\n    substring: {old}\n    compiled:  {new}")
+
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
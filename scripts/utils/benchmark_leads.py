@@ -0,0 +1,161 @@
+"""
+Lead Store Benchmark
+====================
+Compares the old ``save_lead`` (read leads.json, append, rewrite) with the
+SQLite lead store (utils/lead_store.py) at 100k leads.
+
+- Old JSON file: cost of one signup as the list grows. Reaching 100k this
+  way means rewriting the file 100k times, so it is timed at a few sizes.
+- Lost signups: concurrent threads running the old read-modify-write
+- Lead store: 100k signups from concurrent async "sessions" through the
+  single writer, with 5% repeat emails, then a CSV export
+
+Usage:
+    python scripts/utils/benchmark_leads.py
+    python scripts/utils/benchmark_leads.py --leads 20000 --sessions 50
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.lead_store import LeadStore, LeadWriter
+
+
+def json_save_lead(path: Path, name: str, email: str):
+    """The old save_lead: read the whole file, append one lead, rewrite it"""
+    leads = json.loads(path.read_text()) if path.exists() else []
+    leads.append({"name": name, "email": email, "timestamp": datetime.now().isoformat(), "source": "chatbot"})
+    path.write_text(json.dumps(leads, indent=2))
+
+
+def fake_lead(i: int) -> dict:
+    return {"name": f"Guest {i}", "email": f"guest{i}@example.com"}
+
+
+def json_cost_at(directory: Path, size: int, samples: int = 5) -> float:
+    """Milliseconds per signup when leads.json already holds ``size`` leads"""
+    path = directory / f"leads_{size}.json"
+    path.write_text(json.dumps([{**fake_lead(i), "timestamp": datetime.now().isoformat(), "source": "chatbot"}
+                                for i in range(size)], indent=2))
+    start = time.perf_counter()
+    for i in range(samples):
+        json_save_lead(path, f"New {i}", f"new{i}@example.com")
+    return (time.perf_counter() - start) * 1000 / samples
+
+
+def json_lost_signups(directory: Path, threads: int = 8, per_thread: int = 25) -> int:
+    """Signups missing after concurrent read-modify-write"""
+    path = directory / "leads_race.json"
+    path.write_text("[]")
+
+    def signup(t: int):
+        for i in range(per_thread):
+            try:
+                json_save_lead(path, f"Guest {t}-{i}", f"guest{t}-{i}@example.com")
+            except json.JSONDecodeError:
+                pass   # read a half-written file: this signup is lost too
+
+    workers = [threading.Thread(target=signup, args=(t,)) for t in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    try:
+        saved = len(json.loads(path.read_text()))
+    except json.JSONDecodeError:
+        saved = 0
+    return threads * per_thread - saved
+
+
+async def store_signups(writer: LeadWriter, total: int, sessions: int, repeat_rate: float) -> list:
+    """``total`` signups spread over concurrent sessions; returns per-signup latencies (ms)"""
+    rng = random.Random(7)
+    latencies = []
+
+    async def session(offset: int):
+        for i in range(offset, total, sessions):
+            # Some guests sign up twice (another case, another session)
+            email = f"GUEST{rng.randrange(i)}@example.com" if i and rng.random() < repeat_rate else f"guest{i}@example.com"
+            start = time.perf_counter()
+            await writer.add(f"Guest {i}", email)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(session(offset) for offset in range(sessions)))
+    return sorted(latencies)
+
+
+def main():
+    """Run the JSON file and lead store benchmarks"""
+    parser = argparse.ArgumentParser(description="Lead store benchmark")
+    parser.add_argument("--leads", type=int, default=100_000, help="Signups for the lead store run")
+    parser.add_argument("--sessions", type=int, default=100, help="Concurrent signing-up sessions")
+    parser.add_argument("--repeat-rate", type=float, default=0.05, help="Share of signups with an existing email")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"Lead store benchmark ({args.leads:,} leads, {args.sessions} concurrent sessions)")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+
+        print("\nOld save_lead (JSON read-modify-write):")
+        sizes = [1_000, 10_000, 100_000]
+        costs = {size: json_cost_at(directory, size) for size in sizes}
+        for size, cost in costs.items():
+            print(f"  {size:>8,} leads on file: {cost:8.1f} ms per signup")
+        # Cost grows linearly with the list, so n signups take about n * cost(n) / 2
+        total_s = args.leads * costs[100_000] * (args.leads / 100_000) / 2 / 1000
+        print(f"  Estimated total for {args.leads:,} signups: {total_s / 60:,.0f} min")
+        lost = json_lost_signups(directory)
+        print(f"  Concurrent signups lost (8 threads x 25): {lost}")
+
+        print("\nLead store (SQLite WAL, single writer):")
+        store = LeadStore(directory / "leads.db")
+        writer = LeadWriter(store)
+
+        async def run():
+            try:
+                return await store_signups(writer, args.leads, args.sessions, args.repeat_rate)
+            finally:
+                await writer.close()
+
+        start = time.perf_counter()
+        latencies = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+        stats = writer.stats()
+        print(f"  {args.leads:,} signups in {elapsed:.2f} s ({args.leads / elapsed:,.0f}/s)")
+        print(f"  Per signup: p50 {latencies[len(latencies) // 2]:.2f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms")
+        print(f"  Commits: {stats['batches']:,} (avg {stats['avg_batch']} leads each)")
+        print(f"  Stored {store.count():,}, duplicates ignored {stats['duplicates']:,}")
+
+        # One more signup with the table full: cost doesn't depend on its size
+        start = time.perf_counter()
+        for i in range(100):
+            store.add(f"Late {i}", f"late{i}@example.com")
+        print(f"  One signup at {store.count():,} leads (own commit): {(time.perf_counter() - start) * 10:.2f} ms")
+
+        start = time.perf_counter()
+        out = io.StringIO()
+        exported = store.export(out, "csv")
+        print(f"  CSV export: {exported:,} leads, {len(out.getvalue()) / 1e6:.1f} MB in "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
+        store.close()
+
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
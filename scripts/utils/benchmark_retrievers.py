@@ -0,0 +1,125 @@
+"""
+Retriever Benchmark
+===================
+Compares the ChromaDB and NumPy knowledge base backends (utils/retrievers.py)
+and the BM25 keyword index (utils/lexical.py) on query latency and memory.
+
+Each backend runs in its own subprocess so resident memory (RSS) is measured
+cleanly: once before loading the backend and once after the queries.
+
+Usage:
+    python scripts/utils/setup_vectordb.py          # builds both indexes
+    python scripts/utils/benchmark_retrievers.py
+    python scripts/utils/benchmark_retrievers.py --queries 2000 --backends numpy bm25
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BASE_DIR = Path(__file__).parent.parent.parent
+CHROMA_DIR = BASE_DIR / "data" / "embeddings"
+EMBEDDING_DIM = 384
+
+# Keyword queries for the BM25 index (dense backends get random vectors)
+TEXT_QUERIES = [
+    "corkage fee", "Barolo price", "gluten free pasta", "wedding catering minimum",
+    "private dining room capacity", "parking validation", "vegan options", "happy hour"
+]
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Fallback (peak, not current): kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(backend: str, queries: int) -> dict:
+    """Load one backend and time random queries (runs in the child process)"""
+    import numpy as np
+    from utils.retrievers import load_retriever
+
+    from utils.lexical import BM25Index
+
+    if backend == "bm25":
+        inputs = [TEXT_QUERIES[i % len(TEXT_QUERIES)] for i in range(queries)]
+    else:
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((queries, EMBEDDING_DIM)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        inputs = vectors.tolist()
+
+    before = rss_mb()
+    start = time.perf_counter()
+    if backend == "bm25":
+        retriever = BM25Index.load(CHROMA_DIR / "restaurant_docs.bm25.json")
+    else:
+        retriever = load_retriever(CHROMA_DIR, backend)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    for query in inputs:
+        start = time.perf_counter()
+        retriever.search(query, n_results=3)
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    latencies.sort()
+
+    return {
+        "backend": backend,
+        "chunks": retriever.count(),
+        "load_ms": load_ms,
+        "p50_us": latencies[len(latencies) // 2],
+        "p99_us": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "rss_delta_mb": rss_mb() - before
+    }
+
+
+def main():
+    """Run every backend in a subprocess and print a comparison"""
+    parser = argparse.ArgumentParser(description="Knowledge base retriever benchmark")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy", "bm25"])
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.queries)))
+        return
+
+    print("=" * 70)
+    print(f"Retriever benchmark: {args.queries} queries, top-3")
+    print("=" * 70)
+    print(f"\n{'backend':<10}{'chunks':>8}{'load (ms)':>12}{'p50 (us)':>12}{'p99 (us)':>12}{'RSS +MB':>10}")
+
+    for backend in args.backends:
+        result = subprocess.run(
+            [sys.executable, __file__, "--child", backend, "--queries", str(args.queries)],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+            print(f"{backend:<10} unavailable: {error}")
+            continue
+        r = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{r['backend']:<10}{r['chunks']:>8}{r['load_ms']:>12.1f}{r['p50_us']:>12.1f}"
+              f"{r['p99_us']:>12.1f}{r['rss_delta_mb']:>10.1f}")
+
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Session Store Benchmark
+=======================
+Replays 30-turn conversations through each session backend the way script 06
+does (load state + history, update counters, save history) and reports the
+time per turn and the bytes written.
+
+The Redis backend runs against the in-process ``FakeRedis`` unless --redis-url
+is given.
+
+Usage:
+    python scripts/utils/benchmark_session_store.py
+    python scripts/utils/benchmark_session_store.py --sessions 200 --redis-url redis://localhost:6379/0
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.history import compact_history
+from utils.fake_redis import FakeRedis
+from utils.session_store import (
+    MemorySessionStore, RedisSessionStore, Session, SessionStore, SQLiteSessionStore, encode
+)
+
+TURNS = 30
+
+
+def scripted_turn(turn: int):
+    """Guest message, one tool call with its result, and the answer"""
+    call_id = f"call_{turn}"
+    return [
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": call_id, "type": "function",
+             "function": {"name": "check_availability", "arguments": '{"date":"2030-01-04","time":"19:00"}'}}
+        ]},
+        {"role": "tool", "tool_call_id": call_id,
+         "content": '{"available":true,"message":"Great news! We have availability for 4 guests."}'},
+        {"role": "assistant", "content": f"Answer {turn}: we would love to have you. " * 4}
+    ]
+
+
+class CountingStore(SessionStore):
+    """Wraps a store and counts the bytes each write sends"""
+
+    def __init__(self, inner: SessionStore):
+        self.inner = inner
+        self.name = inner.name
+        self.bytes_written = 0
+
+    def get_state(self, session_id):
+        return self.inner.get_state(session_id)
+
+    def set_state(self, session_id, fields):
+        self.bytes_written += sum(len(encode(value)) for value in fields.values())
+        self.inner.set_state(session_id, fields)
+
+    def get_history(self, session_id):
+        return self.inner.get_history(session_id)
+
+    def append_history(self, session_id, messages):
+        self.bytes_written += sum(len(encode(message)) for message in messages)
+        self.inner.append_history(session_id, messages)
+
+    def trim_history(self, session_id, count):
+        self.inner.trim_history(session_id, count)
+
+    def replace_history(self, session_id, messages):
+        self.bytes_written += sum(len(encode(message)) for message in messages)
+        self.inner.replace_history(session_id, messages)
+
+    def delete(self, session_id):
+        self.inner.delete(session_id)
+
+
+def run(store: SessionStore, sessions: int, rewrite: bool) -> dict:
+    """Play every conversation; ``rewrite`` stores the full history each turn (the naive approach)"""
+    counting = CountingStore(store)
+    modes = {"append": 0, "replace": 0, "unchanged": 0}
+    start = time.perf_counter()
+
+    for s in range(sessions):
+        session_id = f"bench-{s}"
+        for turn in range(TURNS):
+            session = Session(counting, session_id)
+            session.set("message_count", session.get("message_count", 0) + 1)
+            history = session.load_history()
+            history.append({"role": "user", "content": f"Question {turn}: is Friday at 7pm free for 4?"})
+            history = compact_history(history)
+            history.extend(scripted_turn(turn))
+            if rewrite:
+                session.set("history_head", history[0] if history[0]["role"] == "system" else None)
+                counting.replace_history(session_id, history[1:] if history[0]["role"] == "system" else history)
+            else:
+                modes[session.save_history(history)] += 1
+
+        # Reloading gives back exactly what was saved
+        assert Session(counting, session_id).load_history() == history
+        assert Session(counting, session_id).get("message_count") == TURNS
+
+    elapsed = time.perf_counter() - start
+    return {
+        "ms_per_turn": elapsed * 1000 / (sessions * TURNS),
+        "kb_per_turn": counting.bytes_written / 1024 / (sessions * TURNS),
+        "modes": modes
+    }
+
+
+def main():
+    """Benchmark each backend with full rewrites and with incremental saves"""
+    parser = argparse.ArgumentParser(description="Session store benchmark")
+    parser.add_argument("--sessions", type=int, default=50, help="Conversations per backend")
+    parser.add_argument("--redis-url", default=None, help="Benchmark a real Redis server instead of FakeRedis")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"Session store benchmark ({args.sessions} sessions x {TURNS} turns)")
+    print("=" * 70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": MemorySessionStore,
+            "sqlite": lambda: SQLiteSessionStore(Path(tmp) / f"sessions-{time.perf_counter_ns()}.db"),
+            "redis": (lambda: RedisSessionStore.from_url(args.redis_url, prefix=f"bench:{time.time_ns()}:"))
+            if args.redis_url else (lambda: RedisSessionStore(FakeRedis()))
+        }
+
+        print(f"\n{'backend':<10}{'save':<10}{'ms/turn':>10}{'KB written/turn':>18}  history writes")
+        for name, factory in backends.items():
+            for rewrite in (True, False):
+                result = run(factory(), args.sessions, rewrite)
+                modes = "rewrite every turn" if rewrite else ", ".join(
+                    f"{mode}={count}" for mode, count in result["modes"].items() if count
+                )
+                print(f"{name:<10}{'rewrite' if rewrite else 'append':<10}"
+                      f"{result['ms_per_turn']:>10.3f}{result['kb_per_turn']:>18.2f}  {modes}")
+
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Startup Benchmark
+=================
+Measures how long a Chainlit worker takes before it can accept connections,
+and how long the background RAG warm-up (utils/warmup.py) takes after that.
+
+Each run is a fresh subprocess (cold imports) in a scratch directory, timing:
+
+- chainlit:  ``import chainlit``
+- script:    importing the workshop script (what Chainlit does before serving)
+- warm-up:   the background initializer (MiniLM + knowledge base)
+
+"eager" is script + warm-up: the old startup, when the model loaded at import.
+
+Usage:
+    python scripts/utils/benchmark_startup.py
+    python scripts/utils/benchmark_startup.py --scripts 06_final_polished.py --runs 5
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+
+
+def measure(script: str) -> dict:
+    """Import one script and run its warm-up (runs in the child process)"""
+    start = time.perf_counter()
+    import chainlit  # noqa: F401
+    chainlit_ms = (time.perf_counter() - start) * 1000
+
+    # Same steps as chainlit's load_module
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    path = SCRIPTS_DIR / script
+    start = time.perf_counter()
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    script_ms = (time.perf_counter() - start) * 1000
+
+    warmup = getattr(module, "rag_warmup", None)
+    warmup_ms = 0.0
+    if warmup is not None:
+        start = time.perf_counter()
+        asyncio.run(warmup.wait())
+        warmup_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "script": script,
+        "chainlit_ms": chainlit_ms,
+        "script_ms": script_ms,
+        "warmup_ms": warmup_ms,
+        "state": warmup.state if warmup is not None else "n/a"
+    }
+
+
+def main():
+    """Run each script several times in fresh processes and print medians"""
+    parser = argparse.ArgumentParser(description="Worker startup benchmark")
+    parser.add_argument("--scripts", nargs="+", default=["05_rag_basic.py", "06_final_polished.py"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child)))
+        return
+
+    # Importing the scripts needs a key but never calls the API
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-benchmark")}
+
+    print("=" * 70)
+    print(f"Startup benchmark: median of {args.runs} cold runs")
+    print("=" * 70)
+    print(f"\n{'script':<24}{'chainlit':>10}{'script':>10}{'warm-up':>10}{'eager':>10}  RAG")
+
+    # Chainlit writes .chainlit/ into the working directory, so use a scratch one
+    with tempfile.TemporaryDirectory() as scratch:
+        for script in args.scripts:
+            runs = []
+            for _ in range(args.runs):
+                result = subprocess.run(
+                    [sys.executable, str(Path(__file__).resolve()), "--child", script],
+                    capture_output=True, text=True, cwd=scratch, env=env
+                )
+                if result.returncode != 0:
+                    error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+                    print(f"{script:<24} failed: {error}")
+                    break
+                runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+            if not runs:
+                continue
+
+            chainlit_ms = statistics.median(r["chainlit_ms"] for r in runs)
+            script_ms = statistics.median(r["script_ms"] for r in runs)
+            warmup_ms = statistics.median(r["warmup_ms"] for r in runs)
+            print(f"{script:<24}{chainlit_ms:>10.0f}{script_ms:>10.0f}{warmup_ms:>10.0f}"
+                  f"{script_ms + warmup_ms:>10.0f}  {runs[-1]['state']}")
+
+    print("\nTimes in ms. The worker accepts connections after chainlit + script;")
+    print("'eager' is what import used to cost when the model loaded synchronously.")
+    print("\n✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Query Embeddings
+================
+Cache and async service for the query embeddings used by ``retrieve_context``
+(05 and 06).
+
+Guests ask the same things over and over ("what are your hours", "do you have
+parking", the quick-action texts). Each repeat used to run a full MiniLM
+forward pass. With the cache, repeats are a dictionary lookup.
+
+- Keys are normalized query text (case, whitespace and trailing punctuation
+  ignored), prefixed with the model name
+- In-memory LRU with a size cap and optional TTL
+- Optional SQLite tier on disk that survives restarts
+- Hit/miss counters for monitoring
+
+``SentenceTransformer.encode`` is CPU-heavy and synchronous. Called inside an
+async handler it stalls every session on the worker. ``EmbeddingService`` runs
+it in a thread pool (PyTorch releases the GIL during the forward pass) and
+coalesces single-query requests that arrive within a few milliseconds into one
+batched ``encode([...])`` call.
+
+Configuration (environment variables):
+    EMBEDDING_CACHE_SIZE      - Max entries kept in memory (default: 1024)
+    EMBEDDING_CACHE_TTL       - Seconds before an entry expires, 0 = never (default: 0)
+    EMBEDDING_CACHE_PATH      - SQLite file for the persistent tier (default: memory only)
+    EMBEDDING_BATCH_SIZE      - Max queries per encode call (default: 32)
+    EMBEDDING_BATCH_WAIT_MS   - Max time a query waits for batch-mates (default: 5)
+    EMBEDDING_WORKERS         - Encoder threads (default: 1)
+"""
+
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+def normalize_query(text: str) -> str:
+    """Normalize query text so trivially different repeats share a cache entry"""
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.rstrip("?!. ")
+
+
+class EmbeddingCache:
+    """LRU + TTL cache of query embeddings with an optional on-disk tier"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 0,
+                 persist_path: Optional[str] = None, model_name: str = EMBEDDING_MODEL_NAME):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.model_name = model_name
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if persist_path:
+            Path(persist_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(persist_path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _key(self, query: str) -> str:
+        return f"{self.model_name}:{normalize_query(query)}"
+
+    def _expired(self, created: float) -> bool:
+        return bool(self.ttl_seconds) and time.time() - created > self.ttl_seconds
+
+    def _remember(self, key: str, vector: List[float], created: float):
+        self._entries[key] = (vector, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, query: str) -> Optional[List[float]]:
+        """Return the cached embedding for a query, or None"""
+        key = self._key(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and not self._expired(entry[1]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector, created FROM query_embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row and not self._expired(row[1]):
+                    vector = array("f", row[0]).tolist()
+                    self._remember(key, vector, row[1])
+                    self.disk_hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, vector: List[float]):
+        """Store an embedding in memory (and on disk when persistence is enabled)"""
+        key = self._key(query)
+        created = time.time()
+        with self._lock:
+            self._remember(key, vector, created)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, vector, created) VALUES (?, ?, ?)",
+                    (key, array("f", vector).tobytes(), created)
+                )
+                self._db.commit()
+
+    def get_or_compute(self, query: str, compute: Callable[[str], List[float]]) -> List[float]:
+        """
+        Return the cached embedding, computing and storing it on a miss.
+
+        ``compute`` receives the normalized query so a cached vector never
+        depends on which spelling of the question arrived first.
+        """
+        vector = self.get(query)
+        if vector is None:
+            vector = compute(normalize_query(query))
+            self.put(query, vector)
+        return vector
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for logging"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+        }
+
+
+def cache_from_env() -> EmbeddingCache:
+    """Build the query embedding cache from environment variables"""
+    return EmbeddingCache(
+        max_size=int(os.environ.get("EMBEDDING_CACHE_SIZE", "1024")),
+        ttl_seconds=float(os.environ.get("EMBEDDING_CACHE_TTL", "0")),
+        persist_path=os.environ.get("EMBEDDING_CACHE_PATH") or None
+    )
+
+
+class EmbeddingService:
+    """
+    Async, micro-batching front end for a batch encoder.
+
+    Args:
+        encode_batch: Blocking function mapping a list of texts to a list of vectors,
+            e.g. ``lambda texts: model.encode(texts).tolist()``
+        cache: Optional EmbeddingCache consulted before queueing
+        max_batch_size: Max texts per encode call
+        max_wait_ms: How long the first query of a batch waits for company
+        workers: Encoder threads; each runs one batch at a time
+    """
+
+    def __init__(self, encode_batch: Callable[[List[str]], List[List[float]]],
+                 cache: Optional[EmbeddingCache] = None, max_batch_size: int = 32,
+                 max_wait_ms: float = 5, workers: int = 1):
+        self.encode_batch = encode_batch
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embedding")
+        self._loop = None
+        self._queue = None
+        self._slots = None
+        self._batcher = None
+
+        self.batches = 0
+        self.encoded = 0
+
+    def _ensure_batcher(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queue and batcher belong to the running event loop
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.workers)
+            self._batcher = loop.create_task(self._run_batcher())
+
+    async def embed(self, query: str) -> List[float]:
+        """Embed one query without blocking the event loop"""
+        if self.cache is not None:
+            vector = self.cache.get(query)
+            if vector is not None:
+                return vector
+
+        self._ensure_batcher()
+        future = self._loop.create_future()
+        self._queue.put_nowait((normalize_query(query), future))
+        vector = await future
+
+        if self.cache is not None:
+            self.cache.put(query, vector)
+        return vector
+
+    async def _run_batcher(self):
+        """Collect queued queries into batches and hand them to the encoder threads"""
+        while True:
+            # Wait for a free encoder first: queries that arrive meanwhile join the next batch
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            self._loop.create_task(self._encode(batch))
+
+    async def _encode(self, batch: List[tuple]):
+        """Encode one batch in the thread pool and resolve its futures"""
+        try:
+            # Identical questions in the same batch are encoded once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            vectors = await self._loop.run_in_executor(self._executor, self.encode_batch, texts)
+            by_text = dict(zip(texts, vectors))
+            self.batches += 1
+            self.encoded += len(texts)
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(by_text[text])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        """Stop the batcher task and the encoder threads"""
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+            self._loop = None
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict:
+        """Batching counters for logging"""
+        return {
+            "batches": self.batches,
+            "encoded": self.encoded,
+            "avg_batch": round(self.encoded / self.batches, 2) if self.batches else 0.0
+        }
+
+
+def service_from_env(encode_batch: Callable[[List[str]], List[List[float]]],
+                     cache: Optional[EmbeddingCache] = None) -> EmbeddingService:
+    """Build the embedding service from environment variables"""
+    return EmbeddingService(
+        encode_batch,
+        cache=cache,
+        max_batch_size=int(os.environ.get("EMBEDDING_BATCH_SIZE", "32")),
+        max_wait_ms=float(os.environ.get("EMBEDDING_BATCH_WAIT_MS", "5")),
+        workers=int(os.environ.get("EMBEDDING_WORKERS", "1"))
+    )
@@ -0,0 +1,191 @@
+"""
+Intent Router Evaluation
+========================
+Accuracy and latency of the intent router (utils/intents.py) on the workshop
+test queries (utils/test_queries.py) plus held-out phrasings that are not in
+data/intents.json.
+
+A template answer to a question that needed the LLM is worse than no template
+answer, so the numbers that matter are:
+
+- precision: of the messages answered from a template, how many got the right one
+- coverage:  of the messages a template could answer, how many were answered
+
+Both are printed for a range of thresholds, to pick INTENT_THRESHOLD.
+
+Usage:
+    python scripts/utils/eval_intents.py
+    python scripts/utils/eval_intents.py --encoder minilm   # needs sentence-transformers
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.intents import FALLBACK_INTENT, EmbeddingEncoder, IntentRouter, NgramEncoder, load_intents
+from utils.test_queries import TEST_CASES
+
+# Expected intent of each workshop test query; anything else should reach the LLM
+TEST_QUERY_INTENTS = {
+    "What are your hours?": "hours",
+    "Where are you located?": "location",
+    "What time do you open?": "hours",
+    "Do you have parking?": "parking",
+    "Do you cater weddings?": "catering",
+    "Tell me about your catering options": "catering",
+    "Make a reservation": "reservation",
+    "Show me the menu": "menu",
+}
+
+# Phrasings that are not examples in data/intents.json
+HELD_OUT = [
+    ("what time do u close tonight", "hours"),
+    ("when does sunday brunch end?", "hours"),
+    ("opening times?", "hours"),
+    ("what's the address", "location"),
+    ("where exactly is bella's", "location"),
+    ("how do i find the restaurant", "location"),
+    ("is there somewhere to park", "parking"),
+    ("parking validation?", "parking"),
+    ("where should I park my car", "parking"),
+    ("can i see your menu", "menu"),
+    ("what dishes do you serve", "menu"),
+    ("do you do catering for big events", "catering"),
+    ("can you cater a birthday party", "catering"),
+    ("i want to make a reservation", "reservation"),
+    ("can i reserve a table please", "reservation"),
+    ("what is your phone number", "contact"),
+    ("how do i contact the restaurant", "contact"),
+    ("whats the dress code", "dress_code"),
+    ("do you take amex?", "payment_methods"),
+    ("do you accept apple pay", "payment_methods"),
+    ("is it wheelchair accessible", "accessibility"),
+    ("can i buy gift cards online", "gift_cards"),
+    # Must reach the LLM
+    # Hours on a specific day may be special hours (hours skip_if), not the weekly template
+    ("are you open on thanksgiving", FALLBACK_INTENT),
+    ("what are your hours on december 24", FALLBACK_INTENT),
+    ("are you open christmas eve?", FALLBACK_INTENT),
+    ("what time do you close on new year's eve", FALLBACK_INTENT),
+    ("are you guys open on tuesday", FALLBACK_INTENT),
+    ("What are the hours on Friday?", FALLBACK_INTENT),
+    ("are you open this saturday", FALLBACK_INTENT),
+    ("open tomorrow?", FALLBACK_INTENT),
+    ("do you have gluten free pasta?", FALLBACK_INTENT),
+    ("what's the most popular pizza", FALLBACK_INTENT),
+    ("table for 2 tomorrow at 8?", FALLBACK_INTENT),
+    ("is there a table for six on saturday night", FALLBACK_INTENT),
+    ("book me for friday at 7, party of 3", FALLBACK_INTENT),
+    ("reservation for 4 at 6pm on sunday please", FALLBACK_INTENT),
+    ("what are the catering prices per person", FALLBACK_INTENT),
+    ("how far ahead should i book catering for 80 people", FALLBACK_INTENT),
+    ("do you have vegetarian appetizers", FALLBACK_INTENT),
+    ("which red wine goes with steak", FALLBACK_INTENT),
+    ("how much is the tiramisu", FALLBACK_INTENT),
+    ("my phone is 555-0199", FALLBACK_INTENT),
+    ("Jane Doe", FALLBACK_INTENT),
+    ("thank you so much!", FALLBACK_INTENT),
+    ("can i bring a birthday cake", FALLBACK_INTENT),
+    ("is the restaurant good for a first date", FALLBACK_INTENT),
+    ("what's your corkage fee", FALLBACK_INTENT),
+    ("do you have a happy hour", FALLBACK_INTENT),
+]
+
+THRESHOLDS = [0.3, 0.4, 0.45, 0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85]
+
+
+def labelled_queries():
+    """(query, expected intent) from the test queries and the held-out set"""
+    queries = []
+    for test_case in TEST_CASES:
+        for query in test_case["test_queries"]:
+            if len(query) > 500:   # stopped by the length guardrail first
+                continue
+            queries.append((query, TEST_QUERY_INTENTS.get(query, FALLBACK_INTENT)))
+    return list(dict.fromkeys(queries)) + HELD_OUT
+
+
+def make_encoder(name: str):
+    if name == "minilm":
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer('all-MiniLM-L6-v2')
+        return EmbeddingEncoder(lambda texts: model.encode(texts).tolist())
+    return NgramEncoder()
+
+
+def score(router, matches, queries, threshold: float):
+    """(precision, coverage, false answers) at one threshold"""
+    answered = correct = answerable = covered = 0
+    for match, (query, intent) in zip(matches, queries):
+        skipped = match.intent in router.skip and router.skip[match.intent].search(query)
+        confident = (match.intent != FALLBACK_INTENT and match.score >= threshold
+                     and match.margin >= router.margin and not skipped)
+        if intent != FALLBACK_INTENT:
+            answerable += 1
+        if confident:
+            answered += 1
+            if match.intent == intent:
+                correct += 1
+                covered += 1
+    precision = correct / answered if answered else 1.0
+    coverage = covered / answerable if answerable else 0.0
+    return precision, coverage, answered - correct
+
+
+def main():
+    """Route every labelled query and report accuracy, the threshold sweep and latency"""
+    parser = argparse.ArgumentParser(description="Intent router evaluation")
+    parser.add_argument("--encoder", choices=["ngram", "minilm"], default="ngram")
+    parser.add_argument("--verbose", action="store_true", help="Print every query")
+    args = parser.parse_args()
+
+    intents = load_intents()
+    encoder = make_encoder(args.encoder)
+
+    start = time.perf_counter()
+    router = IntentRouter(intents, encoder)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    queries = labelled_queries()
+    # Warm up once so the first query doesn't carry one-off costs
+    router.route(queries[0][0])
+    matches = [router.route(query) for query, _ in queries]
+    expected = [intent for _, intent in queries]
+
+    print("=" * 70)
+    print(f"Intent router evaluation ({args.encoder}, {len(queries)} queries, "
+          f"{sum(len(i['examples']) for i in intents.values())} examples)")
+    print("=" * 70)
+
+    top1 = sum(match.intent == intent for match, intent in zip(matches, expected)) / len(queries)
+    precision, coverage, wrong = score(router, matches, queries, router.threshold)
+    print(f"\nNearest-intent accuracy: {top1:.0%}")
+    print(f"At threshold {router.threshold} (margin {router.margin}): "
+          f"precision {precision:.0%}, coverage {coverage:.0%}, wrong template answers {wrong}")
+
+    print(f"\n{'threshold':>10}{'precision':>11}{'coverage':>10}{'wrong':>7}")
+    for threshold in THRESHOLDS:
+        precision, coverage, wrong = score(router, matches, queries, threshold)
+        print(f"{threshold:>10.2f}{precision:>11.0%}{coverage:>10.0%}{wrong:>7}")
+
+    latencies = sorted(match.elapsed_ms for match in matches)
+    print(f"\nBuild: {build_ms:.1f} ms | route p50 {statistics.median(latencies):.3f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.3f} ms")
+
+    print("\nMistakes at the configured threshold:")
+    for (query, intent), match in zip(queries, matches):
+        mistake = (match.confident and match.intent != intent) or (not match.confident and intent != FALLBACK_INTENT)
+        if mistake or args.verbose:
+            outcome = match.intent if match.confident else f"LLM ({match.intent})"
+            print(f"  {'✗' if mistake else ' '} {query[:45]!r:<48} expected {intent:<16} got {outcome:<22} "
+                  f"score {match.score:.2f} margin {match.margin:.2f}")
+
+    print("\n✅ Evaluation complete")
+
+
+if __name__ == "__main__":
+    main()
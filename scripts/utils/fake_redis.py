@@ -0,0 +1,60 @@
+"""
+Fake Redis
+==========
+In-process stand-in for the few Redis commands ``RedisSessionStore``
+(utils/session_store.py) uses, so the Redis backend can be benchmarked and
+tried out without a server. Not for production use.
+
+Usage:
+    store = RedisSessionStore(FakeRedis())
+"""
+
+from typing import Any, Dict, List
+
+
+class FakeRedis:
+    """In-process stand-in for the few Redis commands ``RedisSessionStore`` uses"""
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self.ttls: Dict[str, int] = {}
+
+    @staticmethod
+    def _bytes(value: Any) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode("utf-8")
+
+    def hset(self, name: str, mapping: Dict) -> int:
+        entry = self._data.setdefault(name, {})
+        added = sum(1 for key in mapping if self._bytes(key) not in entry)
+        entry.update((self._bytes(key), self._bytes(value)) for key, value in mapping.items())
+        return added
+
+    def hgetall(self, name: str) -> Dict[bytes, bytes]:
+        return dict(self._data.get(name, {}))
+
+    def rpush(self, name: str, *values) -> int:
+        entry = self._data.setdefault(name, [])
+        entry.extend(self._bytes(value) for value in values)
+        return len(entry)
+
+    def lrange(self, name: str, start: int, end: int) -> List[bytes]:
+        entry = self._data.get(name, [])
+        return entry[start:] if end == -1 else entry[start:end + 1]
+
+    def ltrim(self, name: str, start: int, end: int) -> bool:
+        if name in self._data:
+            self._data[name] = self.lrange(name, start, end)
+        return True
+
+    def expire(self, name: str, seconds: int) -> bool:
+        if name not in self._data:
+            return False
+        self.ttls[name] = seconds
+        return True
+
+    def delete(self, *names) -> int:
+        removed = 0
+        for name in names:
+            removed += self._data.pop(name, None) is not None
+            self.ttls.pop(name, None)
+        return removed
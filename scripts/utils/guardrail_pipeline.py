@@ -0,0 +1,344 @@
+"""
+Guardrail Pipeline
+==================
+Input checks and escalation as one ordered list of stages, shared by the
+scripts that take guest input (03a, 03b, 04a, 04b, 06).
+
+Each stage either passes or returns a ``Verdict`` (reject or escalate, with
+the reply to send). Stages run cheapest first and the first verdict stops
+the pipeline, so an empty message never reaches the term scan and a rejected
+message never reaches the LLM:
+
+    length -> repeat -> spam -> off_topic -> inappropriate -> escalation -> llm_classifier
+
+The term stages share one scan of the message (see utils/guardrails.py).
+Async stages (the optional LLM classifier) start only after every local stage
+has passed. They run concurrently with whatever the caller passes as
+``alongside``, typically retrieval, instead of adding their latency before
+it. When an async stage blocks the message, the ``alongside`` work is
+cancelled and its result discarded.
+
+Every run records per-stage latency; the pipeline keeps counters (calls,
+blocks, average and max ms) for logs.
+
+The stage order, limits, replies and terms come from ``data/guardrails.json``.
+
+Usage:
+    GUARDRAIL_PIPELINE = load_pipeline()
+    result, retrieval = await GUARDRAIL_PIPELINE.run(message.content, last_message,
+                                                     alongside=lambda: retrieve_context(message.content))
+    if not result.allowed:
+        await cl.Message(content=result.verdict.reply).send()
+        return
+
+Configuration (environment variables):
+    GUARDRAILS_PATH  - Pipeline config and terms (default: data/guardrails.json)
+    GUARDRAIL_LLM    - "1" to enable the LLM classifier stage (default: from the config file)
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.guardrails import DEFAULT_PATH, GuardrailEngine
+
+# Escalation categories in the terms file, most urgent first
+ESCALATION_CATEGORIES = ["health_emergency", "legal_issue", "financial_dispute", "management_request", "complaint"]
+
+
+@dataclass
+class Verdict:
+    """Why a stage stopped the message"""
+    action: str         # reject | escalate
+    category: str
+    reply: str
+    term: str = ""
+
+
+@dataclass
+class GuardrailResult:
+    """Outcome of one pipeline run"""
+    verdict: Optional[Verdict] = None
+    stage: Optional[str] = None
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def allowed(self) -> bool:
+        return self.verdict is None
+
+    def log_data(self) -> Dict:
+        return {
+            "allowed": self.allowed,
+            "stage": self.stage,
+            "action": self.verdict.action if self.verdict else None,
+            "category": self.verdict.category if self.verdict else None,
+            "term": self.verdict.term if self.verdict else None,
+            "timings_ms": {name: round(ms, 3) for name, ms in self.timings_ms.items()}
+        }
+
+
+class GuardrailInput:
+    """The message being checked, with the term scan shared by all term stages"""
+
+    def __init__(self, message: str, last_message: str, engine: GuardrailEngine):
+        self.message = message
+        self.last_message = last_message
+        self._engine = engine
+        self._hits: Optional[Dict[str, str]] = None
+
+    @property
+    def hits(self) -> Dict[str, str]:
+        """Term category -> first matching term (scanned on first use)"""
+        if self._hits is None:
+            self._hits = self._engine.categories(self.message)
+        return self._hits
+
+
+class Stage:
+    """One check. Local stages implement ``check``; async stages implement ``check_async``."""
+    name = "stage"
+    is_async = False
+
+    def __init__(self, replies: Dict[str, str]):
+        self.replies = replies
+
+    def verdict(self, action: str, category: str, term: str = "", reply: Optional[str] = None) -> Verdict:
+        return Verdict(action, category, self.replies[reply or category].format(term=term), term)
+
+    def check(self, guest: GuardrailInput) -> Optional[Verdict]:
+        raise NotImplementedError
+
+    async def check_async(self, guest: GuardrailInput) -> Optional[Verdict]:
+        raise NotImplementedError
+
+
+class LengthStage(Stage):
+    name = "length"
+
+    def __init__(self, replies: Dict[str, str], max_length: int = 500):
+        super().__init__(replies)
+        self.max_length = max_length
+
+    def check(self, guest: GuardrailInput) -> Optional[Verdict]:
+        if not guest.message.strip():
+            return self.verdict("reject", "empty")
+        if len(guest.message) > self.max_length:
+            return self.verdict("reject", "too_long")
+        return None
+
+
+class RepeatStage(Stage):
+    """The same message sent twice in a row"""
+    name = "repeat"
+
+    def check(self, guest: GuardrailInput) -> Optional[Verdict]:
+        if guest.message == guest.last_message and len(guest.message) > 5:
+            return self.verdict("reject", "repeat")
+        return None
+
+
+class SpamStage(Stage):
+    """The same one or two characters repeated"""
+    name = "spam"
+
+    def check(self, guest: GuardrailInput) -> Optional[Verdict]:
+        if len(guest.message) > 10 and len(set(guest.message.replace(" ", ""))) <= 2:
+            return self.verdict("reject", "spam")
+        return None
+
+
+class TermStage(Stage):
+    """Rejects messages containing a term of one category"""
+
+    def __init__(self, replies: Dict[str, str], category: str):
+        super().__init__(replies)
+        self.name = self.category = category
+
+    def check(self, guest: GuardrailInput) -> Optional[Verdict]:
+        term = guest.hits.get(self.category)
+        return self.verdict("reject", self.category, term) if term else None
+
+
+class EscalationStage(Stage):
+    """Hands serious issues to staff; the most urgent category wins"""
+    name = "escalation"
+
+    def check(self, guest: GuardrailInput) -> Optional[Verdict]:
+        for category in ESCALATION_CATEGORIES:
+            if category in guest.hits:
+                return self.verdict("escalate", category, guest.hits[category])
+        return None
+
+
+class LLMClassifierStage(Stage):
+    """
+    Asks the model to label the message; catches what the term lists miss.
+
+    Fails open: a timeout or API error lets the message through.
+    """
+    name = "llm_classifier"
+    is_async = True
+
+    PROMPT = (
+        "You screen messages sent to a restaurant's customer support assistant. "
+        "Reply with exactly one label:\n"
+        "ok - anything about the restaurant, food, reservations, events or small talk\n"
+        "off_topic - unrelated to the restaurant\n"
+        "inappropriate - abusive, hateful or harmful\n"
+        "complaint - a complaint, health or safety issue, or a request for a manager"
+    )
+    LABELS = {"off_topic": "reject", "inappropriate": "reject", "complaint": "escalate"}
+
+    def __init__(self, replies: Dict[str, str], timeout: float = 3):
+        super().__init__(replies)
+        self.timeout = timeout
+        self.errors = 0
+
+    async def check_async(self, guest: GuardrailInput) -> Optional[Verdict]:
+        from utils.llm import client, MODEL
+        try:
+            response = await asyncio.wait_for(client.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "system", "content": self.PROMPT}, {"role": "user", "content": guest.message}],
+                max_tokens=4,
+                temperature=0
+            ), timeout=self.timeout)
+        except Exception as e:
+            self.errors += 1
+            print(f"[GUARDRAIL] llm_classifier skipped: {type(e).__name__}: {e}")
+            return None
+
+        label = (response.choices[0].message.content or "").strip().lower().strip(".")
+        action = self.LABELS.get(label)
+        if not action:
+            return None
+        # No matched term to quote in the off-topic reply
+        return self.verdict(action, label, reply="off_topic_general" if label == "off_topic" else None)
+
+
+class GuardrailPipeline:
+    """Stages in order, with short-circuiting and latency counters"""
+
+    def __init__(self, stages: List[Stage], engine: GuardrailEngine):
+        self.stages = stages
+        self.engine = engine
+        self._stats = {stage.name: {"calls": 0, "blocked": 0, "total_ms": 0.0, "max_ms": 0.0} for stage in stages}
+
+    def _record(self, result: GuardrailResult, stage: Stage, elapsed_ms: float, verdict: Optional[Verdict]):
+        result.timings_ms[stage.name] = elapsed_ms
+        counters = self._stats[stage.name]
+        counters["calls"] += 1
+        counters["total_ms"] += elapsed_ms
+        counters["max_ms"] = max(counters["max_ms"], elapsed_ms)
+        if verdict:
+            counters["blocked"] += 1
+            result.verdict, result.stage = verdict, stage.name
+
+    def _run_local(self, guest: GuardrailInput, result: GuardrailResult) -> bool:
+        """Local stages, cheapest first. False as soon as one blocks the message."""
+        for stage in self.stages:
+            if stage.is_async:
+                continue
+            start = time.perf_counter()
+            verdict = stage.check(guest)
+            self._record(result, stage, (time.perf_counter() - start) * 1000, verdict)
+            if verdict:
+                return False
+        return True
+
+    async def _timed(self, stage: Stage, guest: GuardrailInput) -> Tuple[Stage, float, Optional[Verdict]]:
+        start = time.perf_counter()
+        verdict = await stage.check_async(guest)
+        return stage, (time.perf_counter() - start) * 1000, verdict
+
+    async def run(self, message: str, last_message: str = "",
+                  alongside: Optional[Callable[[], Awaitable[Any]]] = None) -> Tuple[GuardrailResult, Any]:
+        """
+        Check a message, running ``alongside()`` concurrently with the async stages.
+
+        Returns:
+            (result, alongside result). The alongside result is None when the
+            message was blocked.
+        """
+        guest = GuardrailInput(message, last_message, self.engine)
+        result = GuardrailResult()
+        if not self._run_local(guest, result):
+            return result, None
+
+        # Async stages race each other and the caller's work
+        pending = {asyncio.ensure_future(self._timed(stage, guest)) for stage in self.stages if stage.is_async}
+        side = asyncio.ensure_future(alongside()) if alongside else None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    stage, elapsed_ms, verdict = task.result()
+                    self._record(result, stage, elapsed_ms, verdict)
+                    if verdict:
+                        return result, None
+            return result, (await side if side else None)
+        finally:
+            for task in list(pending) + ([side] if side and not result.allowed else []):
+                task.cancel()
+
+    def check(self, message: str, last_message: str = "") -> GuardrailResult:
+        """Run only the local stages (for code that isn't async)"""
+        result = GuardrailResult()
+        self._run_local(GuardrailInput(message, last_message, self.engine), result)
+        return result
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-stage counters for logs"""
+        return {
+            name: {
+                "calls": counters["calls"],
+                "blocked": counters["blocked"],
+                "avg_ms": round(counters["total_ms"] / counters["calls"], 3) if counters["calls"] else 0.0,
+                "max_ms": round(counters["max_ms"], 3)
+            }
+            for name, counters in self._stats.items()
+        }
+
+
+def load_pipeline(path: Optional[Path] = None, without: Tuple[str, ...] = ()) -> GuardrailPipeline:
+    """
+    Build the pipeline from the config file.
+
+    Args:
+        path: Config file (default: GUARDRAILS_PATH or data/guardrails.json)
+        without: Stage names to leave out (e.g. 03a runs no escalation)
+    """
+    path = Path(path or os.environ.get("GUARDRAILS_PATH") or DEFAULT_PATH)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    config = data["pipeline"]
+    replies = config["replies"]
+    engine = GuardrailEngine(data["terms"])
+
+    llm_config = config.get("llm_classifier", {})
+    llm_enabled = os.environ.get("GUARDRAIL_LLM", "1" if llm_config.get("enabled") else "0") == "1"
+
+    stages: List[Stage] = []
+    for name in config["stages"]:
+        if name in without:
+            continue
+        if name == "length":
+            stages.append(LengthStage(replies, max_length=config.get("max_length", 500)))
+        elif name == "repeat":
+            stages.append(RepeatStage(replies))
+        elif name == "spam":
+            stages.append(SpamStage(replies))
+        elif name == "escalation":
+            stages.append(EscalationStage(replies))
+        elif name == "llm_classifier":
+            if llm_enabled:
+                stages.append(LLMClassifierStage(replies, timeout=llm_config.get("timeout", 3)))
+        elif name in data["terms"]:
+            stages.append(TermStage(replies, name))
+        else:
+            raise ValueError(f"Unknown guardrail stage '{name}' in {path}")
+    return GuardrailPipeline(stages, engine)
@@ -0,0 +1,150 @@
+"""
+Guardrail Matcher
+=================
+Finds off-topic, inappropriate and escalation terms in a guest message with
+one compiled regular expression.
+
+The guardrail scripts used to loop over each keyword list with
+``keyword in message_lower``. That made several passes per message, and it
+matched inside words: "ill" in "grill", "rain" in "training", "court" in
+"courtyard". Here every term from every category is merged into a single
+pattern, built once at import:
+
+- whole words only, case-insensitive (the message is lowercased once; a
+  case-sensitive pattern runs about twice as fast as ``re.IGNORECASE``)
+- terms are arranged as a prefix trie (``(?:gr(?:ill|appa)|...)``), so the
+  regex engine branches on the next character instead of retrying every
+  term at every position, even with thousands of terms
+- each match is mapped back to its term and categories with a dict lookup
+
+Terms live in the "terms" section of ``data/guardrails.json`` (category ->
+list of terms). A space in a term matches any whitespace; a trailing ``*``
+matches any word ending.
+
+Usage:
+    GUARDRAILS = load_guardrails()
+    hits = GUARDRAILS.categories("I want to complain, can I speak to the manager")
+    # {"complaint": "complain", "management_request": "speak to the manager"}
+
+Configuration (environment variables):
+    GUARDRAILS_PATH  - Terms file (default: data/guardrails.json)
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "guardrails.json"
+
+_WILDCARD = "*"
+_SPACE = " "
+
+
+class GuardrailMatch(NamedTuple):
+    """One matched term"""
+    term: str
+    categories: tuple
+
+
+def _normalize(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Regex alternation of ``terms`` with shared prefixes factored out"""
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        optional = "" in node
+        branches = []
+        for char in sorted(key for key in node if key):
+            if char == _WILDCARD:
+                piece = r"\w*"
+            elif char == _SPACE:
+                piece = r"\s+"
+            else:
+                piece = re.escape(char)
+            branches.append(piece + build(node[char]))
+        if not branches:
+            return ""
+        if len(branches) == 1:
+            return f"(?:{branches[0]})?" if optional else branches[0]
+        if all(len(branch) == 1 for branch in branches):
+            body = "[" + "".join(branches) + "]"
+        else:
+            body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if optional else body
+
+    return build(trie)
+
+
+def read_terms(path: Path) -> Dict[str, List[str]]:
+    """Category -> terms from the "terms" section of a JSON file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data["terms"]
+
+
+class GuardrailEngine:
+    """All guardrail terms compiled into one whole-word pattern"""
+
+    def __init__(self, terms: Dict[str, List[str]]):
+        self.exact: Dict[str, List[str]] = {}
+        self.prefixes: Dict[str, List[str]] = {}
+        for category, category_terms in terms.items():
+            for term in category_terms:
+                term = _normalize(term)
+                if not term or term == _WILDCARD:
+                    continue
+                if term.endswith(_WILDCARD):
+                    self.prefixes.setdefault(term[:-1], []).append(category)
+                else:
+                    self.exact.setdefault(term, []).append(category)
+
+        patterns = list(self.exact) + [prefix + _WILDCARD for prefix in self.prefixes]
+        body = _trie_pattern(patterns) if patterns else r"(?!)"
+        self.pattern = re.compile(rf"(?<!\w){body}(?!\w)")
+        self._longest_prefix = max((len(prefix) for prefix in self.prefixes), default=0)
+
+    @classmethod
+    def load(cls, path: Path) -> "GuardrailEngine":
+        """Build the engine from a JSON terms file"""
+        return cls(read_terms(path))
+
+    def __len__(self) -> int:
+        return len(self.exact) + len(self.prefixes)
+
+    def _lookup(self, text: str) -> tuple:
+        """Term and categories for a matched span"""
+        text = _normalize(text)
+        if text in self.exact:
+            return text, tuple(self.exact[text])
+        for size in range(min(len(text), self._longest_prefix), 0, -1):
+            categories = self.prefixes.get(text[:size])
+            if categories:
+                return text[:size], tuple(categories)
+        return text, ()
+
+    def scan(self, text: str) -> List[GuardrailMatch]:
+        """Every matched term, in message order (one pass over the text)"""
+        return [GuardrailMatch(*self._lookup(found)) for found in self.pattern.findall(text.lower())]
+
+    def categories(self, text: str, matches: Optional[List[GuardrailMatch]] = None) -> Dict[str, str]:
+        """Category -> first term of that category found in the text"""
+        hits: Dict[str, str] = {}
+        for match in self.scan(text) if matches is None else matches:
+            for category in match.categories:
+                hits.setdefault(category, match.term)
+        return hits
+
+
+def load_guardrails(path: Optional[Path] = None) -> GuardrailEngine:
+    """The guardrail engine for the configured terms file"""
+    return GuardrailEngine.load(Path(path or os.environ.get("GUARDRAILS_PATH") or DEFAULT_PATH))
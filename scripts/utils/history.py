@@ -0,0 +1,189 @@
+"""
+Conversation History Budget
+===========================
+Keeps ``message_history`` within a token budget.
+
+Every turn resends the whole history. Without a cap, long sessions get slower
+and more expensive each turn and eventually overflow the context window.
+``compact_history`` keeps the most recent turns verbatim. Older turns,
+including their bulky tool-result JSON, are folded into a short rolling
+summary, stored as the first message of the history.
+
+Tokens are counted locally with a heuristic that approximates OpenAI's BPE
+tokenizers closely enough for budgeting, with no network or model download.
+The summary is extractive: guest requests, tool calls with their key result
+fields, and the first sentence of each answer. It costs no extra LLM call.
+
+Usage:
+    message_history.append({"role": "user", "content": message.content})
+    message_history = compact_history(message_history)
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}] + message_history
+
+Configuration (environment variables):
+    HISTORY_MAX_TOKENS      - Budget for summary + verbatim turns (default: 3000)
+    HISTORY_MAX_TURNS       - Most guest turns kept verbatim (default: 10)
+    HISTORY_SUMMARY_TOKENS  - Cap on the rolling summary (default: 400)
+"""
+
+import json
+import math
+import os
+import re
+from typing import Dict, List
+
+MAX_TOKENS = int(os.environ.get("HISTORY_MAX_TOKENS", "3000"))
+MAX_TURNS = int(os.environ.get("HISTORY_MAX_TURNS", "10"))
+SUMMARY_TOKENS = int(os.environ.get("HISTORY_SUMMARY_TOKENS", "400"))
+
+SUMMARY_HEADER = "Summary of the earlier conversation (older turns were condensed):"
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD = 4
+
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def count_tokens(text: str) -> int:
+    """Approximate BPE token count: letters ~4 chars/token, digits ~3, symbols 1"""
+    total = 0
+    for piece in _PIECES.findall(text or ""):
+        if piece[0].isalpha():
+            total += math.ceil(len(piece) / 4)
+        elif piece[0].isdigit():
+            total += math.ceil(len(piece) / 3)
+        else:
+            total += 1
+    return total
+
+
+def message_tokens(message: Dict) -> int:
+    """Tokens one chat message costs, including tool-call arguments"""
+    total = MESSAGE_OVERHEAD + count_tokens(message.get("content") or "")
+    for tool_call in message.get("tool_calls") or []:
+        total += count_tokens(tool_call["function"]["name"]) + count_tokens(tool_call["function"]["arguments"])
+    return total
+
+
+def history_tokens(messages: List[Dict]) -> int:
+    return sum(message_tokens(message) for message in messages)
+
+
+def is_summary(message: Dict) -> bool:
+    return message.get("role") == "system" and (message.get("content") or "").startswith(SUMMARY_HEADER)
+
+
+def split_turns(messages: List[Dict]) -> List[List[Dict]]:
+    """Group messages into turns, each starting at a guest message.
+
+    A tool result always stays in the same turn as the assistant message that
+    requested it, so dropping whole turns never orphans a tool message.
+    """
+    turns: List[List[Dict]] = []
+    for message in messages:
+        if message.get("role") == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def _first_sentence(text: str, limit: int = 160) -> str:
+    text = " ".join((text or "").split())
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    return _clip(match.group(1) if match else text, limit)
+
+
+def _result_facts(content: str, limit: int = 120) -> str:
+    """Top-level scalar fields of a tool result, e.g. "available=True, confirmation_number=BELLA-123" """
+    try:
+        data = json.loads(content)
+    except (TypeError, json.JSONDecodeError):
+        return _clip(content, limit)
+    if not isinstance(data, dict):
+        return _clip(json.dumps(data), limit)
+    facts = [f"{key}={value}" for key, value in data.items() if isinstance(value, (str, int, float, bool))]
+    return _clip(", ".join(facts) or f"{len(data)} fields", limit)
+
+
+def summarize_turn(turn: List[Dict]) -> List[str]:
+    """Summary lines for one turn"""
+    lines = []
+    results = {m.get("tool_call_id"): m.get("content", "") for m in turn if m.get("role") == "tool"}
+    for message in turn:
+        role = message.get("role")
+        if role == "user":
+            lines.append(f"- Guest: {_clip(message.get('content'), 160)}")
+        elif role == "assistant":
+            for tool_call in message.get("tool_calls") or []:
+                name = tool_call["function"]["name"]
+                arguments = _clip(tool_call["function"]["arguments"], 100)
+                lines.append(f"- Tool {name}({arguments}) -> {_result_facts(results.get(tool_call['id'], ''))}")
+            if message.get("content") and not message.get("tool_calls"):
+                lines.append(f"- Assistant: {_first_sentence(message['content'])}")
+    return lines
+
+
+def _summary_lines(message: Dict) -> List[str]:
+    return [line for line in message["content"].splitlines()[1:] if line.strip()]
+
+
+def _summary_message(lines: List[str], max_tokens: int) -> Dict:
+    # Keep the newest lines that fit the summary cap
+    kept: List[str] = []
+    used = count_tokens(SUMMARY_HEADER) + MESSAGE_OVERHEAD
+    for line in reversed(lines):
+        cost = count_tokens(line)
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return {"role": "system", "content": "\n".join([SUMMARY_HEADER] + list(reversed(kept)))}
+
+
+def compact_history(messages: List[Dict], max_tokens: int = MAX_TOKENS, max_turns: int = MAX_TURNS,
+                    summary_tokens: int = SUMMARY_TOKENS) -> List[Dict]:
+    """
+    Fit the history into ``max_tokens``.
+
+    Oldest turns are folded into the summary until the rest fits and at most
+    ``max_turns`` guest turns remain verbatim. The latest turn is always kept.
+
+    Returns:
+        A new list: [summary message (if any)] + recent turns
+    """
+    summary_lines: List[str] = []
+    if messages and is_summary(messages[0]):
+        summary_lines = _summary_lines(messages[0])
+        messages = messages[1:]
+
+    turns = split_turns(messages)
+    folded = 0
+
+    def fits() -> bool:
+        summary_cost = count_tokens("\n".join([SUMMARY_HEADER] + summary_lines)) if summary_lines else 0
+        recent_cost = sum(history_tokens(turn) for turn in turns)
+        return len(turns) <= max_turns and min(summary_cost, summary_tokens) + recent_cost <= max_tokens
+
+    while len(turns) > 1 and not fits():
+        summary_lines.extend(summarize_turn(turns.pop(0)))
+        folded += 1
+
+    if not folded and not summary_lines:
+        return list(messages)
+
+    recent = [message for turn in turns for message in turn]
+    return [_summary_message(summary_lines, summary_tokens)] + recent
+
+
+def history_stats(messages: List[Dict]) -> Dict:
+    """Sizes for logs"""
+    summarized = bool(messages) and is_summary(messages[0])
+    return {
+        "messages": len(messages),
+        "tokens": history_tokens(messages),
+        "summary_tokens": message_tokens(messages[0]) if summarized else 0
+    }
@@ -0,0 +1,246 @@
+"""
+Intent Router
+=============
+Answers common questions ("what are your hours", "where do I park", the quick
+action texts) from templates, without an LLM call.
+
+Each intent in ``data/intents.json`` has example phrasings and an answer
+template. A message is matched to its nearest example: the intent with the
+most similar example wins if
+
+- its similarity is at least the threshold, and
+- it beats the best example of any other intent by a margin, and
+- it isn't ``other`` (questions that need tools, RAG or the conversation).
+
+Anything else goes to the LLM as before.
+
+Two encoders share the router:
+
+- ``minilm``: the MiniLM model already loaded for RAG (via the embedding
+  service, so the query vector is cached and reused by retrieval)
+- ``ngram``: hashed word + character n-grams, pure NumPy, no model. Used
+  while RAG warms up or when sentence-transformers isn't installed.
+
+Answers are filled from ``business_info.json`` / ``menu.json``, so they
+change with the data.
+
+Usage:
+    router = IntentRouter(load_intents(), NgramEncoder())
+    match = router.route("where do i park?")
+    if match.confident:
+        reply = render_answer(match.intent, intents, BUSINESS_INFO, MENU_DATA)
+
+Configuration (environment variables):
+    INTENT_ROUTER     - "0" to send every message to the LLM (default: 1)
+    INTENT_ENCODER    - "ngram" or "minilm" (06 uses MiniLM once RAG has warmed up) (default: ngram)
+    INTENT_THRESHOLD  - Minimum similarity to answer from a template (default: per encoder)
+    INTENTS_PATH      - Intent examples and templates (default: data/intents.json)
+"""
+
+import json
+import os
+import re
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.schedule import Schedule
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "intents.json"
+FALLBACK_INTENT = "other"
+
+ENABLED = os.environ.get("INTENT_ROUTER", "1") == "1"
+ENCODER = os.environ.get("INTENT_ENCODER", "ngram")
+
+
+def load_intents(path: Optional[Path] = None) -> Dict[str, Dict]:
+    """Intent name -> {"examples": [...], "answer": template}"""
+    path = Path(path or os.environ.get("INTENTS_PATH") or DEFAULT_PATH)
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["intents"]
+
+
+class NgramEncoder:
+    """
+    Hashed words and character 3/4-grams, IDF-weighted, L2-normalized.
+
+    Character grams catch typos and word forms ("park", "parking"); words
+    count double so "address" stays closer to "location" than to "dress code".
+    ``fit`` weights features by how few examples share them, so "you" and
+    "the" count for little.
+    """
+    name = "ngram"
+    threshold = 0.45
+    WORD_WEIGHT = 2.0
+
+    def __init__(self, dims: int = 4096):
+        self.dims = dims
+        self.idf = np.ones(dims, dtype=np.float32)
+
+    def _features(self, text: str) -> List[tuple]:
+        words = re.sub(r"[^a-z0-9 ]+", " ", text.lower()).split()
+        padded = f" {' '.join(words)} "
+        grams = [padded[i:i + n] for n in (3, 4) for i in range(len(padded) - n + 1)]
+        return [(f"w:{word}", self.WORD_WEIGHT) for word in words] + [(gram, 1.0) for gram in grams]
+
+    def _counts(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dims), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                # crc32 rather than hash(): stable across processes
+                matrix[row, zlib.crc32(feature.encode("utf-8")) % self.dims] += weight
+        return np.log1p(matrix, out=matrix)
+
+    def fit(self, texts: Sequence[str]):
+        """Set the IDF weights from the intent examples"""
+        document_frequency = (self._counts(texts) > 0).sum(axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = self._counts(texts) * self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+
+class EmbeddingEncoder:
+    """Sentence embeddings from an ``encode_batch`` function (MiniLM in 05/06)"""
+    name = "minilm"
+    threshold = 0.7
+
+    def __init__(self, encode_batch: Callable[[List[str]], List[List[float]]]):
+        self.encode_batch = encode_batch
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.asarray(self.encode_batch(list(texts)), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+
+@dataclass
+class IntentMatch:
+    """Routing decision for one message"""
+    intent: str
+    score: float
+    margin: float
+    confident: bool
+    encoder: str
+    elapsed_ms: float = 0.0
+
+    def log_data(self) -> Dict:
+        return {
+            "intent": self.intent,
+            "score": round(self.score, 3),
+            "margin": round(self.margin, 3),
+            "confident": self.confident,
+            "encoder": self.encoder,
+            "elapsed_ms": round(self.elapsed_ms, 3)
+        }
+
+
+class IntentRouter:
+    """Nearest-example intent classifier with a confidence threshold"""
+
+    def __init__(self, intents: Dict[str, Dict], encoder, threshold: Optional[float] = None,
+                 margin: float = 0.05):
+        self.encoder = encoder
+        env_threshold = os.environ.get("INTENT_THRESHOLD")
+        self.threshold = threshold if threshold is not None else float(env_threshold or encoder.threshold)
+        self.margin = margin
+
+        self.intents = list(intents)
+        labels, examples = [], []
+        for index, intent in enumerate(self.intents):
+            for example in intents[intent]["examples"]:
+                labels.append(index)
+                examples.append(example)
+        self.labels = np.asarray(labels)
+        if hasattr(encoder, "fit"):
+            encoder.fit(examples)
+        self.matrix = encoder.encode(examples)
+        # Messages an intent's template can't answer well, e.g. a reservation
+        # request that already has a date or party size
+        self.skip = {intent: re.compile(intents[intent]["skip_if"])
+                     for intent in self.intents if intents[intent].get("skip_if")}
+
+    def classify(self, vector: Sequence[float], text: str = "") -> IntentMatch:
+        """Route an already-encoded (unit-length) message"""
+        scores = self.matrix @ np.asarray(vector, dtype=np.float32)
+        # Best example per intent
+        per_intent = np.full(len(self.intents), -1.0, dtype=np.float32)
+        np.maximum.at(per_intent, self.labels, scores)
+
+        order = np.argsort(-per_intent)
+        best = int(order[0])
+        runner_up = float(per_intent[order[1]]) if len(order) > 1 else -1.0
+        score = float(per_intent[best])
+        intent = self.intents[best]
+        margin = score - runner_up
+        confident = intent != FALLBACK_INTENT and score >= self.threshold and margin >= self.margin
+        if confident and intent in self.skip and self.skip[intent].search(text):
+            confident = False
+        return IntentMatch(intent, score, margin, confident, self.encoder.name)
+
+    def route(self, query: str) -> IntentMatch:
+        """Encode and route a message"""
+        start = time.perf_counter()
+        match = self.classify(self.encoder.encode([query])[0], query)
+        match.elapsed_ms = (time.perf_counter() - start) * 1000
+        return match
+
+
+def _answer_fields(business_info: Dict, menu_data: Dict, schedule: Optional[Schedule] = None) -> Dict[str, str]:
+    """Template placeholders, from the business data files"""
+    basic = business_info.get("basic", {})
+    address = basic.get("address", {})
+    schedule = schedule or Schedule.from_business_info(business_info)
+    special_hours = schedule.exception_lines()
+    hours_notes = [schedule.status_line(), schedule.notes]
+    if special_hours:
+        hours_notes.append("**Special hours:**\n" + "\n".join(f"- {line}" for line in special_hours))
+    gift_cards = business_info.get("gift_cards", {})
+
+    menu_lines = []
+    for category, items in menu_data.items():
+        if isinstance(items, dict):   # drinks: wine, beer, ...
+            count = sum(len(group) for group in items.values() if isinstance(group, list))
+            highlights = [group.replace("_", "-") for group in items]
+        else:
+            count = len(items)
+            highlights = [item["name"] for item in items[:2]]
+        menu_lines.append(f"- **{category.title()}** ({count}): {', '.join(highlights)}")
+
+    return {
+        "address": f"{address.get('street', '')}, {address.get('city', '')}, "
+                   f"{address.get('state', '')} {address.get('zip', '')}".strip(", "),
+        "phone": basic.get("phone", ""),
+        "email": basic.get("email", ""),
+        "website": basic.get("website", ""),
+        "hours_lines": "\n".join(f"- {line}" for line in schedule.weekly_lines()),
+        "hours_notes": "\n\n".join(note for note in hours_notes if note),
+        "parking": business_info.get("parking", {}).get("details", ""),
+        "menu_lines": "\n".join(menu_lines),
+        "dress_code": business_info.get("dress_code", ""),
+        "payment_methods": ", ".join(business_info.get("payment_methods", [])),
+        "accessibility": business_info.get("accessibility", ""),
+        "gift_card_locations": " and ".join(location.lower() for location in gift_cards.get("purchase_locations", [])),
+        "gift_card_expiration": gift_cards.get("expiration", "").lower()
+    }
+
+
+def render_answer(intent: str, intents: Dict[str, Dict], business_info: Dict, menu_data: Dict,
+                  schedule: Optional[Schedule] = None) -> Optional[str]:
+    """
+    The templated answer for an intent, or None if the data it needs is missing.
+    Hours come from ``schedule`` (built from business_info if not given).
+    """
+    template = intents.get(intent, {}).get("answer")
+    if not template:
+        return None
+    try:
+        return template.format(**_answer_fields(business_info, menu_data, schedule))
+    except (KeyError, AttributeError, TypeError):
+        return None
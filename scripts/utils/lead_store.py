@@ -0,0 +1,275 @@
+"""
+Lead Store
+==========
+VIP list signups from script 06, in a SQLite database (WAL mode).
+
+The old ``save_lead`` read the whole ``leads.json``, appended one lead and
+rewrote the file. Each signup cost time proportional to the list, and two
+sessions signing up at once could each rewrite the file without the other's
+lead.
+
+Here each signup is one indexed row insert:
+
+- Appends are O(1); the email column is UNIQUE, so a repeat signup (same
+  email, any case) is ignored instead of stored twice
+- All writes go through one writer task and one thread. Async handlers queue
+  their lead and await the result, so concurrent signups never race. Leads
+  that queue up while a commit is running are written together in the next
+  transaction (one fsync for the batch).
+- WAL mode lets exports and other processes read while the writer commits
+
+Usage:
+    leads = LeadWriter(LeadStore(BASE_DIR / "data" / "leads.db"))
+    added = await leads.add("Maria Rossi", "maria@example.com")   # False if already signed up
+
+Export / import:
+    python scripts/utils/lead_store.py export leads.csv
+    python scripts/utils/lead_store.py export leads.jsonl --format jsonl
+    python scripts/utils/lead_store.py import data/leads.json      # old JSON list
+    python scripts/utils/lead_store.py count
+
+Configuration (environment variables):
+    LEADS_DB_PATH  - SQLite file (default: data/leads.db)
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "leads.db"
+FIELDS = ["name", "email", "source", "timestamp"]
+
+
+def normalize_email(email: str) -> str:
+    """Emails differing only in case or surrounding spaces are the same lead"""
+    return email.strip().lower()
+
+
+class LeadStore:
+    """Leads table in a SQLite file; synchronous, used from one writer thread"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS leads "
+                "(id INTEGER PRIMARY KEY, email TEXT NOT NULL UNIQUE, name TEXT NOT NULL, "
+                "source TEXT NOT NULL, timestamp TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def add_many(self, leads: List[Dict]) -> List[bool]:
+        """
+        Insert leads in one transaction.
+
+        Returns:
+            One flag per lead: True if added, False if the email was already signed up
+
+        Raises:
+            Whatever a failing insert raised; none of the batch is saved then
+        """
+        added = []
+        with self._lock:
+            try:
+                for lead in leads:
+                    cursor = self._db.execute(
+                        "INSERT OR IGNORE INTO leads (email, name, source, timestamp) VALUES (?, ?, ?, ?)",
+                        (normalize_email(lead["email"]), lead.get("name", ""), lead.get("source", "chatbot"),
+                         lead.get("timestamp") or datetime.now().isoformat())
+                    )
+                    added.append(cursor.rowcount == 1)
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        return added
+
+    def add(self, name: str, email: str, source: str = "chatbot") -> bool:
+        """Insert one lead (False if the email was already signed up)"""
+        return self.add_many([{"name": name, "email": email, "source": source}])[0]
+
+    def exists(self, email: str) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM leads WHERE email = ?", (normalize_email(email),)).fetchone()
+        return row is not None
+
+    def count(self) -> int:
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM leads").fetchone()
+        return count
+
+    def iter_leads(self) -> Iterator[Dict]:
+        """All leads in signup order, streamed from a separate read connection"""
+        reader = sqlite3.connect(str(self.path))
+        try:
+            for row in reader.execute(f"SELECT {', '.join(FIELDS)} FROM leads ORDER BY id"):
+                yield dict(zip(FIELDS, row))
+        finally:
+            reader.close()
+
+    def export(self, out, fmt: str = "csv") -> int:
+        """Write every lead to a text stream as CSV or JSON Lines; returns the count"""
+        count = 0
+        writer = csv.DictWriter(out, fieldnames=FIELDS) if fmt == "csv" else None
+        if writer:
+            writer.writeheader()
+        for lead in self.iter_leads():
+            if writer:
+                writer.writerow(lead)
+            else:
+                out.write(json.dumps(lead, ensure_ascii=False) + "\n")
+            count += 1
+        return count
+
+    def import_leads(self, leads: Iterable[Dict], batch_size: int = 1000) -> int:
+        """Insert leads (e.g. the old leads.json list); returns how many were new"""
+        added = 0
+        batch = []
+        for lead in leads:
+            batch.append(lead)
+            if len(batch) >= batch_size:
+                added += sum(self.add_many(batch))
+                batch = []
+        if batch:
+            added += sum(self.add_many(batch))
+        return added
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class LeadWriter:
+    """
+    Single-writer async front end for a LeadStore.
+
+    Handlers await ``add``; one task drains the queue and commits everything
+    waiting in one transaction on a dedicated thread.
+    """
+
+    def __init__(self, store: LeadStore, max_batch_size: int = 500):
+        self.store = store
+        self.max_batch_size = max_batch_size
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="leads")
+        self._loop = None
+        self._queue = None
+        self._writer = None
+
+        self.batches = 0
+        self.written = 0
+        self.duplicates = 0
+
+    def _ensure_writer(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queue and writer belong to the running event loop
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._writer = loop.create_task(self._run_writer())
+
+    async def add(self, name: str, email: str, source: str = "chatbot") -> bool:
+        """Queue a signup and wait until it is committed (False for a duplicate email)"""
+        self._ensure_writer()
+        future = self._loop.create_future()
+        lead = {"name": name, "email": email, "source": source, "timestamp": datetime.now().isoformat()}
+        self._queue.put_nowait((lead, future))
+        return await future
+
+    async def _run_writer(self):
+        """Commit queued leads, batching whatever arrived during the previous commit"""
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                added = await self._loop.run_in_executor(
+                    self._executor, self.store.add_many, [lead for lead, _ in batch]
+                )
+                self.batches += 1
+                self.written += sum(added)
+                self.duplicates += len(added) - sum(added)
+                for (_, future), is_new in zip(batch, added):
+                    if not future.done():
+                        future.set_result(is_new)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def close(self):
+        """Stop the writer task and its thread"""
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+            self._loop = None
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict:
+        """Write counters for logging"""
+        return {
+            "batches": self.batches,
+            "written": self.written,
+            "duplicates": self.duplicates,
+            "avg_batch": round((self.written + self.duplicates) / self.batches, 2) if self.batches else 0.0
+        }
+
+
+def load_lead_store(path: Optional[Path] = None) -> LeadStore:
+    """Open the lead database (LEADS_DB_PATH overrides the default path)"""
+    return LeadStore(Path(os.environ.get("LEADS_DB_PATH") or path or DEFAULT_PATH))
+
+
+def main():
+    """Export, import or count leads"""
+    parser = argparse.ArgumentParser(description="VIP lead store")
+    parser.add_argument("--db", type=Path, default=None, help="SQLite file (default: LEADS_DB_PATH or data/leads.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Write all leads to a file (or - for stdout)")
+    export.add_argument("out", help="Output file, or - for stdout")
+    export.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+
+    legacy = commands.add_parser("import", help="Import a JSON list of leads (the old leads.json)")
+    legacy.add_argument("path", type=Path)
+
+    commands.add_parser("count", help="Number of leads")
+    args = parser.parse_args()
+
+    store = LeadStore(args.db) if args.db else load_lead_store()
+    if args.command == "export":
+        if args.out == "-":
+            count = store.export(sys.stdout, args.format)
+        else:
+            with open(args.out, 'w', encoding='utf-8', newline='') as f:
+                count = store.export(f, args.format)
+        print(f"✅ Exported {count} leads", file=sys.stderr)
+    elif args.command == "import":
+        with open(args.path, 'r', encoding='utf-8') as f:
+            leads = json.load(f)
+        added = store.import_leads(leads)
+        print(f"✅ Imported {added} new leads ({len(leads) - added} already present)")
+    else:
+        print(store.count())
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
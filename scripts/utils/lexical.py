@@ -0,0 +1,107 @@
+"""
+Lexical Search (BM25)
+=====================
+A small BM25 inverted index over the knowledge base chunks.
+
+Questions such as "Barolo price" or "corkage fee" hinge on exact words from
+the wine list and FAQ. MiniLM sometimes ranks a vaguely similar chunk above
+the one containing the term; BM25 scores exact term matches, and the two
+rankings are fused in ``utils/retrieval.py``.
+
+The index is built by ``setup_vectordb.py`` next to the embeddings
+(``restaurant_docs.bm25.json``) and loaded by scripts 05 and 06. Lookups
+touch only the postings of the query terms, so they take microseconds.
+"""
+
+import heapq
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "have", "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "our", "the",
+    "to", "we", "what", "when", "where", "which", "with", "you", "your"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [token for token in re.findall(r"\w+", text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of chunks"""
+
+    def __init__(self, chunks: List[Dict], postings: Dict[str, List[List[int]]],
+                 doc_lengths: List[int], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.avg_length = sum(doc_lengths) / len(doc_lengths) if doc_lengths else 0.0
+
+        # Precompute idf once per term
+        total = len(doc_lengths)
+        self.idf = {
+            term: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in postings.items()
+        }
+
+    @classmethod
+    def build(cls, chunks: List[Dict]) -> "BM25Index":
+        """Index chunks of the form {"id", "content", "source", "section"}"""
+        postings: Dict[str, List[List[int]]] = {}
+        doc_lengths = []
+        for doc_index, chunk in enumerate(chunks):
+            # Section titles carry strong terms ("Corkage Fee"), so index them too
+            tokens = tokenize(f"{chunk.get('section', '')} {chunk['content']}")
+            doc_lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                postings.setdefault(term, []).append([doc_index, frequency])
+        return cls(chunks, postings, doc_lengths)
+
+    def search(self, query: str, n_results: int = 3) -> List[Dict]:
+        """
+        Score chunks containing any query term.
+
+        Returns:
+            List of chunk dicts with a "score", best first
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_index, frequency in self.postings[term]:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_index] / self.avg_length
+                weight = frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+                scores[doc_index] = scores.get(doc_index, 0.0) + idf * weight
+
+        top = heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
+        return [{**self.chunks[doc_index], "score": score} for doc_index, score in top]
+
+    def count(self) -> int:
+        return len(self.chunks)
+
+    def save(self, path: Path):
+        """Write the index as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "chunks": self.chunks,
+                "postings": self.postings,
+                "doc_lengths": self.doc_lengths
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        """Read an index written by ``save``"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data["chunks"], data["postings"], data["doc_lengths"], data["k1"], data["b"])
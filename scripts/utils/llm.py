@@ -0,0 +1,100 @@
+"""
+Shared LLM Client
+=================
+One async OpenAI client shared by every Chainlit handler.
+
+Chainlit runs all sessions of a worker on a single asyncio event loop. A
+synchronous ``OpenAI`` client blocks that loop for the whole completion, so
+one slow answer freezes every other guest. ``AsyncOpenAI`` awaits the network
+instead, letting concurrent chats actually run concurrently.
+
+Usage:
+    from utils.llm import client, MODEL, stream_completion
+
+    response = await client.chat.completions.create(model=MODEL, messages=messages)
+
+    # Streaming, including responses that request tools
+    msg = cl.Message(content="")
+    reply = await stream_completion(messages, on_token=msg.stream_token, tools=TOOLS)
+
+Configuration (environment variables):
+    OPENAI_API_KEY   - API key
+    OPENAI_MODEL     - Model name (default: gpt-4o-mini)
+    OPENAI_BASE_URL  - Alternative endpoint (read by the OpenAI SDK), e.g. a local stub
+    OPENAI_TIMEOUT   - Request timeout in seconds (default: 60)
+"""
+
+import os
+from typing import Awaitable, Callable, Dict, List, Optional
+from openai import AsyncOpenAI
+
+MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", "60"))
+
+# A single client keeps one HTTP connection pool for the whole worker
+client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"), timeout=TIMEOUT)
+
+
+
+async def stream_completion(messages: List[Dict],
+                            on_token: Optional[Callable[[str], Awaitable]] = None,
+                            **kwargs) -> Dict:
+    """
+    Stream a chat completion, forwarding text as it arrives.
+
+    Tool calls arrive as fragments spread over many chunks (id and name first,
+    then the JSON arguments piece by piece). They are assembled by index so the
+    caller gets the same shape it would store in message history.
+
+    Args:
+        messages: Chat messages
+        on_token: Awaited with every text fragment (e.g. ``msg.stream_token``)
+        **kwargs: Extra create() arguments such as ``tools`` and ``tool_choice``.
+            Pass ``stream_options={"include_usage": True}`` to get token usage.
+
+    Returns:
+        {"content": str or None, "tool_calls": [{"id", "type", "function": {"name", "arguments"}}],
+         "usage": {"prompt_tokens", "completion_tokens", "total_tokens"} or None}
+    """
+    stream = await client.chat.completions.create(model=MODEL, messages=messages, stream=True, **kwargs)
+
+    content = ""
+    tool_calls: Dict[int, Dict] = {}
+    usage = None
+
+    async for chunk in stream:
+        # With include_usage, the last chunk carries usage and no choices
+        if getattr(chunk, "usage", None):
+            usage = {
+                "prompt_tokens": chunk.usage.prompt_tokens,
+                "completion_tokens": chunk.usage.completion_tokens,
+                "total_tokens": chunk.usage.total_tokens
+            }
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+
+        if delta.content:
+            content += delta.content
+            if on_token:
+                await on_token(delta.content)
+
+        for fragment in delta.tool_calls or []:
+            call = tool_calls.setdefault(fragment.index, {
+                "id": "",
+                "type": "function",
+                "function": {"name": "", "arguments": ""}
+            })
+            if fragment.id:
+                call["id"] = fragment.id
+            if fragment.function:
+                if fragment.function.name:
+                    call["function"]["name"] += fragment.function.name
+                if fragment.function.arguments:
+                    call["function"]["arguments"] += fragment.function.arguments
+
+    return {
+        "content": content or None,
+        "tool_calls": [tool_calls[index] for index in sorted(tool_calls)],
+        "usage": usage
+    }
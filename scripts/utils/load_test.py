@@ -0,0 +1,164 @@
+"""
+Concurrency Load Test
+=====================
+Measures per-session latency when many guests chat with one worker at once.
+
+Runs against a local stub server (no API key, no cost) and compares:
+- before: synchronous OpenAI client called inside an async handler
+- after:  the shared AsyncOpenAI client from utils/llm.py
+
+With --stream it compares streamed replies instead:
+- per-token: one msg.stream_token call (websocket frame) per chunk
+- coalesced: utils/streaming.py batching by time and size
+
+Every simulated session sends a few messages in a row; all sessions share one
+event loop, exactly like Chainlit sessions on a single worker. Latency is
+reported per session, from connecting until the session's last reply.
+
+Usage:
+    python scripts/utils/load_test.py
+    python scripts/utils/load_test.py --latency 0.5 --turns 3 --sessions 1 10 100
+    python scripts/utils/load_test.py --stream
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.stub_openai_server import STUB_REPLY, start_stub_server
+
+
+class FrameCounter:
+    """Stands in for cl.Message and counts the frames sent to the browser"""
+
+    def __init__(self):
+        self.frames = 0
+
+    async def stream_token(self, token: str):
+        self.frames += 1
+        await asyncio.sleep(0)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_sessions(handler, sessions: int, turns: int) -> List[float]:
+    """
+    Run concurrent chat sessions that all connect at the same moment.
+
+    Returns each session's latency: time from connecting until its last reply.
+    Measuring from the shared start (not from each call) includes the time a
+    session spends waiting for a blocked event loop.
+    """
+    latencies = []
+    start = time.perf_counter()
+
+    async def session(session_id: int):
+        for turn in range(turns):
+            await handler(f"Session {session_id} turn {turn}: what are your hours?")
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    return latencies
+
+
+def main():
+    """Main load test"""
+    parser = argparse.ArgumentParser(description="Chainlit handler concurrency load test")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub response time in seconds")
+    parser.add_argument("--turns", type=int, default=3, help="Messages per session")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--stream", action="store_true", help="Compare per-token vs coalesced streaming")
+    args = parser.parse_args()
+
+    # Streamed replies are longer so batching has something to batch
+    reply = " ".join([STUB_REPLY] * 8) if args.stream else STUB_REPLY
+    server, base_url = start_stub_server(latency=args.latency, reply=reply)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    # Import after the environment points at the stub
+    from openai import OpenAI
+    from utils.llm import client, MODEL
+    from utils.streaming import stream_to_message
+
+    sync_client = OpenAI(max_retries=0)
+    frames = []
+
+    async def before(text: str):
+        # The original handler body: blocks the event loop during the request
+        response = sync_client.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": text}]
+        )
+        return response.choices[0].message.content
+
+    async def after(text: str):
+        response = await client.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": text}]
+        )
+        return response.choices[0].message.content
+
+    async def per_token(text: str):
+        stream = await client.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": text}],
+            stream=True
+        )
+        msg = FrameCounter()
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                await msg.stream_token(chunk.choices[0].delta.content)
+        frames.append(msg.frames)
+
+    async def coalesced(text: str):
+        stream = await client.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": text}],
+            stream=True
+        )
+        msg = FrameCounter()
+        await stream_to_message(stream, msg)
+        frames.append(msg.frames)
+
+    if args.stream:
+        modes = (("per-token", per_token), ("coalesced", coalesced))
+    else:
+        modes = (("before", before), ("after", after))
+
+    print("=" * 70)
+    print(f"Load test: stub latency {args.latency:.2f}s, {args.turns} messages per session")
+    print("=" * 70)
+    print(f"\n{'mode':<10}{'sessions':>10}{'p50 (s)':>12}{'p99 (s)':>12}{'wall (s)':>12}{'frames/reply':>14}")
+
+    async def run_all():
+        # One event loop for the whole run, like a single Chainlit worker
+        for mode, handler in modes:
+            for sessions in args.sessions:
+                frames.clear()
+                start = time.perf_counter()
+                latencies = await run_sessions(handler, sessions, args.turns)
+                wall = time.perf_counter() - start
+                per_reply = f"{sum(frames) / len(frames):.1f}" if frames else "-"
+                print(f"{mode:<10}{sessions:>10}{percentile(latencies, 50):>12.3f}"
+                      f"{percentile(latencies, 99):>12.3f}{wall:>12.2f}{per_reply:>14}")
+
+    asyncio.run(run_all())
+
+    server.shutdown()
+    print("\n✅ Load test complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Prompt Token Measurement
+========================
+Replays a scripted 20-turn conversation against script 06's real tools and
+counts the prompt tokens sent on every LLM call. No API calls are made: the
+assistant's replies are scripted too. create_reservation is left out because it
+needs a live chat session.
+
+Three configurations are compared:
+
+- raw:      full history, full tool-result JSON (the original behaviour)
+- budget:   history capped by utils/history.py, full tool results
+- compact:  history budget + compact tool results (utils/tool_results.py)
+
+Tokens are counted with the local estimate in utils/history.py.
+
+Usage:
+    python scripts/utils/measure_prompt_tokens.py
+    python scripts/utils/measure_prompt_tokens.py --max-items 3
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from utils.history import compact_history, history_tokens
+from utils.tool_results import ToolResultStore, compact_tool_messages
+
+# (guest message, [(tool, arguments)], scripted answer)
+CONVERSATION = [
+    ("Hi! What kind of food do you serve?", [("get_menu_info", {})],
+     "We serve classic Italian: antipasti, house-made pasta, wood-fired pizza, entrees and desserts."),
+    ("What pasta dishes do you have?", [("get_menu_info", {"category": "pasta"})],
+     "Our pasta includes Spaghetti Carbonara, Linguine alle Vongole and more, all made in house."),
+    ("Anything vegetarian?", [("get_menu_info", {"dietary_filter": "vegetarian"})],
+     "Yes! Several dishes are vegetarian, including the Margherita pizza and Bruschetta."),
+    ("What are your hours?", [("get_business_info", {"info_type": "hours"})],
+     "We're open Tuesday to Sunday; closed Mondays. Weekend brunch runs 10 AM to 2 PM."),
+    ("Is there parking?", [("get_business_info", {"info_type": "parking"})],
+     "Yes, there's a free lot behind the restaurant and street parking nearby."),
+    ("Do you have gluten free options?", [("get_menu_info", {"dietary_filter": "gluten_free"})],
+     "We do: gluten-free pasta is available on request, plus several naturally gluten-free entrees."),
+    ("Tell me about the desserts", [("get_menu_info", {"category": "desserts"})],
+     "Tiramisu, panna cotta and cannoli are our most popular desserts."),
+    ("Can I book a table for 4 this Friday at 7pm?",
+     [("check_availability", {"date": "2030-01-04", "time": "19:00", "party_size": 4})],
+     "Good news, Friday at 7 PM is available for 4. Shall I book it?"),
+    ("How do I reach you if we're running late?", [("get_business_info", {"info_type": "contact"})],
+     "Just give us a call. We hold tables for 15 minutes."),
+    ("What's the dress code?", [("get_business_info", {"info_type": "dress_code"})],
+     "Smart casual. No need for a jacket."),
+    ("Do you host private events?", [("get_business_info", {"info_type": "private_dining"})],
+     "Yes, our private room seats 40 and a full buyout fits 120."),
+    ("What pizzas do you have?", [("get_menu_info", {"category": "pizza"})],
+     "Margherita, Diavola, Quattro Formaggi and a seasonal special."),
+    ("Which appetizers would you recommend?", [("get_menu_info", {"category": "appetizers"})],
+     "The Calamari Fritti and Burrata are guest favorites."),
+    ("Is the restaurant wheelchair accessible?", [("get_business_info", {"info_type": "accessibility"})],
+     "Yes, the entrance, dining room and restrooms are all accessible."),
+    ("What payment methods do you take?", [("get_business_info", {"info_type": "payment_methods"})],
+     "All major cards, Apple Pay and Google Pay."),
+    ("Any vegan dishes?", [("get_menu_info", {"dietary_filter": "vegan"})],
+     "A few: the marinara pizza and a seasonal vegetable pasta."),
+    ("What entrees do you have?", [("get_menu_info", {"category": "entrees"})],
+     "Chicken Parmigiana, Osso Buco and grilled branzino among others."),
+    ("Do you sell gift cards?", [("get_business_info", {"info_type": "gift_cards"})],
+     "Yes, in any amount, in the restaurant or online."),
+    ("Could we also book Saturday at 8pm for 2?",
+     [("check_availability", {"date": "2030-01-05", "time": "20:00", "party_size": 2})],
+     "Saturday at 8 PM for 2 is available. Would you like me to book it?"),
+    ("Thanks, that's all!", [], "Grazie! We look forward to seeing you."),
+]
+
+
+def load_tools():
+    """Script 06's tool implementations, without the Chainlit step wrapper"""
+    os.environ.setdefault("OPENAI_API_KEY", "sk-measure")
+    cwd = os.getcwd()
+    # Importing chainlit writes .chainlit/ into the working directory
+    with tempfile.TemporaryDirectory() as scratch, contextlib.redirect_stdout(io.StringIO()):
+        os.chdir(scratch)
+        try:
+            path = SCRIPTS_DIR / "06_final_polished.py"
+            spec = importlib.util.spec_from_file_location("final_polished", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        finally:
+            os.chdir(cwd)
+    tools = {name: getattr(module, name) for name in module.TOOL_HANDLERS}
+    return module.SYSTEM_PROMPT, {name: getattr(func, "__wrapped__", func) for name, func in tools.items()}
+
+
+def replay(system_prompt: str, tools: dict, budget: bool, compact: bool, max_items: int) -> list:
+    """Prompt tokens per turn (summed over the turn's LLM calls)"""
+    history, store, per_turn = [], ToolResultStore(), []
+    system_tokens = history_tokens([{"role": "system", "content": system_prompt}])
+
+    for turn, (guest, calls, answer) in enumerate(CONVERSATION):
+        history.append({"role": "user", "content": guest})
+        if budget:
+            history = compact_history(history)
+
+        prompt_tokens = system_tokens + history_tokens(history)
+        if calls:
+            tool_calls = [
+                {"id": f"call_{turn}_{i}", "type": "function",
+                 "function": {"name": name, "arguments": json.dumps(arguments)}}
+                for i, (name, arguments) in enumerate(calls)
+            ]
+            history.append({"role": "assistant", "content": None, "tool_calls": tool_calls})
+            for tool_call, (name, arguments) in zip(tool_calls, calls):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result = asyncio.run(tools[name](**arguments))
+                history.append({"role": "tool", "tool_call_id": tool_call["id"], "content": json.dumps(result)})
+            # Second call, with the tool results
+            prompt_tokens += system_tokens + history_tokens(history)
+
+        history.append({"role": "assistant", "content": answer})
+        if compact:
+            compact_tool_messages(history, store, max_items=max_items)
+        per_turn.append(prompt_tokens)
+    return per_turn
+
+
+def main():
+    """Replay the conversation in each configuration and print the totals"""
+    parser = argparse.ArgumentParser(description="Prompt tokens over a scripted 20-turn conversation")
+    parser.add_argument("--max-items", type=int, default=5, help="List items kept in compact results")
+    args = parser.parse_args()
+
+    system_prompt, tools = load_tools()
+    runs = {
+        "raw": replay(system_prompt, tools, budget=False, compact=False, max_items=args.max_items),
+        "budget": replay(system_prompt, tools, budget=True, compact=False, max_items=args.max_items),
+        "compact": replay(system_prompt, tools, budget=True, compact=True, max_items=args.max_items)
+    }
+
+    print("=" * 70)
+    print(f"Prompt tokens per turn ({len(CONVERSATION)} scripted turns, estimated)")
+    print("=" * 70)
+    print(f"\n{'turn':>6}" + "".join(f"{name:>12}" for name in runs))
+    for turn in range(len(CONVERSATION)):
+        if turn in (0, 4, 9, 14, 19):
+            print(f"{turn + 1:>6}" + "".join(f"{tokens[turn]:>12}" for tokens in runs.values()))
+    print(f"{'total':>6}" + "".join(f"{sum(tokens):>12}" for tokens in runs.values()))
+
+    raw_total = sum(runs["raw"])
+    print()
+    for name in ("budget", "compact"):
+        print(f"{name}: {100 * (1 - sum(runs[name]) / raw_total):.0f}% fewer prompt tokens than raw")
+    print("\n✅ Measurement complete")
+
+
+if __name__ == "__main__":
+    main()
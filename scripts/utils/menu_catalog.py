@@ -0,0 +1,285 @@
+"""
+Menu Catalog
+============
+Indexed, in-memory menu for the ``get_menu_info`` tool (04c, 05, 06), built
+once when ``menu.json`` is loaded.
+
+``get_menu_info`` used to walk every category list on each call, filter with
+``item.get(dietary_filter)`` and cut the result short: 06 looked at only the
+first 5 items of each category (a vegan dish in 6th place was never found),
+04c kept the first 10 matches with no way to ask for more. Drinks, nested
+one level deeper (wine, beer, ...), had their own code path or were skipped.
+
+Here:
+
+- Every dish and drink is one ``MenuItem`` (``__slots__``, dietary and
+  popular flags packed in one int). Drinks are ordinary items with
+  category "drinks" and a ``section`` ("wine", "beer", ...), so every
+  filter works the same on them.
+- Inverted indexes map category, section, dietary flag, popular and word
+  (of the name, description, category, section, wine type or flags) to the
+  set of matching items, stored as an int bitset. A query ANDs the sets of
+  its filters. A price range is two bisections into prefix sets of the
+  items sorted by price.
+- Search text drops filler words ("dish", "any", "with"). When no item has
+  every remaining word, the items with the most of them are returned,
+  marked ``partial``, rather than nothing: "grilled fish with lemon" finds
+  the grilled salmon.
+- Results come in pages (``offset`` / ``limit``) with the total count, so
+  nothing is dropped silently: the model can ask for the next page.
+
+Usage:
+    catalog = MenuCatalog.from_menu(MENU_DATA)
+    page = catalog.search(category="pasta", dietary=["vegetarian"], max_price=20, limit=10)
+    page.total, [item.to_dict() for item in page.items], page.next_offset
+    catalog.search(text="carbonara").items
+"""
+
+import bisect
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional
+
+PAGE_SIZE = 10
+
+# Bits of MenuItem.flags
+FLAGS = {"vegetarian": 1, "vegan": 2, "gluten_free": 4, "popular": 8}
+DIETARY = ("vegetarian", "vegan", "gluten_free")
+
+# Per-item fields that are stored on MenuItem rather than in ``details``
+_CORE_FIELDS = {"id", "name", "description", "price", "glass_price", "allergens", *FLAGS}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words that say nothing about which item is meant (after plural stripping)
+STOPWORDS = {"a", "an", "and", "any", "do", "dishe", "dish", "food", "for", "have", "in", "item", "of", "on",
+             "option", "or", "some", "something", "the", "what", "with", "you", "your"}
+
+
+def tokens(text: str) -> List[str]:
+    """Lowercase words with a trailing plural "s" dropped ("Pizzas" -> "pizza")"""
+    return [word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+            for word in TOKEN_PATTERN.findall(text.lower())]
+
+
+def search_words(text: str) -> List[str]:
+    """Tokens of a search, without filler words"""
+    return [token for token in tokens(text) if token not in STOPWORDS]
+
+
+def _union(masks: Iterable[int]) -> int:
+    union = 0
+    for mask in masks:
+        union |= mask
+    return union
+
+
+def _bits(mask: int) -> Iterator[int]:
+    """Positions of the set bits, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class MenuItem:
+    """One dish or drink"""
+
+    __slots__ = ("id", "name", "category", "section", "description", "price", "flags", "allergens", "details")
+
+    def __init__(self, raw: Dict, category: str, section: str = ""):
+        self.id = raw.get("id", "")
+        self.name = raw.get("name", "")
+        self.category = category
+        self.section = section
+        self.description = raw.get("description", "")
+        # Wine is priced by the glass (and bottle); the glass price is the one to filter on and show
+        self.price = raw.get("price", raw.get("glass_price"))
+        self.flags = sum(bit for flag, bit in FLAGS.items() if raw.get(flag))
+        self.allergens = tuple(raw.get("allergens", ()))
+        self.details = {key: value for key, value in raw.items() if key not in _CORE_FIELDS}
+
+    def has(self, flag: str) -> bool:
+        return bool(self.flags & FLAGS[flag])
+
+    def to_dict(self) -> Dict:
+        """Tool result form: dietary flags only when set, drink details (producer, bottle price, ...) merged in"""
+        item = {"category": self.category}
+        if self.section:
+            item["section"] = self.section
+        item["name"] = self.name
+        if self.description:
+            item["description"] = self.description
+        item["price"] = self.price
+        item.update({flag: True for flag in FLAGS if self.has(flag)})
+        if self.allergens:
+            item["allergens"] = list(self.allergens)
+        item.update(self.details)
+        return item
+
+
+@dataclass
+class MenuPage:
+    """One page of search results"""
+    items: List[MenuItem]
+    total: int
+    offset: int
+    limit: int
+    matches: int = 0        # every matching item (bitset), not only this page
+    partial: bool = False   # no item had every search word; these have the most
+
+    @property
+    def next_offset(self) -> Optional[int]:
+        end = self.offset + len(self.items)
+        return end if end < self.total else None
+
+
+class MenuCatalog:
+    """All menu items with inverted indexes over their attributes"""
+
+    def __init__(self, items: Iterable[MenuItem]):
+        self.items: List[MenuItem] = list(items)
+        self.all = (1 << len(self.items)) - 1
+
+        self.by_category: Dict[str, int] = {}
+        self.by_section: Dict[str, int] = {}
+        self.by_flag: Dict[str, int] = {flag: 0 for flag in FLAGS}
+        self.by_token: Dict[str, int] = {}
+        for index, item in enumerate(self.items):
+            bit = 1 << index
+            self.by_category[item.category] = self.by_category.get(item.category, 0) | bit
+            if item.section:
+                self.by_section[item.section] = self.by_section.get(item.section, 0) | bit
+            for flag, flag_bit in FLAGS.items():
+                if item.flags & flag_bit:
+                    self.by_flag[flag] |= bit
+            # Name and description words, plus category, section, wine type and set flags
+            # ("pizza", "red wine", "spicy", "vegan")
+            words = f"{item.name} {item.description} {item.category} {item.section} {item.details.get('type', '')} "
+            words = (words + " ".join(flag for flag in FLAGS if item.flags & FLAGS[flag])).replace("_", " ")
+            for token in tokens(words):
+                self.by_token[token] = self.by_token.get(token, 0) | bit
+
+        # Items sorted by price; _price_prefix[i] is the set of the i cheapest
+        priced = sorted((item.price, index) for index, item in enumerate(self.items)
+                        if isinstance(item.price, (int, float)))
+        self._prices = [price for price, _ in priced]
+        self._price_prefix = [0]
+        for _, index in priced:
+            self._price_prefix.append(self._price_prefix[-1] | (1 << index))
+
+    @classmethod
+    def from_menu(cls, menu_data: Dict) -> "MenuCatalog":
+        """Build from menu.json: category -> list of items, or -> {section: list of items} (drinks)"""
+        items = []
+        for category, entries in menu_data.items():
+            if isinstance(entries, dict):
+                for section, section_items in entries.items():
+                    items.extend(MenuItem(raw, category, section) for raw in section_items)
+            else:
+                items.extend(MenuItem(raw, category) for raw in entries)
+        return cls(items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self.by_category)
+
+    def price_range(self, min_price: Optional[float] = None, max_price: Optional[float] = None) -> int:
+        """Set of items priced within [min_price, max_price]"""
+        low = bisect.bisect_left(self._prices, min_price) if min_price is not None else 0
+        high = bisect.bisect_right(self._prices, max_price) if max_price is not None else len(self._prices)
+        return self._price_prefix[high] & ~self._price_prefix[low] if high > low else 0
+
+    def match(self, category: str = "", section: str = "", dietary: Iterable[str] = (), popular: bool = False,
+              min_price: Optional[float] = None, max_price: Optional[float] = None, text: str = "") -> int:
+        """Set of items matching every given filter (the intersection of their index entries)"""
+        mask = self.all
+        if category:
+            mask &= self.by_category.get(category, 0)
+        if section:
+            mask &= self.by_section.get(section, 0)
+        for flag in dietary:
+            if flag:
+                mask &= self.by_flag.get(flag, 0)
+        if popular:
+            mask &= self.by_flag["popular"]
+        if min_price is not None or max_price is not None:
+            mask &= self.price_range(min_price, max_price)
+        for token in search_words(text):
+            mask &= self.by_token.get(token, 0)
+        return mask
+
+    def closest(self, mask: int, text: str) -> int:
+        """Items of ``mask`` having the most of the search words (at least one)"""
+        word_masks = [self.by_token.get(token, 0) & mask for token in search_words(text)]
+        best, best_count = 0, 0
+        for index in _bits(mask & _union(word_masks)):
+            bit = 1 << index
+            count = sum(1 for word_mask in word_masks if word_mask & bit)
+            if count > best_count:
+                best, best_count = bit, count
+            elif count == best_count:
+                best |= bit
+        return best
+
+    def search(self, category: str = "", section: str = "", dietary: Iterable[str] = (), popular: bool = False,
+               min_price: Optional[float] = None, max_price: Optional[float] = None, text: str = "",
+               offset: int = 0, limit: int = PAGE_SIZE) -> MenuPage:
+        """
+        Matching items in menu order, one page at a time. If no item has every
+        search word, the closest items are returned with ``partial`` set.
+        """
+        mask = self.match(category, section, dietary, popular, min_price, max_price, text)
+        partial = False
+        if not mask and search_words(text):
+            mask = self.closest(self.match(category, section, dietary, popular, min_price, max_price), text)
+            partial = bool(mask)
+        total = bin(mask).count("1")
+        page = []
+        for position, index in enumerate(_bits(mask)):
+            if position >= offset + limit:
+                break
+            if position >= offset:
+                page.append(self.items[index])
+        return MenuPage(page, total, offset, limit, mask, partial)
+
+    def query(self, category: str = "", dietary: str = "", text: str = "", popular: bool = False,
+              max_price: Optional[float] = None, page: int = 1, page_size: int = PAGE_SIZE) -> Dict:
+        """
+        ``search`` as a ``get_menu_info`` result: one page of items, the total,
+        matches per category, and the next page number when there is one.
+        """
+        page = max(page, 1)
+        results = self.search(category=category, dietary=[dietary], popular=popular, max_price=max_price, text=text,
+                              offset=(page - 1) * page_size, limit=page_size)
+        filters = {"category": category, "dietary_filter": dietary, "search": text,
+                   "popular_only": popular, "max_price": max_price}
+        filters = {key: value for key, value in filters.items() if value}
+        if not results.total:
+            return {"found": False, "filters": filters, "message": "No menu items match these filters."}
+
+        pages = -(-results.total // page_size)
+        result = {
+            "found": True,
+            "filters": filters,
+            "total": results.total,
+            "page": page,
+            "pages": pages,
+            "categories": {name: bin(results.matches & bits).count("1") for name, bits in self.by_category.items()
+                           if results.matches & bits},
+            "items": [item.to_dict() for item in results.items],
+        }
+        first = results.offset + 1
+        result["message"] = (f"Items {first}-{results.offset + len(results.items)} of {results.total}"
+                             if results.items else f"Page {page} is past the last page ({pages})")
+        if results.partial:
+            result["partial_match"] = True
+            result["message"] = (f"No item matches every word of '{text}'; these are the closest matches. "
+                                 + result["message"])
+        if results.next_offset is not None:
+            result["next_page"] = page + 1
+            result["message"] += f"; ask for page {page + 1} for more"
+        return result
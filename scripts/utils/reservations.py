@@ -0,0 +1,236 @@
+"""
+Reservation Store
+=================
+Reservations made by the ``create_reservation`` tool (04b, 04c, 05, 06),
+kept in a SQLite database (WAL mode).
+
+``create_reservation`` used to return ``BELLA-{random 6 digits}`` and store
+nothing. With 900k possible numbers, two bookings share a number with even
+odds after about 1,100 reservations (birthday bound), and no one could look
+a booking up again.
+
+- Confirmation codes are ``BELLA-`` plus 6 characters from a 32-letter
+  alphabet without look-alikes (0/O, 1/I): about a billion codes. The code
+  column is UNIQUE, and a collision draws a new code, so two bookings never
+  share one.
+- Writes are idempotent. The model sometimes repeats a tool call (a retry
+  after a timeout, or the same call twice in one turn). The same guest (name
+  and phone) booking the same date, time and party size gets the existing
+  reservation back instead of a second one.
+- Indexed lookups by confirmation code, phone number and date/time slot
+- ``create`` can take an ``admit`` check (utils/availability.py) that sees
+  the date's bookings inside the write transaction, so a booking is only
+  written while its table is still free
+- ``ReservationRepository`` is the async front end for the scripts. Every
+  query runs in a worker thread (``asyncio.to_thread``), so the event loop
+  never waits on the database.
+
+Usage:
+    reservations = ReservationRepository(load_reservation_store())
+    reservation, created = await reservations.create(name, phone, date, time, party_size)
+    reservation.code                      # "BELLA-7KQ2MX"
+    await reservations.by_phone("555-123-4567")
+
+Configuration (environment variables):
+    RESERVATIONS_DB_PATH  - SQLite file (default: data/reservations.db)
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import secrets
+import sqlite3
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "reservations.db"
+CODE_PREFIX = "BELLA-"
+CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+CODE_LENGTH = 6
+CODE_ATTEMPTS = 5   # draws of a new code after a collision (each ~1 in a billion) before giving up
+
+COLUMNS = ["code", "name", "phone", "date", "time", "party_size", "special_requests", "status", "created"]
+
+
+def normalize_phone(phone: str) -> str:
+    """Digits only, without a leading US country code"""
+    digits = re.sub(r"\D", "", phone)
+    return digits[1:] if len(digits) == 11 and digits.startswith("1") else digits
+
+
+def new_code() -> str:
+    return CODE_PREFIX + "".join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+
+
+def idempotency_key(name: str, phone: str, date: str, time: str, party_size: int) -> str:
+    """Same guest, same slot, same party: the same booking"""
+    guest = " ".join(name.lower().split())
+    return hashlib.sha256(f"{guest}|{normalize_phone(phone)}|{date}|{time}|{party_size}".encode()).hexdigest()
+
+
+@dataclass
+class Reservation:
+    code: str
+    name: str
+    phone: str
+    date: str           # YYYY-MM-DD
+    time: str           # HH:MM
+    party_size: int
+    special_requests: str = ""
+    status: str = "confirmed"
+    created: str = ""
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class SlotUnavailable(Exception):
+    """The requested time has no free table (raised by ``create`` with ``admit``)"""
+
+
+class ReservationStore:
+    """Reservations table in a SQLite file (synchronous; see ReservationRepository)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5)
+        self._lock = threading.Lock()
+        self._writes = 0   # data_version only counts other connections' commits
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS reservations "
+                "(id INTEGER PRIMARY KEY, code TEXT NOT NULL UNIQUE, idempotency_key TEXT NOT NULL UNIQUE, "
+                "name TEXT NOT NULL, phone TEXT NOT NULL, date TEXT NOT NULL, time TEXT NOT NULL, "
+                "party_size INTEGER NOT NULL, special_requests TEXT NOT NULL DEFAULT '', "
+                "status TEXT NOT NULL DEFAULT 'confirmed', created TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS reservations_slot ON reservations (date, time)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS reservations_phone ON reservations (phone)")
+            self._db.commit()
+
+    def _select(self, where: str, params: tuple) -> List[Reservation]:
+        rows = self._db.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM reservations WHERE {where} ORDER BY date, time, id", params
+        ).fetchall()
+        return [Reservation(*row) for row in rows]
+
+    def create(self, name: str, phone: str, date: str, time: str, party_size: int,
+               special_requests: str = "",
+               admit: Optional[Callable[[List[Reservation]], bool]] = None) -> Tuple[Reservation, bool]:
+        """
+        Book a table, or return the identical booking made earlier.
+
+        ``admit`` receives the date's confirmed reservations and decides whether
+        the new one still fits. It runs inside the write transaction, so no
+        other connection can book in between.
+
+        Returns:
+            (reservation, created); created is False when the call repeated an earlier one
+
+        Raises:
+            SlotUnavailable: ``admit`` turned the booking down
+        """
+        key = idempotency_key(name, phone, date, time, party_size)
+        with self._lock:
+            existing = self._select("idempotency_key = ?", (key,))
+            if existing:
+                return existing[0], False
+
+            # Take the write lock before reading the day, so the check and
+            # the insert see the same bookings
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                existing = self._select("idempotency_key = ?", (key,))
+                if existing:
+                    self._db.rollback()
+                    return existing[0], False
+                if admit and not admit(self._select("date = ? AND status = 'confirmed'", (date,))):
+                    raise SlotUnavailable(f"No table for {party_size} on {date} at {time}")
+
+                reservation = Reservation(new_code(), name.strip(), normalize_phone(phone), date, time, party_size,
+                                          special_requests, created=datetime.now().isoformat(timespec="seconds"))
+                for attempt in range(CODE_ATTEMPTS):
+                    try:
+                        self._db.execute(
+                            f"INSERT INTO reservations ({', '.join(COLUMNS)}, idempotency_key) "
+                            f"VALUES ({', '.join('?' * (len(COLUMNS) + 1))})",
+                            tuple(reservation.to_dict().values()) + (key,)
+                        )
+                        break
+                    except sqlite3.IntegrityError as e:
+                        # Only a taken code is worth another try; anything else is the caller's data
+                        if "reservations.code" not in str(e) or attempt == CODE_ATTEMPTS - 1:
+                            raise
+                        reservation.code = new_code()
+                self._db.commit()
+                self._writes += 1
+                return reservation, True
+            except BaseException:
+                self._db.rollback()
+                raise
+
+    def get(self, code: str) -> Optional[Reservation]:
+        """Reservation by confirmation code (case-insensitive)"""
+        with self._lock:
+            found = self._select("code = ?", (code.strip().upper(),))
+        return found[0] if found else None
+
+    def by_phone(self, phone: str) -> List[Reservation]:
+        with self._lock:
+            return self._select("phone = ?", (normalize_phone(phone),))
+
+    def by_slot(self, date: str, time: Optional[str] = None) -> List[Reservation]:
+        """Confirmed reservations on a date, or at one date and time"""
+        with self._lock:
+            if time is None:
+                return self._select("date = ? AND status = 'confirmed'", (date,))
+            return self._select("date = ? AND time = ? AND status = 'confirmed'", (date, time))
+
+    def count(self) -> int:
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM reservations").fetchone()
+        return count
+
+    def version(self) -> Tuple[int, int]:
+        """Changes whenever any connection (this one or another process) commits a booking"""
+        with self._lock:
+            (data_version,) = self._db.execute("PRAGMA data_version").fetchone()
+        return data_version, self._writes
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ReservationRepository:
+    """Async access to a ReservationStore; queries run in worker threads"""
+
+    def __init__(self, store: ReservationStore):
+        self.store = store
+
+    async def create(self, name: str, phone: str, date: str, time: str, party_size: int,
+                     special_requests: str = "",
+                     admit: Optional[Callable[[List[Reservation]], bool]] = None) -> Tuple[Reservation, bool]:
+        return await asyncio.to_thread(self.store.create, name, phone, date, time, party_size,
+                                       special_requests, admit)
+
+    async def get(self, code: str) -> Optional[Reservation]:
+        return await asyncio.to_thread(self.store.get, code)
+
+    async def by_phone(self, phone: str) -> List[Reservation]:
+        return await asyncio.to_thread(self.store.by_phone, phone)
+
+    async def by_slot(self, date: str, time: Optional[str] = None) -> List[Reservation]:
+        return await asyncio.to_thread(self.store.by_slot, date, time)
+
+
+def load_reservation_store(path: Optional[Path] = None) -> ReservationStore:
+    """Open the reservation database (RESERVATIONS_DB_PATH overrides the default path)"""
+    return ReservationStore(Path(os.environ.get("RESERVATIONS_DB_PATH") or path or DEFAULT_PATH))
@@ -0,0 +1,125 @@
+"""
+Retrieval Helpers
+=================
+Shared per-turn retrieval results for the RAG scripts (05 and 06).
+
+A turn retrieves once. The resulting ``RetrievalContext`` is then handed to
+everything that needs it - the UI step, the prompt builder and the logs - so
+the query is never embedded or searched twice.
+
+``hybrid_retrieve`` runs dense (embedding) search and BM25 keyword search and
+merges the two rankings with reciprocal rank fusion, recording how long each
+retriever took.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+@dataclass
+class RetrievalContext:
+    """Chunks retrieved for one guest message"""
+    query: str
+    chunks: List[Dict] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.chunks)
+
+    def prompt_section(self) -> str:
+        """Format chunks for the system prompt"""
+        if not self.chunks:
+            return ""
+        section = "\n\nRETRIEVED CONTEXT:\n"
+        for chunk in self.chunks:
+            section += f"\nSource: {chunk['source']} - {chunk['section']}\n{chunk['content']}\n"
+        return section
+
+    def display(self) -> str:
+        """Format chunks for the retrieval step shown in the UI"""
+        if not self.chunks:
+            return "No relevant context found in knowledge base."
+        formatted = "**Retrieved Context:**\n\n"
+        for i, chunk in enumerate(self.chunks, 1):
+            formatted += f"{i}. **{chunk['source']}** - {chunk['section']}\n"
+            formatted += f"   {chunk['content'][:200]}...\n\n"
+        return formatted
+
+    def log_data(self) -> Dict:
+        """Compact summary for interaction logs"""
+        return {
+            "query": self.query[:100],
+            "chunks": len(self.chunks),
+            "sources": [f"{c['source']} - {c['section']}" for c in self.chunks],
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "timings_ms": {name: round(ms, 3) for name, ms in self.timings.items()}
+        }
+
+
+def reciprocal_rank_fusion(rankings: List[List[Dict]], n_results: int = 3, k: int = 60) -> List[Dict]:
+    """
+    Merge ranked chunk lists by reciprocal rank fusion.
+
+    Each chunk scores sum(1 / (k + rank)) over the lists it appears in, so a
+    chunk ranked well by both retrievers beats one ranked first by only one.
+    Raw scores are never compared, which matters because cosine similarity and
+    BM25 live on different scales.
+    """
+    fused: Dict[str, Dict] = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking, 1):
+            entry = fused.setdefault(chunk["id"], {**chunk, "score": 0.0})
+            entry["score"] += 1 / (k + rank)
+    return sorted(fused.values(), key=lambda chunk: chunk["score"], reverse=True)[:n_results]
+
+
+async def hybrid_retrieve(query: str, embed: Callable[[str], Awaitable[List[float]]], dense,
+                          lexical=None, n_results: int = 3, candidates: int = 10) -> RetrievalContext:
+    """
+    Retrieve with dense search, plus BM25 when a lexical index is available.
+
+    Args:
+        query: Guest's question
+        embed: Async query encoder (e.g. ``embedding_service.embed``)
+        dense: Retriever from utils/retrievers.py
+        lexical: Optional BM25Index from utils/lexical.py
+        n_results: Chunks to return after fusion
+        candidates: Chunks each retriever contributes to the fusion
+    """
+    retrieval = RetrievalContext(query=query)
+    start = time.perf_counter()
+
+    async def encode() -> List[float]:
+        step = time.perf_counter()
+        vector = await embed(query)
+        retrieval.timings["embed"] = (time.perf_counter() - step) * 1000
+        return vector
+
+    async def keyword_search() -> List[Dict]:
+        step = time.perf_counter()
+        hits = await asyncio.to_thread(lexical.search, query, candidates)
+        retrieval.timings["bm25"] = (time.perf_counter() - step) * 1000
+        return hits
+
+    # BM25 runs in a worker thread while the query is encoded; gather waits
+    # for both and collects the other's outcome if one of them fails
+    lexical_hits: Optional[List[Dict]] = None
+    if lexical is not None:
+        query_embedding, lexical_hits = await asyncio.gather(encode(), keyword_search())
+    else:
+        query_embedding = await encode()
+
+    step = time.perf_counter()
+    dense_hits = dense.search(query_embedding, n_results=candidates if lexical_hits is not None else n_results)
+    retrieval.timings["dense"] = (time.perf_counter() - step) * 1000
+
+    if lexical_hits is None:
+        retrieval.chunks = dense_hits
+    else:
+        retrieval.chunks = reciprocal_rank_fusion([dense_hits, lexical_hits], n_results=n_results)
+
+    retrieval.elapsed_ms = (time.perf_counter() - start) * 1000
+    return retrieval
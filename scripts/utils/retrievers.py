@@ -0,0 +1,158 @@
+"""
+Knowledge Base Retrievers
+=========================
+Pluggable vector search backends for the RAG scripts (05 and 06).
+
+The restaurant knowledge base is only a few dozen chunks, so a full vector
+database is optional. Two backends share one interface:
+
+- ``chroma``: the ChromaDB collection built by ``setup_vectordb.py``
+- ``numpy``:  a normalized float32 matrix searched with one matmul and an
+  ``argpartition`` top-k. Loaded (memory-mapped) from the compact
+  ``restaurant_docs.npy`` + ``restaurant_docs.json`` files written by the
+  setup script.
+
+Usage:
+    retriever = load_retriever(CHROMA_PATH)        # backend from RAG_BACKEND
+    chunks = retriever.search(query_embedding, n_results=3)
+
+Configuration (environment variables):
+    RAG_BACKEND  - "chroma" (default) or "numpy"
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+COLLECTION_NAME = "restaurant_docs"
+
+
+class Retriever:
+    """Interface shared by all knowledge base backends"""
+    name = "base"
+
+    def search(self, query_embedding: List[float], n_results: int = 3) -> List[Dict]:
+        """
+        Find the chunks closest to a query embedding.
+
+        Returns:
+            List of {"id", "content", "source", "section", "score"}, best first
+        """
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """Number of indexed chunks"""
+        raise NotImplementedError
+
+
+class ChromaRetriever(Retriever):
+    """Searches the persistent ChromaDB collection"""
+    name = "chroma"
+
+    def __init__(self, path: Path, collection_name: str = COLLECTION_NAME):
+        import chromadb
+        self.client = chromadb.PersistentClient(path=str(path))
+        self.collection = self.client.get_collection(name=collection_name)
+        self.space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+
+    def _similarity(self, distance: float) -> float:
+        # MiniLM vectors are unit length: squared L2 = 2 - 2 * cosine
+        if self.space == "l2":
+            return 1 - distance / 2
+        return 1 - distance
+
+    def search(self, query_embedding: List[float], n_results: int = 3) -> List[Dict]:
+        results = self.collection.query(query_embeddings=[query_embedding], n_results=n_results)
+
+        chunks = []
+        if results and results['documents'] and len(results['documents']) > 0:
+            for i, doc in enumerate(results['documents'][0]):
+                metadata = results['metadatas'][0][i] if results['metadatas'] else {}
+                distance = results['distances'][0][i] if results.get('distances') else None
+                chunks.append({
+                    "id": results['ids'][0][i],
+                    "content": doc,
+                    "source": metadata.get("source", "unknown"),
+                    "section": metadata.get("section", ""),
+                    "score": None if distance is None else self._similarity(distance)
+                })
+        return chunks
+
+    def count(self) -> int:
+        return self.collection.count()
+
+
+class NumpyRetriever(Retriever):
+    """Exact cosine search over an in-process float32 matrix"""
+    name = "numpy"
+
+    def __init__(self, matrix: np.ndarray, chunks: List[Dict]):
+        if len(matrix) != len(chunks):
+            raise ValueError(f"Index has {len(matrix)} vectors but {len(chunks)} chunks")
+        self.matrix = matrix
+        self.chunks = chunks
+
+    @classmethod
+    def load(cls, directory: Path, name: str = COLLECTION_NAME, mmap: bool = True) -> "NumpyRetriever":
+        """Load an index written by ``save_numpy_index``"""
+        directory = Path(directory)
+        matrix = np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None)
+        with open(directory / f"{name}.json", 'r', encoding='utf-8') as f:
+            chunks = json.load(f)
+        return cls(matrix, chunks)
+
+    def search(self, query_embedding: List[float], n_results: int = 3) -> List[Dict]:
+        if not self.chunks:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        # Rows are unit length, so the dot product is the cosine similarity
+        scores = self.matrix @ query
+        k = min(n_results, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [{**self.chunks[i], "score": float(scores[i])} for i in top]
+
+    def count(self) -> int:
+        return len(self.chunks)
+
+
+def save_numpy_index(directory: Path, ids: List[str], embeddings: List[List[float]],
+                     documents: List[str], metadatas: List[Dict], name: str = COLLECTION_NAME):
+    """Write the compact NumPy index: unit-normalized float32 vectors + chunk metadata"""
+    directory = Path(directory)
+    matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1, norms)
+
+    chunks = [
+        {
+            "id": chunk_id,
+            "content": document,
+            "source": (metadata or {}).get("source", "unknown"),
+            "section": (metadata or {}).get("section", "")
+        }
+        for chunk_id, document, metadata in zip(ids, documents, metadatas)
+    ]
+
+    np.save(directory / f"{name}.npy", matrix)
+    with open(directory / f"{name}.json", 'w', encoding='utf-8') as f:
+        json.dump(chunks, f, ensure_ascii=False)
+
+
+def load_retriever(path: Path, backend: str = None) -> Retriever:
+    """Open the knowledge base with the configured backend"""
+    backend = (backend or os.environ.get("RAG_BACKEND", "chroma")).lower()
+    if backend == "numpy":
+        return NumpyRetriever.load(path)
+    if backend == "chroma":
+        return ChromaRetriever(path)
+    raise ValueError(f"Unknown RAG_BACKEND '{backend}' (expected 'chroma' or 'numpy')")
@@ -0,0 +1,218 @@
+"""
+Opening Hours Schedule
+======================
+Opening hours parsed once from ``business_info.json`` and shared by every
+script: the system prompts, availability (utils/availability.py), the
+``get_business_info`` tool, the hours template answer and the "Hours &
+Location" quick action in 06.
+
+Before, 04a re-derived the hours with nested weekday if/else and
+``strptime`` on every call, and the same hours were typed out as prose in
+the prompts, in ``BUSINESS_CONFIG["hours"]`` and in ``on_hours``.
+
+- ``hours`` ("11:00 AM - 10:00 PM" or "Closed" per weekday) become a 7-day
+  table of (open, close) minutes after midnight.
+- ``hours_exceptions`` override single dates (holidays, private events):
+
+      "hours_exceptions": {
+        "2026-12-25": {"hours": "Closed", "reason": "Christmas Day"}
+      }
+
+  They are kept in a dict (O(1) lookup by date) and a sorted date list, so
+  "which exceptions are coming up" and "is there one before Friday" are
+  bisections.
+- Each day is one interval, so "is open at" and "slots in range" are
+  arithmetic on 15-minute slots, O(1). "Next open slot" is O(1) from a
+  precomputed days-until-open table per weekday, plus O(log n) to check for
+  exceptions in between.
+
+Usage:
+    schedule = load_schedule()
+    schedule.is_open_at(datetime.now())
+    schedule.next_open(datetime.now())          # datetime of the next open slot
+    schedule.slots(date(2026, 10, 23), 17 * 60, 20 * 60)   # range of slot indices
+    schedule.weekly_lines()                     # ["Monday: Closed", "Tuesday-Thursday: 11am-10pm", ...]
+"""
+
+import bisect
+import json
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "restaurant" / "business_info.json"
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+Hours = Optional[Tuple[int, int]]   # (open, close) minutes after midnight; None when closed
+
+
+def parse_hours(text: str) -> Hours:
+    """ "11:00 AM - 10:00 PM" -> (660, 1320); "Closed" -> None"""
+    if "-" not in text:
+        return None
+    opens, closes = (datetime.strptime(part.strip(), "%I:%M %p") for part in text.split("-", 1))
+    close = closes.hour * 60 + closes.minute or 24 * 60   # "12:00 AM" closing is midnight
+    return opens.hour * 60 + opens.minute, close
+
+
+def format_time(minutes: int) -> str:
+    """660 -> "11am", 630 -> "10:30am", 1440 -> "12am" """
+    hour, minute = divmod(minutes % (24 * 60), 60)
+    suffix = "am" if hour < 12 else "pm"
+    hour = hour % 12 or 12
+    return f"{hour}{suffix}" if not minute else f"{hour}:{minute:02d}{suffix}"
+
+
+def format_hours(hours: Hours) -> str:
+    return f"{format_time(hours[0])}-{format_time(hours[1])}" if hours else "Closed"
+
+
+def slot_time(slot: int) -> str:
+    """Slot index -> "HH:MM" """
+    minutes = slot * SLOT_MINUTES
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class Schedule:
+    """Weekly opening hours with per-date exceptions"""
+
+    def __init__(self, weekly: List[Hours], exceptions: Optional[Dict[date, Tuple[Hours, str]]] = None,
+                 notes: str = ""):
+        self.weekly = list(weekly)
+        self.exceptions = dict(exceptions or {})
+        self.notes = notes
+        self._exception_dates = sorted(self.exceptions)
+
+        # _days_to_open[w]: days from weekday w to the next weekday that opens (0 if w does)
+        self._days_to_open: List[Optional[int]] = []
+        for weekday in range(7):
+            ahead = [offset for offset in range(7) if self.weekly[(weekday + offset) % 7]]
+            self._days_to_open.append(ahead[0] if ahead else None)
+
+    @classmethod
+    def from_business_info(cls, business_info: Dict) -> "Schedule":
+        hours = business_info.get("hours", {})
+        exceptions = {
+            date.fromisoformat(day): (parse_hours(entry.get("hours", "Closed")), entry.get("reason", ""))
+            for day, entry in business_info.get("hours_exceptions", {}).items()
+        }
+        return cls([parse_hours(hours.get(day, "Closed")) for day in WEEKDAYS], exceptions, hours.get("notes", ""))
+
+    # -- single day -----------------------------------------------------------
+
+    def hours_on(self, day: date) -> Hours:
+        """Opening hours on a date (exception first, then the weekday)"""
+        exception = self.exceptions.get(day)
+        return exception[0] if exception else self.weekly[day.weekday()]
+
+    def exception_on(self, day: date) -> Optional[str]:
+        """Reason for special hours on a date, or None for regular hours"""
+        exception = self.exceptions.get(day)
+        return exception[1] if exception else None
+
+    def is_open_at(self, when: datetime) -> bool:
+        hours = self.hours_on(when.date())
+        return hours is not None and hours[0] <= when.hour * 60 + when.minute < hours[1]
+
+    def slots(self, day: date, start: int = 0, end: int = 24 * 60) -> range:
+        """Indices of the 15-minute slots open on a date that begin in [start, end) minutes"""
+        hours = self.hours_on(day)
+        if hours is None:
+            return range(0)
+        first = -(-max(start, hours[0]) // SLOT_MINUTES)
+        last = -(-min(end, hours[1]) // SLOT_MINUTES)
+        return range(first, max(first, last))
+
+    # -- across days ----------------------------------------------------------
+
+    def _next_exception(self, day: date) -> Optional[date]:
+        """First date with special hours on or after ``day``"""
+        index = bisect.bisect_left(self._exception_dates, day)
+        return self._exception_dates[index] if index < len(self._exception_dates) else None
+
+    def next_open(self, when: datetime, horizon_days: int = 366) -> Optional[datetime]:
+        """
+        Start of the first open slot at or after ``when`` (``when`` itself,
+        rounded up to a slot, if open). None if nothing opens within the horizon.
+        """
+        day = when.date()
+        minute = when.hour * 60 + when.minute + (1 if when.second or when.microsecond else 0)
+        today = self.slots(day, start=minute)
+        if today:
+            return datetime.combine(day, time()) + timedelta(minutes=today[0] * SLOT_MINUTES)
+
+        day += timedelta(days=1)
+        last_day = when.date() + timedelta(days=horizon_days)
+        while day <= last_day:
+            exception = self._next_exception(day)
+            if exception != day:
+                offset = self._days_to_open[day.weekday()]
+                opens = day + timedelta(days=offset) if offset is not None else None
+                if opens is not None and (exception is None or opens < exception):
+                    day = opens
+                    break
+                if exception is None:
+                    return None
+                day = exception   # regular days until then are closed
+            if self.hours_on(day):
+                break
+            day += timedelta(days=1)
+        else:
+            return None
+        if day > last_day:
+            return None
+        return datetime.combine(day, time()) + timedelta(minutes=self.slots(day)[0] * SLOT_MINUTES)
+
+    def upcoming_exceptions(self, start: date, days: int = 30) -> List[Tuple[date, Hours, str]]:
+        """(date, hours, reason) of special hours in [start, start + days)"""
+        first = bisect.bisect_left(self._exception_dates, start)
+        last = bisect.bisect_left(self._exception_dates, start + timedelta(days=days))
+        return [(day, *self.exceptions[day]) for day in self._exception_dates[first:last]]
+
+    # -- text -----------------------------------------------------------------
+
+    def weekly_lines(self) -> List[str]:
+        """Regular hours, consecutive weekdays with the same hours grouped"""
+        lines = []
+        start = 0
+        for weekday in range(1, 8):
+            if weekday == 7 or self.weekly[weekday] != self.weekly[start]:
+                days = WEEKDAYS[start].title()
+                if weekday - 1 > start:
+                    days += f"-{WEEKDAYS[weekday - 1].title()}"
+                lines.append(f"{days}: {format_hours(self.weekly[start])}")
+                start = weekday
+        return lines
+
+    def exception_lines(self, start: Optional[date] = None, days: int = 30) -> List[str]:
+        """Upcoming special hours, e.g. "Thursday, November 26: Closed (Thanksgiving)" """
+        return [f"{day.strftime('%A, %B')} {day.day}: {format_hours(hours)}" + (f" ({reason})" if reason else "")
+                for day, hours, reason in self.upcoming_exceptions(start or date.today(), days)]
+
+    def status_line(self, when: Optional[datetime] = None) -> str:
+        """ "Open now until 10pm" or "Closed now, opens Tuesday at 11am" """
+        when = when or datetime.now()
+        if self.is_open_at(when):
+            return f"Open now until {format_time(self.hours_on(when.date())[1])}"
+        opens = self.next_open(when)
+        if opens is None:
+            return "Closed now"
+        days_ahead = (opens.date() - when.date()).days
+        day = ("today" if days_ahead == 0 else "tomorrow" if days_ahead == 1
+               else opens.strftime("%A") if days_ahead < 7 else f"{opens.strftime('%A, %B')} {opens.day}")
+        return f"Closed now, opens {day} at {format_time(opens.hour * 60 + opens.minute)}"
+
+    def prompt_text(self) -> str:
+        """Hours block for a system prompt"""
+        lines = [f"  - {line}" for line in self.weekly_lines()]
+        if self.notes:
+            lines.append(f"  - {self.notes}")
+        return "- Hours:\n" + "\n".join(lines)
+
+
+def load_schedule(path: Optional[Path] = None) -> Schedule:
+    """Schedule from business_info.json"""
+    with open(path or DEFAULT_PATH, 'r', encoding='utf-8') as f:
+        return Schedule.from_business_info(json.load(f))
@@ -0,0 +1,407 @@
+"""
+Session Store
+=============
+Per-conversation state kept outside the worker process.
+
+``cl.user_session`` lives in the memory of the worker that accepted the
+websocket. A second worker can't see it and a restart loses it, so every
+conversation is tied to one process. Script 06 instead keeps its state
+(message history, counters, guest details) in a ``SessionStore`` keyed by the
+Chainlit thread id. Any worker can load a conversation.
+
+Three backends share one interface:
+
+- ``memory``: a dict in this process (single worker, the default)
+- ``sqlite``: a WAL-mode database file shared by workers on one host
+- ``redis``:  any Redis-compatible server, for workers on several hosts
+
+Every backend forgets a session after ``SESSION_TTL`` seconds without a load
+or save. Redis expires the keys itself. The memory backend keeps sessions in
+last-access order and drops the expired ones from the front on each access.
+The SQLite backend records the last access per session and deletes the
+expired ones at most once a minute.
+
+Values are stored as compact JSON. History is an append-only list of
+messages: a turn appends its new messages rather than rewriting the whole
+history. When ``compact_history`` folds the oldest turns into its summary,
+they are trimmed from the front of the list and the summary (a leading system
+message) is stored as a single field.
+
+Usage:
+    store = load_session_store(BASE_DIR / "data" / "sessions.db")
+    session = Session(store, cl.context.session.thread_id)
+    count = session.get("message_count", 0) + 1
+    session.set("message_count", count)
+    history = session.load_history()
+    ...
+    session.save_history(history)        # appends only the new messages
+
+Configuration (environment variables):
+    SESSION_BACKEND  - "memory" (default), "sqlite" or "redis"
+    SESSION_DB_PATH  - SQLite file (default: data/sessions.db)
+    REDIS_URL        - Redis server (default: redis://localhost:6379/0)
+    SESSION_TTL      - Seconds of inactivity before a session expires (default: 86400; 0 keeps them)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_TTL = 86400
+PRUNE_INTERVAL = 60   # seconds between expiry sweeps of the SQLite backend
+
+
+def encode(value: Any) -> str:
+    """Compact JSON for storage"""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def decode(text: Any) -> Any:
+    if isinstance(text, bytes):
+        text = text.decode("utf-8")
+    return json.loads(text)
+
+
+class SessionStore:
+    """Interface shared by all session backends"""
+    name = "base"
+
+    def get_state(self, session_id: str) -> Dict[str, Any]:
+        """All scalar fields of a session ({} if unknown)"""
+        raise NotImplementedError
+
+    def set_state(self, session_id: str, fields: Dict[str, Any]):
+        """Write the given fields, leaving the others untouched"""
+        raise NotImplementedError
+
+    def get_history(self, session_id: str) -> List[Dict]:
+        """Message history of a session, oldest first"""
+        raise NotImplementedError
+
+    def append_history(self, session_id: str, messages: List[Dict]):
+        """Add messages to the end of the history"""
+        raise NotImplementedError
+
+    def trim_history(self, session_id: str, count: int):
+        """Drop the oldest ``count`` messages"""
+        raise NotImplementedError
+
+    def replace_history(self, session_id: str, messages: List[Dict]):
+        """Rewrite the whole history"""
+        raise NotImplementedError
+
+    def delete(self, session_id: str):
+        """Forget a session"""
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """Sessions in this process. Values are still serialized, like the other backends."""
+    name = "memory"
+
+    def __init__(self, ttl_seconds: int = DEFAULT_TTL):
+        self.ttl_seconds = ttl_seconds
+        self._state: Dict[str, Dict[str, str]] = {}
+        self._history: Dict[str, List[str]] = {}
+        self._accessed: "OrderedDict[str, float]" = OrderedDict()   # session id -> last access, oldest first
+
+    def _touch(self, session_id: str):
+        """Mark the session as used now and drop the sessions idle for longer than the TTL"""
+        now = time.monotonic()
+        self._accessed[session_id] = now
+        self._accessed.move_to_end(session_id)
+        if not self.ttl_seconds:
+            return
+        while self._accessed:
+            oldest, last = next(iter(self._accessed.items()))
+            if now - last < self.ttl_seconds:
+                break
+            self.delete(oldest)
+
+    def get_state(self, session_id: str) -> Dict[str, Any]:
+        self._touch(session_id)
+        return {key: decode(value) for key, value in self._state.get(session_id, {}).items()}
+
+    def set_state(self, session_id: str, fields: Dict[str, Any]):
+        self._touch(session_id)
+        self._state.setdefault(session_id, {}).update((key, encode(value)) for key, value in fields.items())
+
+    def get_history(self, session_id: str) -> List[Dict]:
+        return [decode(message) for message in self._history.get(session_id, [])]
+
+    def append_history(self, session_id: str, messages: List[Dict]):
+        self._touch(session_id)
+        self._history.setdefault(session_id, []).extend(encode(message) for message in messages)
+
+    def trim_history(self, session_id: str, count: int):
+        del self._history.get(session_id, [])[:count]
+
+    def replace_history(self, session_id: str, messages: List[Dict]):
+        self._touch(session_id)
+        self._history[session_id] = [encode(message) for message in messages]
+
+    def delete(self, session_id: str):
+        self._state.pop(session_id, None)
+        self._history.pop(session_id, None)
+        self._accessed.pop(session_id, None)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a SQLite file. WAL mode lets several worker processes share it."""
+    name = "sqlite"
+
+    def __init__(self, path: Path, ttl_seconds: int = DEFAULT_TTL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5)
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS session_state "
+                "(session_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (session_id, key)) WITHOUT ROWID"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS session_messages "
+                "(session_id TEXT NOT NULL, seq INTEGER NOT NULL, message TEXT NOT NULL, "
+                "PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS session_access "
+                "(session_id TEXT PRIMARY KEY, last_access REAL NOT NULL) WITHOUT ROWID"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS session_access_time ON session_access (last_access)")
+            self._db.commit()
+
+    def _touch(self, session_id: str):
+        """Record the access and, at most once per PRUNE_INTERVAL, delete expired sessions (lock held)"""
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO session_access (session_id, last_access) VALUES (?, ?)", (session_id, now)
+        )
+        if self.ttl_seconds and now >= self._next_prune:
+            self._next_prune = now + PRUNE_INTERVAL
+            expired = "SELECT session_id FROM session_access WHERE last_access < ?"
+            for table in ("session_state", "session_messages", "session_access"):
+                self._db.execute(f"DELETE FROM {table} WHERE session_id IN ({expired})", (now - self.ttl_seconds,))
+
+    def get_state(self, session_id: str) -> Dict[str, Any]:
+        with self._lock:
+            self._touch(session_id)
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT key, value FROM session_state WHERE session_id = ?", (session_id,)
+            ).fetchall()
+        return {key: decode(value) for key, value in rows}
+
+    def set_state(self, session_id: str, fields: Dict[str, Any]):
+        with self._lock:
+            self._touch(session_id)
+            self._db.executemany(
+                "INSERT OR REPLACE INTO session_state (session_id, key, value) VALUES (?, ?, ?)",
+                [(session_id, key, encode(value)) for key, value in fields.items()]
+            )
+            self._db.commit()
+
+    def get_history(self, session_id: str) -> List[Dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT message FROM session_messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        return [decode(message) for (message,) in rows]
+
+    def _insert(self, session_id: str, messages: List[Dict], start: int):
+        self._db.executemany(
+            "INSERT INTO session_messages (session_id, seq, message) VALUES (?, ?, ?)",
+            [(session_id, start + i, encode(message)) for i, message in enumerate(messages)]
+        )
+
+    def append_history(self, session_id: str, messages: List[Dict]):
+        with self._lock:
+            (last,) = self._db.execute(
+                "SELECT COALESCE(MAX(seq), -1) FROM session_messages WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            self._touch(session_id)
+            self._insert(session_id, messages, last + 1)
+            self._db.commit()
+
+    def trim_history(self, session_id: str, count: int):
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM session_messages WHERE session_id = ? AND seq IN "
+                "(SELECT seq FROM session_messages WHERE session_id = ? ORDER BY seq LIMIT ?)",
+                (session_id, session_id, count)
+            )
+            self._db.commit()
+
+    def replace_history(self, session_id: str, messages: List[Dict]):
+        with self._lock:
+            self._db.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+            self._touch(session_id)
+            self._insert(session_id, messages, 0)
+            self._db.commit()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM session_state WHERE session_id = ?", (session_id,))
+            self._db.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+            self._db.execute("DELETE FROM session_access WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Sessions in a Redis-compatible server.
+
+    Uses only HSET/HGETALL for state and RPUSH/LRANGE/LTRIM for history, so
+    any client with the redis-py method names works (including ``FakeRedis``
+    from utils/fake_redis.py).
+    """
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "session:", ttl_seconds: int = DEFAULT_TTL):
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisSessionStore":
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _keys(self, session_id: str):
+        return f"{self.prefix}{session_id}:state", f"{self.prefix}{session_id}:history"
+
+    def _touch(self, session_id: str):
+        if self.ttl_seconds:
+            for key in self._keys(session_id):
+                self.client.expire(key, self.ttl_seconds)
+
+    def get_state(self, session_id: str) -> Dict[str, Any]:
+        state_key, _ = self._keys(session_id)
+        self._touch(session_id)   # a load counts as activity, as in the other backends
+        return {
+            (key.decode("utf-8") if isinstance(key, bytes) else key): decode(value)
+            for key, value in self.client.hgetall(state_key).items()
+        }
+
+    def set_state(self, session_id: str, fields: Dict[str, Any]):
+        state_key, _ = self._keys(session_id)
+        self.client.hset(state_key, mapping={key: encode(value) for key, value in fields.items()})
+        self._touch(session_id)
+
+    def get_history(self, session_id: str) -> List[Dict]:
+        _, history_key = self._keys(session_id)
+        self._touch(session_id)
+        return [decode(message) for message in self.client.lrange(history_key, 0, -1)]
+
+    def append_history(self, session_id: str, messages: List[Dict]):
+        _, history_key = self._keys(session_id)
+        if messages:
+            self.client.rpush(history_key, *[encode(message) for message in messages])
+            self._touch(session_id)
+
+    def trim_history(self, session_id: str, count: int):
+        _, history_key = self._keys(session_id)
+        self.client.ltrim(history_key, count, -1)
+
+    def replace_history(self, session_id: str, messages: List[Dict]):
+        _, history_key = self._keys(session_id)
+        self.client.delete(history_key)
+        self.append_history(session_id, messages)
+
+    def delete(self, session_id: str):
+        self.client.delete(*self._keys(session_id))
+
+
+class Session:
+    """
+    One conversation's state.
+
+    Fields are loaded once and written through individually on change. The
+    history remembers what is already stored, so ``save_history`` only sends
+    the difference: messages trimmed from the front, messages appended at the
+    end and, if it changed, the leading summary message.
+    """
+
+    HEAD_FIELD = "history_head"
+
+    def __init__(self, store: SessionStore, session_id: str):
+        self.store = store
+        self.id = session_id
+        self.state = store.get_state(session_id)
+        self._saved: Optional[List[str]] = None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.state.get(key, default)
+
+    def set(self, key: str, value: Any):
+        self.update(**{key: value})
+
+    def update(self, **fields):
+        """Write the fields whose value changed"""
+        changed = {key: value for key, value in fields.items() if self.state.get(key, object()) != value}
+        if changed:
+            self.state.update(changed)
+            self.store.set_state(self.id, changed)
+
+    def load_history(self) -> List[Dict]:
+        log = self.store.get_history(self.id)
+        self._saved = [encode(message) for message in log]
+        head = self.get(self.HEAD_FIELD)
+        return ([head] if head else []) + log
+
+    def save_history(self, messages: List[Dict]) -> str:
+        """
+        Persist the history with as few writes as possible.
+
+        Returns:
+            "append", "replace" or "unchanged" (for logs)
+        """
+        head = messages[0] if messages and messages[0].get("role") == "system" else None
+        log = messages[1:] if head else messages
+        self.update(**{self.HEAD_FIELD: head})
+
+        saved = self._saved if self._saved is not None else [encode(m) for m in self.store.get_history(self.id)]
+        current = [encode(message) for message in log]
+        self._saved = current
+
+        # Smallest number of stored messages dropped from the front such that
+        # the rest is still the start of the current log
+        trimmed = next(
+            (k for k in range(len(saved)) if saved[k:] == current[:len(saved) - k]),
+            len(saved)
+        )
+        if saved and trimmed == len(saved):
+            self.store.replace_history(self.id, log)
+            return "replace"
+
+        new = log[len(saved) - trimmed:]
+        if trimmed:
+            self.store.trim_history(self.id, trimmed)
+        if new:
+            self.store.append_history(self.id, new)
+        return "append" if trimmed or new else "unchanged"
+
+
+def load_session_store(sqlite_path: Path, backend: str = None) -> SessionStore:
+    """Open the session store with the configured backend"""
+    backend = (backend or os.environ.get("SESSION_BACKEND", "memory")).lower()
+    ttl_seconds = int(os.environ.get("SESSION_TTL", DEFAULT_TTL))
+    if backend == "memory":
+        return MemorySessionStore(ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteSessionStore(Path(os.environ.get("SESSION_DB_PATH") or sqlite_path), ttl_seconds=ttl_seconds)
+    if backend == "redis":
+        return RedisSessionStore.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/0"),
+                                          ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown SESSION_BACKEND '{backend}' (expected 'memory', 'sqlite' or 'redis')")
@@ -5,20 +5,34 @@ Initialize ChromaDB and populate with restaurant documents.
 Run this script before using scripts 05 and 06 that have RAG capabilities.
 
 Usage:
-    python scripts/utils/setup_vectordb.py
+    python scripts/utils/setup_vectordb.py          # incremental update
+    python scripts/utils/setup_vectordb.py --full   # rebuild from scratch
 
 This will:
 1. Load markdown documents (FAQ, catering, wine list)
 2. Chunk them intelligently by headers
-3. Generate embeddings
-4. Store in ChromaDB
+3. Generate embeddings for new or changed chunks only
+4. Store in ChromaDB (removing chunks that no longer exist)
+5. Export a compact NumPy index (RAG_BACKEND=numpy)
+6. Build the BM25 keyword index used for hybrid retrieval
+
+Chunk ids are stable (source + section + position) and each chunk stores a
+hash of its text, so editing one FAQ answer re-embeds just that chunk.
 """
 
+import argparse
+import hashlib
 import os
+import sys
 from pathlib import Path
 import re
 from typing import List, Dict
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.lexical import BM25Index
+from utils.retrievers import save_numpy_index
+
 try:
     import chromadb
     from chromadb.config import Settings
@@ -33,6 +47,8 @@ BASE_DIR = Path(__file__).parent.parent.parent
 DATA_DIR = BASE_DIR / "data" / "restaurant"
 CHROMA_DIR = BASE_DIR / "data" / "embeddings"
 
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
 # Files to embed
 DOCUMENTS = {
     "faq.md": "FAQ",
@@ -118,8 +134,30 @@ def chunk_by_headers(content: str, source: str, max_chunk_size: int = 1000) -> L
     return chunks
 
 
+def assign_chunk_ids(chunks: List[Dict]) -> List[Dict]:
+    """
+    Give every chunk a stable id and a content hash.
+
+    The id comes from source + section + position within that section, so it
+    survives edits to the text; the content hash tells whether the text changed.
+    """
+    seen = {}
+    for chunk in chunks:
+        position = seen.get((chunk['source'], chunk['section']), 0)
+        seen[(chunk['source'], chunk['section'])] = position + 1
+
+        key = f"{chunk['source']}|{chunk['section']}|{position}"
+        chunk['id'] = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        chunk['content_hash'] = hashlib.sha256(chunk['content'].encode('utf-8')).hexdigest()[:16]
+    return chunks
+
+
 def main():
     """Main setup function"""
+    parser = argparse.ArgumentParser(description="Build or update the restaurant knowledge base")
+    parser.add_argument("--full", action="store_true", help="Delete the collection and rebuild everything")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("Setting up Vector Database for Bella's Italian Restaurant")
     print("=" * 60)
@@ -129,26 +167,31 @@ def main():
 
     # Initialize embedding model
     print("\n[1/4] Loading embedding model...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    print("✓ Model loaded: all-MiniLM-L6-v2")
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    print(f"✓ Model loaded: {EMBEDDING_MODEL}")
 
     # Initialize ChromaDB
     print("\n[2/4] Initializing ChromaDB...")
     client = chromadb.PersistentClient(path=str(CHROMA_DIR))
 
-    # Delete existing collection if it exists
+    full_rebuild = args.full
     try:
+        existing = client.get_collection(name="restaurant_docs")
+        if (existing.metadata or {}).get("embedding_model") != EMBEDDING_MODEL:
+            print("  Embedding model changed - rebuilding everything")
+            full_rebuild = True
+    except Exception:
+        existing = None
+
+    if full_rebuild and existing is not None:
         client.delete_collection(name="restaurant_docs")
-        print("✓ Deleted existing collection")
-    except:
-        pass
+        print("✓ Deleted existing collection (--full)")
 
-    # Create new collection
-    collection = client.create_collection(
+    collection = client.get_or_create_collection(
         name="restaurant_docs",
-        metadata={"description": "Restaurant knowledge base documents"}
+        metadata={"description": "Restaurant knowledge base documents", "embedding_model": EMBEDDING_MODEL}
     )
-    print("✓ Created new collection: restaurant_docs")
+    print(f"✓ Using collection: restaurant_docs ({collection.count()} chunks stored)")
 
     # Process each document
     print("\n[3/4] Processing documents...")
@@ -177,39 +220,70 @@ def main():
 
     print(f"\n  Total chunks created: {len(all_chunks)}")
 
-    # Generate embeddings and store
-    print("\n[4/4] Generating embeddings and storing...")
-
     if not all_chunks:
         print("ERROR: No chunks to process!")
         return
 
-    # Prepare data for insertion
-    documents = [chunk['content'] for chunk in all_chunks]
-    metadatas = [
+    assign_chunk_ids(all_chunks)
+
+    # Compare with what is already stored
+    print("\n[4/4] Updating embeddings...")
+    stored = collection.get(include=["metadatas"])
+    stored_hashes = {
+        chunk_id: (metadata or {}).get("content_hash")
+        for chunk_id, metadata in zip(stored['ids'], stored['metadatas'])
+    }
+
+    current_ids = {chunk['id'] for chunk in all_chunks}
+    added = [c for c in all_chunks if c['id'] not in stored_hashes]
+    updated = [c for c in all_chunks if c['id'] in stored_hashes and stored_hashes[c['id']] != c['content_hash']]
+    removed = [chunk_id for chunk_id in stored_hashes if chunk_id not in current_ids]
+    skipped = len(all_chunks) - len(added) - len(updated)
+
+    changed = added + updated
+    if changed:
+        # Only new or edited chunks go through the embedding model
+        documents = [chunk['content'] for chunk in changed]
+        print(f"  Generating {len(documents)} embeddings...")
+        embeddings = model.encode(documents, show_progress_bar=True).tolist()
+
+        collection.upsert(
+            ids=[chunk['id'] for chunk in changed],
+            embeddings=embeddings,
+            documents=documents,
+            metadatas=[
+                {
+                    "source": chunk['source'],
+                    "section": chunk['section'],
+                    "level": chunk['level'],
+                    "content_hash": chunk['content_hash']
+                }
+                for chunk in changed
+            ]
+        )
+
+    if removed:
+        collection.delete(ids=removed)
+
+    print(f"  ✓ Added: {len(added)}  Updated: {len(updated)}  Removed: {len(removed)}  Skipped: {skipped}")
+
+    # Export the same vectors for the in-process NumPy backend
+    stored = collection.get(include=["embeddings", "documents", "metadatas"])
+    save_numpy_index(CHROMA_DIR, stored['ids'], stored['embeddings'], stored['documents'], stored['metadatas'])
+    print(f"  ✓ Exported NumPy index: {CHROMA_DIR / 'restaurant_docs.npy'}")
+
+    # BM25 over the same chunks (cheap to rebuild in full every run)
+    lexical_index = BM25Index.build([
         {
-            "source": chunk['source'],
-            "section": chunk['section'],
-            "level": chunk['level']
+            "id": chunk_id,
+            "content": document,
+            "source": (metadata or {}).get("source", "unknown"),
+            "section": (metadata or {}).get("section", "")
         }
-        for chunk in all_chunks
-    ]
-    ids = [f"doc_{i}" for i in range(len(all_chunks))]
-
-    # Generate embeddings
-    print(f"  Generating {len(documents)} embeddings...")
-    embeddings = model.encode(documents, show_progress_bar=True).tolist()
-
-    # Add to collection
-    print("  Storing in ChromaDB...")
-    collection.add(
-        embeddings=embeddings,
-        documents=documents,
-        metadatas=metadatas,
-        ids=ids
-    )
-
-    print("  ✓ All documents stored successfully")
+        for chunk_id, document, metadata in zip(stored['ids'], stored['documents'], stored['metadatas'])
+    ])
+    lexical_index.save(CHROMA_DIR / "restaurant_docs.bm25.json")
+    print(f"  ✓ Built BM25 index: {CHROMA_DIR / 'restaurant_docs.bm25.json'}")
 
     # Verify
     print("\n" + "=" * 60)
@@ -217,7 +291,8 @@ def main():
     print("=" * 60)
     print(f"\n📊 Statistics:")
     print(f"  - Total documents: {collection.count()}")
-    print(f"  - Embedding model: all-MiniLM-L6-v2")
+    print(f"  - Added / updated / removed / skipped: {len(added)} / {len(updated)} / {len(removed)} / {skipped}")
+    print(f"  - Embedding model: {EMBEDDING_MODEL}")
     print(f"  - Storage location: {CHROMA_DIR}")
 
     print(f"\n📝 Indexed documents:")
@@ -0,0 +1,80 @@
+"""
+Streaming Helpers
+=================
+Async streaming adapter that coalesces tokens before sending them to the UI.
+
+Models stream one token (often a single word piece) per chunk. Forwarding each
+one with ``msg.stream_token`` costs a websocket frame per token. The
+``TokenCoalescer`` buffers text and flushes it every ``flush_ms`` milliseconds
+or ``flush_chars`` characters, whichever comes first, so the guest still sees
+text appear smoothly while the worker sends far fewer frames.
+
+Usage:
+    stream = await client.chat.completions.create(model=MODEL, messages=messages, stream=True)
+
+    msg = cl.Message(content="")
+    await msg.send()
+    full_response = await stream_to_message(stream, msg)
+    await msg.update()
+
+Configuration (environment variables):
+    STREAM_FLUSH_MS     - Max time text waits in the buffer (default: 50)
+    STREAM_FLUSH_CHARS  - Flush once this many characters are buffered (default: 64)
+"""
+
+import os
+import time
+
+FLUSH_MS = int(os.environ.get("STREAM_FLUSH_MS", "50"))
+FLUSH_CHARS = int(os.environ.get("STREAM_FLUSH_CHARS", "64"))
+
+
+class TokenCoalescer:
+    """Buffers streamed tokens and forwards them to a message in batches"""
+
+    def __init__(self, msg, flush_ms: int = FLUSH_MS, flush_chars: int = FLUSH_CHARS):
+        self.msg = msg
+        self.flush_seconds = flush_ms / 1000
+        self.flush_chars = flush_chars
+        self.buffer = []
+        self.buffered_chars = 0
+        self.last_flush = time.monotonic()
+        self.frames = 0
+
+    async def push(self, token: str):
+        """Add a token, flushing if the buffer is old or large enough"""
+        self.buffer.append(token)
+        self.buffered_chars += len(token)
+
+        if (self.buffered_chars >= self.flush_chars
+                or time.monotonic() - self.last_flush >= self.flush_seconds):
+            await self.flush()
+
+    async def flush(self):
+        """Send everything buffered so far as a single frame"""
+        if self.buffer:
+            await self.msg.stream_token("".join(self.buffer))
+            self.frames += 1
+            self.buffer = []
+            self.buffered_chars = 0
+        self.last_flush = time.monotonic()
+
+
+async def stream_to_message(stream, msg, flush_ms: int = FLUSH_MS, flush_chars: int = FLUSH_CHARS) -> str:
+    """
+    Forward an async OpenAI stream to a Chainlit message with token coalescing.
+
+    Returns:
+        The full response text
+    """
+    coalescer = TokenCoalescer(msg, flush_ms, flush_chars)
+    full_response = ""
+
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            content = chunk.choices[0].delta.content
+            full_response += content
+            await coalescer.push(content)
+
+    await coalescer.flush()
+    return full_response
@@ -0,0 +1,159 @@
+"""
+Stub OpenAI Server
+==================
+A tiny OpenAI-compatible HTTP server for load tests and offline demos.
+It answers ``POST /v1/chat/completions`` after a fixed delay, with either a
+regular JSON response or a streamed (SSE) response when ``stream: true``.
+Token usage is a rough estimate (4 characters per prompt token, one token per
+word), sent as a final chunk when streaming with ``include_usage``.
+
+Usage:
+    python scripts/utils/stub_openai_server.py --port 8100 --latency 0.5
+
+    # Point the workshop scripts at it
+    OPENAI_BASE_URL=http://127.0.0.1:8100/v1 OPENAI_API_KEY=stub chainlit run scripts/02_with_system_prompt.py
+
+From Python:
+    server, base_url = start_stub_server(latency=0.5)
+    ...
+    server.shutdown()
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+STUB_REPLY = "Grazie! This is a stubbed answer from Bella's Italian Restaurant assistant."
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server carrying the stub's timing configuration"""
+    daemon_threads = True
+    request_queue_size = 512
+
+    def __init__(self, address, latency: float, token_delay: float, reply: str):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.token_delay = token_delay
+        self.reply = reply
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Handles chat completion requests"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Keep load test output readable
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+
+        time.sleep(self.server.latency)
+
+        if body.get("stream"):
+            self._send_stream(body)
+        else:
+            self._send_json(body)
+
+    def _usage(self, body: dict) -> dict:
+        prompt_tokens = len(json.dumps(body.get("messages", []))) // 4
+        completion_tokens = len(self.server.reply.split(" "))
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+    def _send_json(self, body: dict):
+        payload = json.dumps({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.server.reply},
+                "finish_reason": "stop"
+            }],
+            "usage": self._usage(body)
+        }).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_stream(self, body: dict):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        # One word per chunk, like a model streaming tokens
+        for word in self.server.reply.split(" "):
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.server.token_delay)
+
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [],
+                "usage": self._usage(body)
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def start_stub_server(port: int = 0, latency: float = 0.5, token_delay: float = 0.01,
+                      reply: str = STUB_REPLY) -> Tuple[StubServer, str]:
+    """Start the stub in a background thread. Returns (server, base_url)."""
+    server = StubServer(("127.0.0.1", port), latency, token_delay, reply)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    """Run the stub server in the foreground"""
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the first byte")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="Seconds between streamed chunks")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(args.port, args.latency, args.token_delay)
+    print(f"Stub OpenAI server listening on {base_url}")
+    print(f"  export OPENAI_BASE_URL={base_url} OPENAI_API_KEY=stub")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
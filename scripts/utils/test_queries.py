@@ -7,12 +7,19 @@ Tests each script's key features with sample queries.
 Usage:
     python scripts/utils/test_queries.py
 
+The guardrail, menu search and session store checks at the bottom run
+offline against the real data (data/guardrails.json, data/restaurant/menu.json)
+and the Redis session backend on FakeRedis, and fail loudly on a regression.
+
 Note: This is a simplified tester for workshop demonstration.
 In production, you'd use proper integration testing with pytest.
 """
 
 from pathlib import Path
 import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 # Test cases for each script
 TEST_CASES = [
@@ -105,6 +112,105 @@ TEST_CASES = [
 ]
 
 
+# Guardrail regressions: message -> expected (action, category), None = allowed through.
+# The benign questions once tripped single-word terms ("charge", "raw", "manager", "owner", "weather",
+# "sick", "ill").
+GUARDRAIL_CASES = [
+    ("What's your corkage charge?", None),
+    ("Is there a charge for cake cutting?", None),
+    ("Do you have any raw dishes like carpaccio?", None),
+    ("Table for 6 for my manager's retirement dinner", None),
+    ("Who is the owner of Bella's?", None),
+    ("Is the weather patio open?", None),
+    ("What's the weather?", ("reject", "off_topic")),
+    ("I was charged twice for my dinner", ("escalate", "financial_dispute")),
+    ("My chicken came out raw", ("escalate", "complaint")),
+    ("I want to speak to the manager", ("escalate", "management_request")),
+    ("I got food poisoning!", ("escalate", "health_emergency")),
+    # Whole words alone weren't enough for "sick" / "ill"
+    ("is the pasta dish ill-advised for kids?", None),
+    ("my kid is sick of pizza, any other options?", None),
+    ("do you have a sick day policy for staff?", None),
+    ("I'm sick from your food!", ("escalate", "health_emergency")),
+    ("we all felt ill after dinner last night", ("escalate", "health_emergency")),
+]
+
+
+def check_guardrails() -> int:
+    """Run GUARDRAIL_CASES through the local pipeline stages; returns the number of failures"""
+    from utils.guardrail_pipeline import load_pipeline
+    pipeline = load_pipeline()
+    failures = 0
+    for message, expected in GUARDRAIL_CASES:
+        verdict = pipeline.check(message).verdict
+        got = (verdict.action, verdict.category) if verdict else None
+        if got != expected:
+            failures += 1
+            print(f"   ❌ \"{message}\": expected {expected}, got {got}")
+    print(f"   {len(GUARDRAIL_CASES) - failures}/{len(GUARDRAIL_CASES)} guardrail cases pass")
+    return failures
+
+
+# Menu search regressions (get_menu_info's search argument): search -> a dish that must be among the results
+MENU_SEARCH_CASES = [
+    ("salmon dish", "Salmone alla Griglia"),
+    ("spicy pasta", "Penne Arrabbiata"),
+    ("vegan pizza", "Marinara"),
+    ("red wine", "Chianti"),
+    ("grilled fish with lemon", "Salmone alla Griglia"),   # no item has every word: closest match
+]
+
+
+def check_menu_search() -> int:
+    """Run MENU_SEARCH_CASES against the menu catalog; returns the number of failures"""
+    from utils.menu_catalog import MenuCatalog
+    with open(Path(__file__).resolve().parent.parent.parent / "data" / "restaurant" / "menu.json") as f:
+        catalog = MenuCatalog.from_menu(json.load(f))
+    failures = 0
+    for text, expected in MENU_SEARCH_CASES:
+        result = catalog.query(text=text)
+        names = [item["name"] for item in result.get("items", [])]
+        if not result["found"] or expected not in names:
+            failures += 1
+            print(f"   ❌ search \"{text}\": expected {expected}, got {names or result['message']}")
+    print(f"   {len(MENU_SEARCH_CASES) - failures}/{len(MENU_SEARCH_CASES)} menu search cases pass")
+    return failures
+
+
+def check_redis_session_store() -> int:
+    """Save, load, trim and TTL of the Redis session backend against FakeRedis; returns the number of failures"""
+    from utils.fake_redis import FakeRedis
+    from utils.session_store import RedisSessionStore, Session
+
+    client = FakeRedis()
+    store = RedisSessionStore(client, ttl_seconds=60)
+    messages = [{"role": "user", "content": f"message {i}"} for i in range(4)]
+    session = Session(store, "check")
+    session.set("message_count", 2)
+    session.load_history()
+    session.save_history(messages)
+    latest = messages[2:] + [{"role": "assistant", "content": "reply"}]
+    session.save_history(latest)   # trims 2, appends 1
+
+    client.ttls.clear()
+    reloaded = Session(store, "check")   # a load alone must renew the TTL
+    checks = {
+        "state saved and loaded": reloaded.get("message_count") == 2,
+        "history trimmed and appended": reloaded.load_history() == latest,
+        "TTL renewed on load": set(client.ttls.values()) == {60} and len(client.ttls) == 2,
+    }
+    store.delete("check")
+    checks["deleted"] = not store.get_state("check") and not store.get_history("check")
+
+    failures = 0
+    for name, passed in checks.items():
+        if not passed:
+            failures += 1
+            print(f"   ❌ redis session store: {name}")
+    print(f"   {len(checks) - failures}/{len(checks)} session store checks pass")
+    return failures
+
+
 def print_test_case(test_case: dict, index: int):
     """Print a formatted test case"""
     print(f"\n{'='*70}")
@@ -168,6 +274,11 @@ def main():
 
     print("\n✅ All test scenarios documented!")
 
+    print(f"\n{'='*70}")
+    print("Guardrail, Menu Search and Session Store Regressions")
+    print(f"{'='*70}")
+    failures = check_guardrails() + check_menu_search() + check_redis_session_store()
+
     # Save test cases to JSON for reference
     output_file = Path(__file__).parent.parent.parent / "docs" / "test_scenarios.json"
     output_file.parent.mkdir(exist_ok=True)
@@ -179,6 +290,9 @@ def main():
     except Exception as e:
         print(f"\n⚠️  Could not save test scenarios: {e}")
 
+    if failures:
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
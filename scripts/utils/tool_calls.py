@@ -0,0 +1,85 @@
+"""
+Tool Call Execution
+===================
+Runs every tool call from one assistant turn concurrently.
+
+When the model asks for several tools at once (e.g. ``check_availability``
+and ``get_menu_info``), awaiting them one after another makes the turn as slow
+as the sum of the tools. ``run_tool_calls`` starts them together with
+``asyncio.gather``, so the turn is only as slow as the slowest tool.
+
+Each call is isolated: bad arguments, an unknown tool, an exception or a
+timeout becomes an ``{"error": ...}`` result for that call only, which the
+model can read and explain to the guest. Results come back in the order the
+model requested them, ready to append to ``message_history``.
+
+Usage:
+    HANDLERS = {"check_availability": check_availability, "get_menu_info": get_menu_info}
+
+    message_history.extend(await run_tool_calls(assistant_message.tool_calls, HANDLERS))
+
+Configuration (environment variables):
+    TOOL_TIMEOUT - Seconds each tool may run before it is abandoned (default: 10)
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+TOOL_TIMEOUT = float(os.environ.get("TOOL_TIMEOUT", "10"))
+
+
+def tool_call_parts(tool_call: Any) -> Tuple[str, str, str]:
+    """(id, name, arguments) from an SDK tool call object or its dict form"""
+    if isinstance(tool_call, dict):
+        function = tool_call["function"]
+        return tool_call["id"], function["name"], function["arguments"]
+    return tool_call.id, tool_call.function.name, tool_call.function.arguments
+
+
+async def run_tool_call(name: str, arguments: str,
+                        handlers: Dict[str, Callable[..., Awaitable[Dict]]],
+                        timeout: float = TOOL_TIMEOUT) -> Dict:
+    """Run one tool call. Failures are returned as {"error": ...}, never raised"""
+    handler = handlers.get(name)
+    if handler is None:
+        return {"error": f"Unknown function: {name}"}
+
+    try:
+        args = json.loads(arguments or "{}")
+    except json.JSONDecodeError:
+        return {"error": f"Invalid arguments for {name}"}
+
+    try:
+        return await asyncio.wait_for(handler(**args), timeout)
+    except asyncio.TimeoutError:
+        print(f"[ERROR] Tool {name} timed out after {timeout}s")
+        return {"error": f"{name} timed out. Please try again."}
+    except Exception as e:
+        print(f"[ERROR] Tool {name} failed: {e}")
+        return {"error": f"{name} failed: {e}"}
+
+
+async def run_tool_calls(tool_calls: List[Any],
+                         handlers: Dict[str, Callable[..., Awaitable[Dict]]],
+                         timeout: float = TOOL_TIMEOUT) -> List[Dict]:
+    """
+    Run all tool calls of one assistant turn concurrently.
+
+    Args:
+        tool_calls: ``assistant_message.tool_calls`` (SDK objects or dicts)
+        handlers: Tool name -> async function taking the call's arguments
+        timeout: Per-tool timeout in seconds
+
+    Returns:
+        One {"role": "tool", ...} message per call, in the original order
+    """
+    calls = [tool_call_parts(tool_call) for tool_call in tool_calls]
+    results = await asyncio.gather(*(
+        run_tool_call(name, arguments, handlers, timeout) for _, name, arguments in calls
+    ))
+    return [
+        {"role": "tool", "tool_call_id": call_id, "content": json.dumps(result, default=str)}
+        for (call_id, _, _), result in zip(calls, results)
+    ]
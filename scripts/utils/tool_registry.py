@@ -0,0 +1,144 @@
+"""
+Tool Registry
+=============
+Declarative OpenAI tools: the JSON schema is generated from the function's
+type hints, so the schema and the code that runs it can't drift apart.
+
+Parameter types shared by every script (dates, party sizes, menu categories,
+business info topics) are defined once below, so the enums offered to the
+model are the same in 04b, 04c, 05 and 06.
+
+Usage:
+    registry = ToolRegistry()
+
+    @registry.tool("Check if a table is available")
+    @cl.step(name="Check Availability", type="tool")
+    async def check_availability(date: Date, time: Time, party_size: PartySize) -> dict:
+        ...
+
+    TOOLS = registry.schemas()          # built once, cached
+    TOOL_HANDLERS = registry.handlers   # name -> validating async callable
+
+Each handler validates the model's arguments with pydantic (coercing "4" to 4,
+rejecting unknown enum values) before calling the function. Invalid arguments
+come back as {"error": ...} so the model can correct itself.
+"""
+
+import inspect
+import typing
+from typing import Annotated, Any, Awaitable, Callable, Dict, List, Literal, Optional
+
+from pydantic import Field, ValidationError, create_model
+
+# Shared parameter types
+Date = Annotated[str, Field(description="Date in YYYY-MM-DD format (e.g., 2024-12-25)")]
+Time = Annotated[str, Field(description="Time in HH:MM 24-hour format (e.g., 19:00 for 7pm)")]
+PartySize = Annotated[int, Field(description="Number of guests (1-20)")]
+GuestName = Annotated[str, Field(description="Guest's full name")]
+Phone = Annotated[str, Field(description="Guest's phone number")]
+SpecialRequests = Annotated[str, Field(description="Any special requests or notes (optional)")]
+ConfirmationNumber = Annotated[str, Field(description="Reservation confirmation number, e.g. BELLA-7KQ2MX")]
+MenuCategory = Annotated[
+    Literal["appetizers", "pasta", "pizza", "entrees", "desserts", "drinks", ""],
+    Field(description="Menu category. Leave empty for all categories.")
+]
+DietaryFilter = Annotated[
+    Literal["vegetarian", "vegan", "gluten_free", ""],
+    Field(description="Filter by dietary preference. Leave empty for no filter.")
+]
+MenuSearch = Annotated[str, Field(description="Words to look for in item names and descriptions, e.g. 'carbonara', "
+                                             "'spicy' or 'red wine'. Leave empty for no search.")]
+PopularOnly = Annotated[bool, Field(description="Only the most popular items")]
+MaxPrice = Annotated[float, Field(description="Highest price in dollars. 0 for any price.", ge=0)]
+Page = Annotated[int, Field(description="Results page, starting at 1. Ask for the next page when more items exist.",
+                            ge=1)]
+BusinessInfoType = Annotated[
+    Literal["hours", "location", "parking", "dress_code", "accessibility", "services",
+            "payment_methods", "private_dining", "gift_cards", "contact"],
+    Field(description="Type of information requested")
+]
+ResultRef = Annotated[str, Field(description="The _ref of a shortened tool result, e.g. r3")]
+
+
+# Schema keywords whose value maps names to schemas: the names are data (a
+# parameter may well be called "title"), only the schemas get stripped
+_SCHEMA_MAPS = {"properties", "$defs", "definitions", "patternProperties"}
+
+
+def _strip_titles(schema: Any) -> Any:
+    """Drop the "title" keys pydantic adds to schema objects; the model doesn't need them"""
+    if isinstance(schema, dict):
+        stripped = {}
+        for key, value in schema.items():
+            if key == "title":
+                continue
+            if key in _SCHEMA_MAPS and isinstance(value, dict):
+                stripped[key] = {name: _strip_titles(item) for name, item in value.items()}
+            else:
+                stripped[key] = _strip_titles(value)
+        return stripped
+    if isinstance(schema, list):
+        return [_strip_titles(value) for value in schema]
+    return schema
+
+
+def _arguments_model(name: str, func: Callable) -> type:
+    """Pydantic model for a function's parameters, built from its type hints"""
+    hints = typing.get_type_hints(func, include_extras=True)
+    fields = {}
+    for param in inspect.signature(func).parameters.values():
+        annotation = hints.get(param.name, Any)
+        default = ... if param.default is inspect.Parameter.empty else param.default
+        fields[param.name] = (annotation, default)
+    return create_model(f"{name}_arguments", **fields)
+
+
+class ToolRegistry:
+    """Tools offered to the model, with schemas and validated dispatch"""
+
+    def __init__(self):
+        self.handlers: Dict[str, Callable[..., Awaitable[Dict]]] = {}
+        self._definitions: List[Dict] = []
+        self._schemas: Optional[List[Dict]] = None
+
+    def tool(self, description: str, name: Optional[str] = None):
+        """Decorator registering an async function as a tool"""
+        def register(func: Callable[..., Awaitable[Dict]]):
+            tool_name = name or func.__name__
+            model = _arguments_model(tool_name, func)
+
+            async def call(**arguments) -> Dict:
+                try:
+                    validated = model.model_validate(arguments)
+                except ValidationError as e:
+                    problems = "; ".join(
+                        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+                    )
+                    return {"error": f"Invalid arguments for {tool_name}: {problems}"}
+                return await func(**dict(validated))
+
+            self.handlers[tool_name] = call
+            self._definitions.append({
+                "type": "function",
+                "function": {
+                    "name": tool_name,
+                    "description": description,
+                    "parameters": _strip_titles(model.model_json_schema())
+                }
+            })
+            self._schemas = None
+            return func
+        return register
+
+    def schemas(self) -> List[Dict]:
+        """OpenAI ``tools`` list (cached until another tool is registered)"""
+        if self._schemas is None:
+            self._schemas = list(self._definitions)
+        return self._schemas
+
+    async def dispatch(self, name: str, arguments: Dict) -> Dict:
+        """Run one tool by name with already-parsed arguments"""
+        handler = self.handlers.get(name)
+        if handler is None:
+            return {"error": f"Unknown function: {name}"}
+        return await handler(**arguments)
@@ -0,0 +1,149 @@
+"""
+Compact Tool Results
+====================
+Shrinks tool results kept in ``message_history``.
+
+A ``get_menu_info`` result is ~3.7 KB of JSON, and it used to be resent on
+every later turn. Once a turn is answered, ``compact_tool_messages`` rewrites
+its tool results in a compact form:
+
+- null, false and empty fields are dropped
+- lists longer than ``max_items`` keep their first items plus an ``_omitted`` count
+- strings longer than ``max_chars`` are clipped
+
+When anything was dropped, the full result is kept in a per-session
+``ToolResultStore`` and the compact form carries a ``_ref``. The model can
+re-open it with the ``expand_tool_result`` tool. The current turn still sees
+the full result; only later turns see the compact one.
+
+Usage:
+    store = ToolResultStore()                       # one per chat session
+    compact_tool_messages(message_history, store)   # after the turn is answered
+    store.get("r1")                                 # full JSON for expand_tool_result
+
+Configuration (environment variables):
+    TOOL_RESULT_MAX_ITEMS  - List items kept per list (default: 5)
+    TOOL_RESULT_MAX_CHARS  - Longest string kept verbatim (default: 200)
+"""
+
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_ITEMS = int(os.environ.get("TOOL_RESULT_MAX_ITEMS", "5"))
+MAX_CHARS = int(os.environ.get("TOOL_RESULT_MAX_CHARS", "200"))
+
+
+class ToolResultStore:
+    """Full tool results of one session, by reference (oldest evicted first)"""
+
+    def __init__(self, max_entries: int = 50):
+        self.max_entries = max_entries
+        self._results: "OrderedDict[str, str]" = OrderedDict()
+        self._counter = 0
+
+    def next_ref(self) -> str:
+        """The ref the next ``put`` will return"""
+        return f"r{self._counter + 1}"
+
+    def put(self, content: str) -> str:
+        ref = self.next_ref()
+        self._counter += 1
+        self._results[ref] = content
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return ref
+
+    def get(self, ref: str) -> Optional[str]:
+        return self._results.get(ref)
+
+
+def compact_value(value: Any, max_items: int = MAX_ITEMS, max_chars: int = MAX_CHARS) -> Tuple[Any, bool]:
+    """
+    Compact a JSON value.
+
+    Returns:
+        (compacted value, True if information was dropped)
+    """
+    if isinstance(value, dict):
+        compacted, lossy = {}, False
+        for key, item in value.items():
+            if item is None or item is False or item in ("", [], {}):
+                lossy = lossy or item is False
+                continue
+            compacted[key], item_lossy = compact_value(item, max_items, max_chars)
+            lossy = lossy or item_lossy
+        return compacted, lossy
+
+    if isinstance(value, list):
+        kept = [compact_value(item, max_items, max_chars) for item in value[:max_items]]
+        compacted = [item for item, _ in kept]
+        lossy = any(item_lossy for _, item_lossy in kept)
+        if len(value) > max_items:
+            compacted.append({"_omitted": len(value) - max_items})
+            lossy = True
+        return compacted, lossy
+
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars - 3].rstrip() + "...", True
+
+    return value, False
+
+
+def compact_result(content: str, store: ToolResultStore,
+                   max_items: int = MAX_ITEMS, max_chars: int = MAX_CHARS) -> str:
+    """
+    Compact one tool message's JSON content.
+
+    The original is stored (and referenced by ``_ref``) only when something
+    was dropped and the compact form is the one returned, so a result that
+    doesn't shrink never takes a slot in the store.
+    """
+    try:
+        data = json.loads(content)
+    except (TypeError, json.JSONDecodeError):
+        return content
+
+    # Already compacted on an earlier turn
+    if isinstance(data, dict) and "_ref" in data:
+        return content
+
+    compacted, lossy = compact_value(data, max_items, max_chars)
+    if lossy:
+        ref = store.next_ref()
+        compacted = {**compacted, "_ref": ref} if isinstance(compacted, dict) else {"data": compacted, "_ref": ref}
+
+    compact = json.dumps(compacted, separators=(",", ":"), ensure_ascii=False)
+    if len(compact) >= len(content):
+        return content
+    if lossy:
+        store.put(content)
+    return compact
+
+
+def compact_tool_messages(messages: List[Dict], store: ToolResultStore,
+                          max_items: int = MAX_ITEMS, max_chars: int = MAX_CHARS) -> int:
+    """
+    Compact every tool message in place.
+
+    Returns:
+        Characters saved
+    """
+    saved = 0
+    for message in messages:
+        if message.get("role") != "tool":
+            continue
+        content = message.get("content") or ""
+        compact = compact_result(content, store, max_items, max_chars)
+        saved += len(content) - len(compact)
+        message["content"] = compact
+    return saved
+
+
+def expand_result(store: ToolResultStore, ref: str) -> Dict:
+    """Full result for ``ref``, or an error the model can read"""
+    content = store.get(ref)
+    if content is None:
+        return {"error": f"Result {ref} is no longer available. Call the original tool again."}
+    return json.loads(content)
@@ -153,6 +153,10 @@ def check_vector_db():
         count = collection.count()
         if count > 0:
             print(f"✓ Vector database initialized ({count} documents)")
+            if (CHROMA_DIR / "restaurant_docs.npy").exists():
+                print("✓ NumPy index exported (RAG_BACKEND=numpy available)")
+            else:
+                print("⚠ NumPy index missing - re-run setup_vectordb.py to use RAG_BACKEND=numpy")
             return True
         else:
             print("✗ Vector database empty")
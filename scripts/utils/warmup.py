@@ -0,0 +1,106 @@
+"""
+Background Warm-up
+==================
+Runs the slow RAG initialization (loading MiniLM and opening the knowledge
+base) in a worker thread after the server has started, instead of at import.
+
+Chainlit can accept connections as soon as the script is imported. Until the
+warm-up finishes, scripts 05 and 06 answer from the tools-only path; once it
+is done, retrieval switches on for every session.
+
+Usage:
+    rag_warmup = BackgroundInit("rag", initialize_vector_db)
+
+    @cl.on_app_startup
+    async def on_app_startup():
+        rag_warmup.start()
+        register_readiness_route(rag_warmup)
+
+Readiness:
+    GET /ready returns 503 while the warm-up runs and 200 once it has finished
+    (including when RAG ended up disabled). Chainlit's own /health is the
+    liveness check.
+"""
+
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+
+
+class BackgroundInit:
+    """Runs a blocking initializer once, in a worker thread"""
+
+    def __init__(self, name: str, initializer: Callable[[], bool]):
+        self.name = name
+        self.initializer = initializer
+        self.state = "pending"      # pending -> loading -> ready | disabled | failed
+        self.error: Optional[str] = None
+        self.elapsed_ms: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """True once the initializer succeeded"""
+        return self.state == "ready"
+
+    @property
+    def done(self) -> bool:
+        """True once the initializer has finished, successfully or not"""
+        return self.state in ("ready", "disabled", "failed")
+
+    def start(self) -> asyncio.Task:
+        """Start the warm-up on the running loop (later calls reuse the same task)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._task
+
+    async def _run(self):
+        self.state = "loading"
+        start = time.perf_counter()
+        try:
+            result = await asyncio.to_thread(self.initializer)
+            self.state = "ready" if result else "disabled"
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"[ERROR] {self.name} warm-up failed: {e}")
+        self.elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"[STARTUP] {self.name} warm-up {self.state} after {self.elapsed_ms:.0f} ms")
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the warm-up to finish. Returns ``ready``"""
+        task = self.start()
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.ready
+
+    def status(self) -> Dict:
+        """Readiness summary for logs and the /ready route"""
+        return {
+            "component": self.name,
+            "state": self.state,
+            "ready": self.done,
+            "elapsed_ms": None if self.elapsed_ms is None else round(self.elapsed_ms, 1),
+            "error": self.error
+        }
+
+
+def register_readiness_route(warmup: BackgroundInit, path: str = "/ready"):
+    """
+    Expose ``warmup`` as a readiness probe on the Chainlit server.
+
+    Chainlit serves its UI from a catch-all route, so the probe is inserted
+    ahead of it rather than appended.
+    """
+    from chainlit.server import app
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import APIRoute
+
+    async def readiness():
+        return JSONResponse(warmup.status(), status_code=200 if warmup.done else 503)
+
+    # Replace a probe left by an earlier load of the script (chainlit -w reloads)
+    app.router.routes[:] = [route for route in app.router.routes if getattr(route, "path", None) != path]
+    app.router.routes.insert(0, APIRoute(path, readiness, methods=["GET"]))